@@ -174,6 +174,7 @@ class AchievementSystem:
         self.data_file = "achievement_data.json"
         self.achievements_data = self.load_achievements()
         self.unlocked_notifications = []  # 待显示的成就通知
+        self.enabled = True  # 无头模拟/基准测试时关闭，避免污染存档
         
     def load_achievements(self):
         """Load achievement data"""
@@ -211,6 +212,8 @@ class AchievementSystem:
     
     def update_progress(self, achievement_type, value, **kwargs):
         """Update achievement progress"""
+        if not self.enabled:
+            return
         # 确保所有必要的字段存在
         if "game_completions" not in self.achievements_data["stats"]:
             self.achievements_data["stats"]["game_completions"] = 0
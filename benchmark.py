@@ -0,0 +1,309 @@
+# benchmark.py - 热点场景基准测试
+#
+# 用真实的 Player/Enemy/Bomber/Charger/子弹/Grenade/Boss/RoguelikeManager 构造命名场景，
+# 逐帧分别计时逻辑更新（step_session）与绘制（draw_session），输出分位数并写 JSON，
+# 便于跨提交对比：
+#   python benchmark.py                      # 运行全部场景
+#   python benchmark.py -s enemies_200 -t 300
+#   python benchmark.py --out new.json --compare old.json
+#   python benchmark.py --quality 0          # 固定最低画质档位，对比降档能省多少
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import subprocess
+
+# 基准测试始终无头运行（dummy 驱动、静音），须在导入 main_game 之前设置
+os.environ.setdefault("WARRIOR_HEADLESS", "1")
+
+import pygame  # noqa: E402
+import main_game as mg  # noqa: E402
+from achievement_system import achievement_system  # noqa: E402
+
+SCENARIOS = {}
+
+
+def scenario(name, description):
+    """注册场景：被装饰函数接收新建的 GameSession 完成布置，返回每帧输入函数 policy(s, tick)"""
+    def deco(fn):
+        SCENARIOS[name] = (description, fn)
+        return fn
+    return deco
+
+
+def _quiet_room(s):
+    # 清空房间并停止自然刷怪/道具，让场景完全由自身布置决定
+    s.enemies.empty(); s.walls.empty(); s.powerups.empty()
+    s.rl.target_enemies = s.rl.spawned = 10 ** 9
+    s.powerup_timer = -10 ** 9
+
+
+def _fill_enemies(s, cls, count, x0=40, y0=40, dx=36, dy=36):
+    cols = max(1, (mg.WIDTH - 2 * x0) // dx)
+    for i in range(count):
+        e = cls(s.walls) if cls is mg.Enemy else cls(s.walls, s.rl)
+        e.x = x0 + (i % cols) * dx
+        e.y = y0 + (i // cols) * dy
+        e.rect.topleft = (e.x - e.radius, e.y - e.radius)
+        s.enemies.add(e)
+
+
+def _idle(s, tick):
+    return mg.TickInput()
+
+
+@scenario("enemies_200", "200 standard enemies patrolling and shooting")
+def _enemies_200(s):
+    _quiet_room(s)
+    _fill_enemies(s, mg.Enemy, 200, dy=24)
+    for e in s.enemies:
+        e.health = e.max_health = 10 ** 6
+    return _idle
+
+
+@scenario("walled_150", "150 enemies spawned around a generated room's walls, player strafing with pistol fire")
+def _walled_150(s):
+    s.enemies.empty(); s.powerups.empty()
+    s.rl.target_enemies = s.rl.spawned = 10 ** 9
+    s.powerup_timer = -10 ** 9
+    for _ in range(150):
+        e = mg.Enemy(s.walls)
+        e.health = e.max_health = 10 ** 6
+        s.enemies.add(e)
+
+    def policy(s, tick):
+        s.player.gun_cooldown = 0
+        return mg.TickInput((tick // 90) % 2 * 2 - 1, (tick // 45) % 2 * 2 - 1, fire=True)
+    return policy
+
+
+@scenario("triple_spray", "Triple Buckshot (70 pellets) fired into a crowd of 60 enemies every 30 ticks")
+def _triple_spray(s):
+    _quiet_room(s)
+    s.player.selected_skill = 'triple'
+    _fill_enemies(s, mg.Enemy, 60, y0=60)
+    for e in s.enemies:
+        e.health = e.max_health = 10 ** 6
+
+    def policy(s, tick):
+        if tick % 30 == 0:
+            s.player.skill_cooldown = 0
+            return mg.TickInput(skill=True)
+        return mg.TickInput()
+    return policy
+
+
+@scenario("swarm_300", "300 enemies under sustained Triple Buckshot fire (hundreds of live pellets)")
+def _swarm_300(s):
+    _quiet_room(s)
+    s.player.selected_skill = 'triple'
+    s.player.y = mg.HEIGHT - 40
+    _fill_enemies(s, mg.Enemy, 300, x0=30, y0=30, dx=30, dy=24)
+    for e in s.enemies:
+        e.health = e.max_health = 10 ** 6
+
+    def policy(s, tick):
+        if tick % 15 == 0:
+            s.player.skill_cooldown = 0
+            return mg.TickInput(skill=True)
+        return mg.TickInput()
+    return policy
+
+
+@scenario("bomber_chain", "Dense pack of 60 one-hit Bombers detonated by a single bullet every 150 ticks")
+def _bomber_chain(s):
+    _quiet_room(s)
+
+    def policy(s, tick):
+        if tick % 150 == 0:
+            s.enemies.empty()
+            _fill_enemies(s, mg.Bomber, 60, x0=120, y0=60, dx=30, dy=30)
+            for e in s.enemies:
+                e.health = 1
+            first = next(iter(s.enemies))
+            s.bullets.spawn(first.x, first.y, 0, mg.PLAYER_BULLET_COLOR, "player")
+        return mg.TickInput()
+    return policy
+
+
+@scenario("boss_risk20", "Boss fight at Risk 20 with continuous pistol fire")
+def _boss_risk20(s):
+    _quiet_room(s)
+    s.rl.risk = 20; s.rl.apply_risk_modifiers()
+    s.boss = mg.Boss(s.rl); s.boss_spawned = True
+    s.boss.spawn_effect_timer = 0
+
+    def policy(s, tick):
+        s.player.gun_cooldown = 0
+        return mg.TickInput((tick // 60) % 3 - 1, 0, fire=True)
+    return policy
+
+
+def _particle_flood(s, count):
+    _quiet_room(s)
+    sparks = s.particles.sparks
+
+    def policy(s, tick):
+        while len(sparks) < count:
+            # 与原来每次爆炸的火花组成相同：30 黄、20 橙、10 灰
+            x = mg.game_rng.effects.randint(0, mg.WIDTH); y = mg.game_rng.effects.randint(0, mg.HEIGHT)
+            sparks.emit(x, y, 30, (255, 220, 100)); sparks.emit(x, y, 20, (255, 100, 50)); sparks.emit(x, y, 10, (150, 150, 150))
+        return mg.TickInput()
+    return policy
+
+
+@scenario("particles_2000", "2,000 live explosion particles topped up every tick")
+def _particles_2000(s):
+    return _particle_flood(s, 2000)
+
+
+@scenario("particles_20000", "20,000 live explosion particles topped up every tick")
+def _particles_20000(s):
+    return _particle_flood(s, 20000)
+
+
+@scenario("explosions_200", "200 live explosion animations (all palettes and sizes) topped up every tick")
+def _explosions_200(s):
+    _quiet_room(s)
+    explosions = s.particles.explosions
+    palettes = ("enemy", "grenade", "boss", "player")
+
+    def policy(s, tick):
+        # 固定尝试次数而不是 while：降档时同时播放的爆炸有上限，补不满 200 个
+        for _ in range(200 - len(explosions)):
+            i = len(explosions)
+            mg.create_explosion(s.particles, mg.game_rng.effects.randint(0, mg.WIDTH), mg.game_rng.effects.randint(0, mg.HEIGHT),
+                                (1.0, 1.5, 2.0)[i % 3], palettes[i % 4])
+        return mg.TickInput()
+    return policy
+
+
+def _percentiles(samples_ns):
+    if not samples_ns:
+        return {}
+    xs = sorted(samples_ns)
+    n = len(xs)
+
+    def pct(p):
+        return xs[min(n - 1, int(p / 100.0 * n))] / 1e6
+    return {
+        "mean": sum(xs) / n / 1e6,
+        "p50": pct(50), "p90": pct(90), "p99": pct(99), "max": xs[-1] / 1e6,
+    }
+
+
+def run_scenario(name, ticks=600, warmup=60, seed=12345, draw=True):
+    """运行单个场景，返回 {update_ms, draw_ms, ticks, entities}"""
+    description, setup = SCENARIOS[name]
+    prev_enabled = achievement_system.enabled
+    achievement_system.enabled = False
+    try:
+        s = mg.GameSession("Normal", seed=seed)
+        policy = setup(s)
+        update_ns = []; draw_ns = []
+        clock = time.perf_counter_ns
+        for tick in range(warmup + ticks):
+            # 场景关注性能而非胜负：保持玩家存活、关闭奖励菜单
+            s.player.health = s.player.max_health
+            s.game_over = False
+            s.reward_menu.visible = False
+            inp = policy(s, tick)
+            t0 = clock()
+            mg.step_session(s, inp)
+            t1 = clock()
+            if draw:
+                mg.draw_session(s)
+            t2 = clock()
+            if tick >= warmup:
+                update_ns.append(t1 - t0)
+                if draw:
+                    draw_ns.append(t2 - t1)
+        return {
+            "description": description,
+            "ticks": ticks,
+            "update_ms": _percentiles(update_ns),
+            "draw_ms": _percentiles(draw_ns),
+            "entities": {
+                "enemies": len(s.enemies), "bullets": len(s.bullets), "enemy_bullets": len(s.enemy_bullets),
+                "grenades": len(s.grenades), "particles": len(s.particles.sparks),
+                "explosions": len(s.particles.explosions), "boss": s.boss is not None,
+            },
+        }
+    finally:
+        achievement_system.enabled = prev_enabled
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except Exception:
+        return None
+
+
+def run_all(names=None, ticks=600, warmup=60, seed=12345, draw=True):
+    results = {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "platform": platform.platform(),
+        "scenarios": {},
+    }
+    for name in (names or SCENARIOS):
+        results["scenarios"][name] = run_scenario(name, ticks, warmup, seed, draw)
+    return results
+
+
+def format_report(results, baseline=None):
+    lines = [f"commit {results.get('commit')}  ({results['timestamp']})"]
+    lines.append(f"{'scenario':<16}{'update p50':>11}{'p99':>9}{'draw p50':>10}{'p99':>9}")
+    for name, r in results["scenarios"].items():
+        u = r["update_ms"]; d = r["draw_ms"] or {"p50": 0.0, "p99": 0.0}
+        line = f"{name:<16}{u['p50']:>11.3f}{u['p99']:>9.3f}{d['p50']:>10.3f}{d['p99']:>9.3f}"
+        base = (baseline or {}).get("scenarios", {}).get(name)
+        if base:
+            bu = base["update_ms"]["p50"]; bd = (base.get("draw_ms") or {}).get("p50")
+            line += f"   update x{bu / u['p50']:.2f}" if u["p50"] else ""
+            line += f"  draw x{bd / d['p50']:.2f}" if bd and d["p50"] else ""
+        lines.append(line)
+    if baseline:
+        lines.append(f"(xN = speedup vs baseline commit {baseline.get('commit')}, >1 is faster)")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Warrior Rimer scenario benchmarks")
+    parser.add_argument("-s", "--scenario", action="append", choices=sorted(SCENARIOS), help="只运行指定场景（可重复）")
+    parser.add_argument("-t", "--ticks", type=int, default=600)
+    parser.add_argument("--warmup", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=12345)
+    parser.add_argument("--no-draw", action="store_true", help="只测逻辑更新")
+    parser.add_argument("--quality", type=int, choices=range(mg.QUALITY_FULL + 1), default=mg.QUALITY_FULL,
+                        help="固定画质档位（默认全特效）")
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--compare", default=None, help="与之前的 JSON 结果对比")
+    parser.add_argument("--list", action="store_true")
+    args = parser.parse_args(argv)
+    if args.list:
+        for name, (desc, _) in SCENARIOS.items():
+            print(f"{name:<16}{desc}")
+        return 0
+    mg.quality.level = args.quality
+    results = run_all(args.scenario, args.ticks, args.warmup, args.seed, not args.no_draw)
+    results["quality"] = args.quality
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    print(format_report(results, baseline))
+    print(f"结果已写入 {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+# dirty_rects.py - 可选的脏矩形渲染
+#
+# 屏幕按 tile×tile 的格子划分，绘制前把本帧所有会画东西的包围盒（实体、流星、变化的 HUD）
+# 标到格子上；与上一帧标过的格子取并集，就是本帧需要从烘焙背景恢复、重画并提交到窗口的区域。
+# 区域按行合并成矩形条，交给 pygame.display.update(rects)；脏格子占比超过 full_ratio
+# （或调用方要求整屏，如屏幕震动、Boss 警告）时退回整屏重画 + display.flip()。
+import numpy as np
+import pygame
+
+
+class DirtyRegion:
+    """逐帧的脏格子集合（本帧 | 上一帧）"""
+    def __init__(self, width, height, tile=32, full_ratio=0.5, enabled=False):
+        self.width = width
+        self.height = height
+        self.tile = tile
+        self.full_ratio = full_ratio
+        self.enabled = enabled
+        self.cols = -(-width // tile)
+        self.rows = -(-height // tile)
+        self._cur = np.zeros((self.rows, self.cols), dtype=bool)
+        self._prev = np.zeros((self.rows, self.cols), dtype=bool)
+        self._full = True      # 首帧、切换画面后窗口内容未知，必须整屏
+        self._overlay = False  # 本帧有不在格子里的全屏叠加（震动、警告闪屏），下一帧也要整屏擦掉
+        self._scene = None
+        self.frames = 0
+        self.full_frames = 0
+        self.rects_pushed = 0
+
+    def invalidate(self):
+        """窗口内容已被脏矩形流程之外的绘制改变，下一帧整屏"""
+        self._full = True
+
+    def begin(self, scene=None):
+        """开始新的一帧；scene 与上一帧不同（换了画面或画面内容变了）时本帧整屏"""
+        self._cur[:] = False
+        if scene != self._scene:
+            self._scene = scene
+            self._full = True
+
+    def add(self, x0, y0, x1, y1):
+        """标记像素区域 [x0, x1) × [y0, y1)"""
+        t = self.tile
+        c0 = max(0, int(x0) // t); c1 = min(self.cols, (int(x1) - 1) // t + 1)
+        r0 = max(0, int(y0) // t); r1 = min(self.rows, (int(y1) - 1) // t + 1)
+        if c0 < c1 and r0 < r1:
+            self._cur[r0:r1, c0:c1] = True
+
+    def add_rect(self, rect):
+        if rect:
+            self.add(rect.left, rect.top, rect.right, rect.bottom)
+
+    def add_boxes(self, x0, y0, x1, y1):
+        """批量标记（NumPy 数组形式的包围盒）"""
+        if len(x0) < 32:
+            # 少量盒子时逐个标记比整列运算的固定开销更低
+            for box in zip(x0.tolist(), y0.tolist(), x1.tolist(), y1.tolist()):
+                self.add(*box)
+            return
+        t = self.tile
+        c0 = np.clip(np.floor(x0).astype(np.int64) // t, 0, self.cols)
+        c1 = np.clip((np.ceil(x1).astype(np.int64) - 1) // t + 1, 0, self.cols)
+        r0 = np.clip(np.floor(y0).astype(np.int64) // t, 0, self.rows)
+        r1 = np.clip((np.ceil(y1).astype(np.int64) - 1) // t + 1, 0, self.rows)
+        cur = self._cur
+        # 不超过 2×2 格的小盒子（粒子、子弹）标四个角即可整列完成，大的逐个切片
+        small = (r1 - r0 <= 2) & (c1 - c0 <= 2) & (r1 > r0) & (c1 > c0)
+        if small.any():
+            a = r0[small]; b = r1[small] - 1; c = c0[small]; d = c1[small] - 1
+            cur[a, c] = True; cur[a, d] = True; cur[b, c] = True; cur[b, d] = True
+        big = ~small
+        for a, b, c, d in zip(r0[big].tolist(), r1[big].tolist(), c0[big].tolist(), c1[big].tolist()):
+            cur[a:b, c:d] = True
+
+    def mark_full(self):
+        """本帧有全屏叠加（震动、警告闪屏、剖析图等）：本帧与下一帧都整屏"""
+        self._full = True
+        self._overlay = True
+
+    def full_frame(self):
+        """本帧是否应整屏重画：被要求整屏，或脏格子（本帧 | 上一帧）占比过大"""
+        if self._full:
+            return True
+        return (self._cur | self._prev).mean() > self.full_ratio
+
+    def rects(self):
+        """本帧 | 上一帧的脏格子，按行合并成矩形条，再把上下相同的条合并"""
+        t = self.tile
+        rects = []
+        open_runs = {}
+        for r, row in enumerate((self._cur | self._prev).tolist()):
+            runs = {}
+            c = 0
+            while c < self.cols:
+                if not row[c]:
+                    c += 1
+                    continue
+                c0 = c
+                while c < self.cols and row[c]:
+                    c += 1
+                rect = open_runs.get((c0, c))
+                if rect is not None:
+                    rect.height += t
+                else:
+                    rect = pygame.Rect(c0 * t, r * t, (c - c0) * t, t)
+                    rects.append(rect)
+                runs[(c0, c)] = rect
+            open_runs = runs
+        bounds = pygame.Rect(0, 0, self.width, self.height)
+        return [rect.clip(bounds) for rect in rects]
+
+    def present(self, rects=None):
+        """把本帧提交到窗口：rects 为 None 表示整屏 flip；随后本帧的格子成为“上一帧”"""
+        self.frames += 1
+        if rects is None:
+            self.full_frames += 1
+            pygame.display.flip()
+        else:
+            self.rects_pushed += len(rects)
+            pygame.display.update(rects)
+        self._full = self._overlay
+        self._overlay = False
+        self._prev, self._cur = self._cur, self._prev
+
+    def stats(self):
+        return {"frames": self.frames, "full_frames": self.full_frames, "rects": self.rects_pushed}
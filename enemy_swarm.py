@@ -0,0 +1,250 @@
+# enemy_swarm.py - 敌人移动/冷却/冲锋的整列更新
+#
+# 敌人仍然是 Sprite（绘制、命中、亡语都按对象处理），但每帧的巡逻移动、撞墙反向、边缘回弹、
+# 各种冷却递减、冲锋推进这些“人人都要做”的部分改为在 NumPy 数组上一次算完。
+# 只有少数“有事发生”的敌人（可能撞到玩家、冷却到点要开火、开始冲锋、冲锋结束要爆炸）
+# 才回到对象上、按组内顺序调用原来的方法结算，随机数消耗顺序与逐个 move() 完全一致。
+#
+# 数组是方向、冷却、冲锋状态的权威来源（成员不变时不回读对象属性）；位置每帧从对象读取，
+# 外部直接改 e.x/e.y 仍然生效。成员变化时按行增量重排，离队的敌人把状态写回对象。
+import numpy as np
+
+# 每行的列：与 _read/store 的顺序一致
+_FLOAT_COLS = ("speed", "direction", "radius", "cdx", "cdy", "cspeed", "ctravel", "cdist")
+_INT_COLS = ("shoot_cd", "collide_cd", "charge_cd")
+_BOOL_COLS = ("charger", "charging")
+
+
+def _read(e):
+    # 非冲锋型敌人没有 charge_* 属性，对应列填 0
+    charger = hasattr(e, 'charge_speed')
+    cdx, cdy = e.charge_dir if charger else (0.0, 0.0)
+    return (
+        e.speed, e.direction, e.radius, cdx, cdy,
+        e.charge_speed if charger else 0.0, e.charge_travel if charger else 0.0,
+        e.charge_distance if charger else 0.0,
+        e.shoot_cooldown, e.collision_cooldown, e.charge_cooldown if charger else 0,
+        charger, charger and e.is_charging,
+    )
+
+
+def _boxes_hit(bx, by, size, rects):
+    """各包围盒（左上角已按 pygame.Rect 取整）是否与 rects（(W, 4)）中任意一个相交"""
+    if not len(bx) or not len(rects):
+        return np.zeros(len(bx), dtype=bool)
+    bx = bx[:, None]; by = by[:, None]; size = size[:, None]
+    wx = rects[:, 0]; wy = rects[:, 1]
+    hit = (bx < wx + rects[:, 2]) & (bx + size > wx) & (by < wy + rects[:, 3]) & (by + size > wy)
+    return hit.any(axis=1)
+
+
+class EnemySwarm:
+    """一组敌人的运动状态（结构数组，行号与 enemies.sprites() 的顺序一致）。
+
+    敌人少于 batch_min 时整列运算的固定开销比逐个 move() 还高，此时退回逐个对象处理
+    （状态先写回对象），接口不变。"""
+    def __init__(self, width, height, batch_min=32):
+        self.width = width
+        self.height = height
+        self.batch_min = batch_min
+        self.members = []
+        self._scalar = None  # 逐个对象模式下的 (members, walls, player)
+        self._alloc(0)
+        self._flushed = 0
+        self._events = np.zeros(0, dtype=bool)
+
+    def _alloc(self, n):
+        for name in _FLOAT_COLS:
+            setattr(self, name, np.zeros(n))
+        for name in _INT_COLS:
+            setattr(self, name, np.zeros(n, dtype=np.int64))
+        for name in _BOOL_COLS:
+            setattr(self, name, np.zeros(n, dtype=bool))
+
+    def _columns(self):
+        return [getattr(self, name) for name in _FLOAT_COLS + _INT_COLS + _BOOL_COLS]
+
+    def __len__(self):
+        return len(self.members)
+
+    def sync(self, members):
+        """按新的成员列表重排各行：留下的敌人沿用数组状态，新加入的读取对象属性，离队的写回对象"""
+        old = self.members
+        if members == old:
+            return
+        index = {e: i for i, e in enumerate(old)}
+        rows = np.array([index.get(e, -1) for e in members], dtype=np.int64)
+        kept = rows >= 0
+        for e in set(old).difference(members):
+            self.store(index[e])
+        olds = self._columns()
+        self._alloc(len(members))
+        fresh = [e for e, k in zip(members, kept.tolist()) if not k]
+        fresh_rows = list(zip(*map(_read, fresh))) if fresh else None
+        for col, dst, src in zip(range(len(olds)), self._columns(), olds):
+            dst[kept] = src[rows[kept]]
+            if fresh_rows:
+                dst[~kept] = fresh_rows[col]
+        self.members = list(members)
+
+    def store(self, i):
+        """把第 i 行的运动状态写回对象（位置由 flush 负责）"""
+        e = self.members[i]
+        e.direction = int(self.direction[i])
+        e.shoot_cooldown = int(self.shoot_cd[i])
+        e.collision_cooldown = int(self.collide_cd[i])
+        if self.charger[i]:
+            e.is_charging = bool(self.charging[i])
+            e.charge_dir = (float(self.cdx[i]), float(self.cdy[i]))
+            e.charge_travel = float(self.ctravel[i])
+            e.charge_cooldown = int(self.charge_cd[i])
+
+    def load(self, i):
+        """对象上的方法改过状态后，把第 i 行重新读回数组"""
+        e = self.members[i]
+        for dst, value in zip(self._columns(), _read(e)):
+            dst[i] = value
+        self.x[i] = e.x; self.y[i] = e.y
+
+    def advance(self, members, walls, player):
+        """整列推进一步，返回需要逐个结算的行号（升序）。
+
+        与 Enemy.move/Charger.move 及随后的 shoot_cooldown -= 1 等价；
+        撞玩家、开始冲锋、冲锋结束爆炸、开火这几件事只标记出来，交给 resolve/fire 按顺序处理。
+        新位置先留在数组里，由 flush 按行号逐步写回，保证结算第 i 个敌人时
+        排在它后面的敌人仍处于“尚未移动”的位置（与逐个 move 时亡语看到的一致）。"""
+        n = len(members)
+        if n < self.batch_min:
+            self.sync([])
+            self._scalar = (members, walls, player)
+            return list(range(n))
+        self._scalar = None
+        self.sync(members)
+        self._flushed = 0
+        self.x = np.array([e.x for e in members], dtype=float)
+        self.y = np.array([e.y for e in members], dtype=float)
+        if not n:
+            self._events = np.zeros(0, dtype=bool)
+            self._xs = self._ys = []
+            self._rect_rows = set()
+            return []
+        W = self.width; H = self.height
+        rects = walls.rects()
+        x = self.x; y = self.y; r = self.radius; speed = self.speed
+        charging = self.charging
+        walk = ~charging
+
+        # 巡逻：横向移动，撞墙反向（矩形粗筛命中的再用墙体占用图精确判定）
+        dx = speed * self.direction
+        bx = np.trunc(x - r + dx).astype(np.int64)
+        by = np.trunc(y - r).astype(np.int64)
+        size = (2 * r).astype(np.int64)
+        blocked = _boxes_hit(bx, by, size, rects) & walk
+        for i in np.flatnonzero(blocked).tolist():
+            blocked[i] = walls.overlaps_rect(x[i] - r[i] + dx[i], y[i] - r[i], r[i] * 2, r[i] * 2)
+        moved = walk & ~blocked
+        self.direction[blocked] *= -1
+        nx = np.where(moved, x + dx, x)
+        # 边缘反弹与回退
+        left = walk & (nx <= r)
+        right = walk & ~left & (nx >= W - r)
+        nx[left] = r[left] + speed[left]
+        self.direction[left] = 1
+        nx[right] = (W - r[right]) - speed[right]
+        self.direction[right] = -1
+        ny = np.where(walk, np.maximum(r, np.minimum(H - r, y)), y)
+
+        # 撞玩家：冷却为 0 的先按略放宽的距离粗筛，精确判定在 resolve 里
+        reach = r + (player.radius + 1.0)
+        cd = self.collide_cd
+        ready = walk & (cd == 0)
+        near = (nx - player.x) ** 2 + (ny - player.y) ** 2 < reach * reach
+        touch = ready & near
+        cd[walk & (cd > 0)] -= 1
+
+        # 冲锋倒计时：到 0 的在 resolve 里朝玩家开始冲锋
+        idle = walk & self.charger
+        start = idle & (self.charge_cd <= 0)
+        self.charge_cd[idle & ~start] -= 1
+
+        # 冲锋中：直线推进并夹在屏幕内，撞墙/撞玩家/跑满距离的在 resolve 里引爆
+        if charging.any():
+            step = self.cspeed
+            cx = np.minimum(np.maximum(r, x + self.cdx * step), W - r)
+            cy = np.minimum(np.maximum(r, y + self.cdy * step), H - r)
+            bx = np.trunc(cx - r).astype(np.int64)
+            by = np.trunc(cy - r).astype(np.int64)
+            wall_hit = _boxes_hit(bx, by, size, rects) & charging
+            for i in np.flatnonzero(wall_hit).tolist():
+                wall_hit[i] = walls.overlaps_rect(cx[i] - r[i], cy[i] - r[i], r[i] * 2, r[i] * 2)
+            rush = charging & ~wall_hit
+            nx = np.where(rush, cx, nx)
+            ny = np.where(rush, cy, ny)
+            self.ctravel[rush] += step[rush]
+            boom = charging & (wall_hit | ((nx - player.x) ** 2 + (ny - player.y) ** 2 < reach * reach)
+                               | (self.ctravel >= self.cdist))
+        else:
+            wall_hit = rush = boom = charging
+
+        # 射击冷却
+        self.shoot_cd -= 1
+        fire = self.shoot_cd <= 0
+
+        self.x = nx; self.y = ny
+        self._xs = nx.tolist(); self._ys = ny.tolist()
+        self._touch = touch; self._start = start; self._boom = boom; self._wall_hit = wall_hit
+        self._rect_rows = set(np.flatnonzero(rush).tolist())
+        self._events = touch | start | boom
+        return np.flatnonzero(self._events | fire).tolist()
+
+    def flush(self, upto=None):
+        """把第 upto 行（含）及之前尚未写回的新位置写回对象；不给参数时写回全部"""
+        if self._scalar:
+            return
+        end = len(self.members) if upto is None else upto + 1
+        members = self.members; xs = self._xs; ys = self._ys; rect_rows = self._rect_rows
+        for i in range(self._flushed, end):
+            e = members[i]
+            e.x = xs[i]; e.y = ys[i]
+            if i in rect_rows:
+                e.rect.topleft = (e.x - e.radius, e.y - e.radius)
+        self._flushed = max(self._flushed, end)
+
+    def resolve(self, i, player):
+        """结算第 i 行的撞玩家/冲锋事件，返回 (collided_with_player, player_died, enemy_died)"""
+        if self._scalar:
+            members, walls, player = self._scalar
+            return members[i].move(walls, player)
+        if not self._events[i]:
+            return False, False, False
+        e = self.members[i]
+        self.flush(i)
+        self.store(i)
+        result = (False, False, False)
+        if self._touch[i] and e.collide_with_player(player):
+            result = e.hit_player(player)
+        if self._start[i]:
+            e.begin_charge(player)
+        if self._boom[i]:
+            if self._wall_hit[i]:
+                e._explode(player)
+                result = (False, False, True)
+            else:
+                result = e.charge_outcome(player)
+        self.load(i)
+        return result
+
+    def fire(self, i, enemy_bullets):
+        """冷却到点则让第 i 个敌人开火（随机数与音效仍由 Enemy.shoot 负责）"""
+        if self._scalar:
+            e = self._scalar[0][i]
+            e.shoot_cooldown -= 1
+            return e.shoot(enemy_bullets)
+        if self.shoot_cd[i] > 0:
+            return False
+        e = self.members[i]
+        self.flush(i)
+        e.shoot_cooldown = int(self.shoot_cd[i])
+        fired = e.shoot(enemy_bullets)
+        self.shoot_cd[i] = e.shoot_cooldown
+        return fired
@@ -0,0 +1,149 @@
+# explosions.py - 预渲染的爆炸动画（flipbook）
+#
+# 原来每次爆炸 create_explosion 生成 60 个火花粒子，并在逻辑更新中途往 screen 上画 5 个圆环——
+# 这些圆环随后就被背景覆盖，从来没显示过。现在每种 (配色, 尺寸档) 的爆炸在第一次用到
+# （或启动时 preload）时按固定种子程序化地画成 FRAMES 帧半透明表面：火球、冲击环、碎屑火星、烟；
+# 之后一次爆炸就是一个 [动画, x, y, 帧号]，每帧一次 blit，开销与爆炸的复杂程度无关。
+import math
+import random
+
+import pygame
+
+FRAMES = 20                         # 每个动画的帧数（逻辑帧 60 Hz 下约 0.33 秒）
+SIZE_RADII = (36, 54, 80)           # 尺寸档对应的最大半径
+DEBRIS = 18                         # 每个动画的碎屑火星数
+PAD = 4
+# 配色：(火球核心, 火焰, 外焰/火星, 烟)
+PALETTES = {
+    "enemy": ((255, 245, 200), (255, 220, 100), (255, 100, 50), (150, 150, 150)),
+    "grenade": ((255, 255, 220), (255, 200, 0), (255, 140, 30), (120, 110, 100)),
+    "boss": ((255, 220, 255), (255, 100, 255), (160, 40, 200), (110, 80, 130)),
+    "player": ((255, 255, 255), (255, 120, 120), (220, 30, 30), (120, 90, 90)),
+}
+
+
+def size_class(size):
+    """create_explosion 的 size 倍率映射到尺寸档：<=1.0 小、<=1.5 中、更大为大"""
+    return 0 if size <= 1.0 else (1 if size <= 1.5 else 2)
+
+
+class ExplosionFlipbooks:
+    """按 (配色, 尺寸档) 缓存的爆炸帧序列；需要在 display 初始化之后使用（convert_alpha）"""
+    def __init__(self, seed=20251117):
+        self.seed = seed
+        self._books = {}
+
+    def __len__(self):
+        return len(self._books)
+
+    def preload(self):
+        for palette in PALETTES:
+            for cls in range(len(SIZE_RADII)):
+                self.book(palette, cls)
+
+    def book(self, palette, cls):
+        """(帧列表, 中心偏移)：第 f 帧贴到 (x - 偏移, y - 偏移)"""
+        key = (palette, cls)
+        book = self._books.get(key)
+        if book is None:
+            book = self._books[key] = self._build(palette, cls)
+        return book
+
+    def _build(self, palette, cls):
+        core, flame, outer, smoke = PALETTES[palette]
+        R = SIZE_RADII[cls]
+        c = R + PAD
+        # 同一 (配色, 尺寸档) 每次生成的碎屑都相同，不消耗游戏随机源
+        rng = random.Random(f"{self.seed}:{palette}:{cls}")
+        debris = [(rng.uniform(0, 2 * math.pi), rng.uniform(0.45, 1.0), rng.uniform(1.5, 3.5)) for _ in range(DEBRIS)]
+        frames = []
+        for f in range(FRAMES):
+            t = f / (FRAMES - 1)
+            fade = 1 - t
+            surf = pygame.Surface((2 * c, 2 * c), pygame.SRCALPHA)
+            layer = pygame.Surface((2 * c, 2 * c), pygame.SRCALPHA)
+            # 烟：后半段逐渐扩散变淡
+            if t > 0.3:
+                layer.fill((0, 0, 0, 0))
+                pygame.draw.circle(layer, (*smoke, int(90 * fade)), (c, c), int(R * (0.35 + 0.45 * t)))
+                surf.blit(layer, (0, 0))
+            # 火球：迅速膨胀后收缩，外焰包着核心
+            grow = math.sin(min(1.0, t * 1.6) * math.pi / 2)
+            fire = R * 0.55 * grow * (1 - 0.6 * t)
+            if fire >= 1:
+                layer.fill((0, 0, 0, 0))
+                pygame.draw.circle(layer, (*outer, int(220 * fade)), (c, c), int(fire))
+                pygame.draw.circle(layer, (*flame, int(240 * fade)), (c, c), int(fire * 0.7))
+                if t < 0.6:
+                    pygame.draw.circle(layer, (*core, int(255 * (1 - t / 0.6))), (c, c), max(1, int(fire * 0.4)))
+                surf.blit(layer, (0, 0))
+            # 冲击环：匀速外扩、变细变淡
+            ring = int(R * (0.25 + 0.75 * t))
+            layer.fill((0, 0, 0, 0))
+            pygame.draw.circle(layer, (*flame, int(200 * fade)), (c, c), ring, max(1, int(4 * fade)))
+            surf.blit(layer, (0, 0))
+            # 碎屑火星：沿预先随机的方向减速飞出
+            travel = 1 - (1 - t) ** 2
+            for ang, speed, size in debris:
+                d = R * speed * travel
+                r = size * (1 - 0.7 * t)
+                if r < 0.5:
+                    continue
+                pos = (c + math.cos(ang) * d, c + math.sin(ang) * d)
+                pygame.draw.circle(surf, (*(outer if t > 0.5 else flame), int(255 * fade)), pos, max(1, int(r)))
+            surf = surf.convert_alpha()
+            surf.set_alpha(255, pygame.RLEACCEL)
+            frames.append(surf)
+        return frames, c
+
+
+class ExplosionList:
+    """正在播放的爆炸：每项 [配色, 尺寸档, x, y, 帧号]；update 每个逻辑帧推进一帧，播完移除"""
+    def __init__(self):
+        self.items = []
+
+    def __len__(self):
+        return len(self.items)
+
+    def spawn(self, x, y, size=1.0, palette="enemy"):
+        # 从 -1 开始：生成它的那个逻辑帧末尾 update 推进到第 0 帧
+        self.items.append([palette, size_class(size), x, y, -1])
+
+    def update(self):
+        items = self.items
+        if items:
+            for ex in items:
+                ex[4] += 1
+            if items[0][4] >= FRAMES:
+                # 按生成顺序排列，播完的总在前面
+                self.items = [ex for ex in items if ex[4] < FRAMES]
+
+    def empty(self):
+        self.items = []
+
+    def translate_positions(self, dx, dy):
+        """把位置临时平移 (dx, dy)（镜头偏移），返回用于还原的原位置"""
+        saved = [(ex[2], ex[3]) for ex in self.items]
+        for ex in self.items:
+            ex[2] += dx; ex[3] += dy
+        return saved
+
+    def restore_positions(self, saved):
+        for ex, (x, y) in zip(self.items, saved):
+            ex[2] = x; ex[3] = y
+
+    def bounds(self):
+        """每个爆炸动画的 (x0, y0, x1, y1)"""
+        for palette, cls, x, y, _ in self.items:
+            c = SIZE_RADII[cls] + PAD
+            yield x - c, y - c, x + c + 1, y + c + 1
+
+    def draw(self, surface, books):
+        blits = []
+        for palette, cls, x, y, f in self.items:
+            if f < 0:
+                continue
+            frames, c = books.book(palette, cls)
+            blits.append((frames[f], (int(x) - c, int(y) - c)))
+        if blits:
+            surface.blits(blits, doreturn=False)
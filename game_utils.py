@@ -4,7 +4,10 @@ import sys
 import os
 import ctypes
 import json
+import random
 import datetime
+from collections import OrderedDict
+import numpy as np
 
 # 设置输入法为英文
 def set_input_method_to_english():
@@ -41,16 +44,21 @@ def resource_path(relative_path):
         base_path = os.path.abspath(".")
     return os.path.join(base_path, relative_path)
 
+# 哑音效：加载失败或静音（无头模式）时使用
+class DummySound:
+    def play(self, *args, **kwargs): pass
+    def set_volume(self, *args): pass
+
 # 修改 load_sound 函数
-def load_sound(filename):
+def load_sound(filename, muted=False):
+    if muted:
+        return DummySound()
     try:
         # 使用新的资源路径函数
         path = resource_path(os.path.join("music", filename))
         return pygame.mixer.Sound(path)
     except Exception as e:
         print(f"无法加载音效 {filename}: {str(e)}")
-        class DummySound:
-            def play(self): pass
         return DummySound()
     
 # 游戏数据存储功能
@@ -156,3 +164,392 @@ class GameData:
         return data["saved_game"] is not None
     
 
+
+# 固定步长累加器：逻辑按固定频率推进，与渲染帧率解耦
+class FixedTimestep:
+    def __init__(self, tick_rate=60, max_steps=5):
+        self.tick_rate = tick_rate
+        self.step_ms = 1000.0 / tick_rate
+        self.max_steps = max_steps  # 单帧最多追赶的逻辑步数，防止卡顿后“死亡螺旋”
+        self.accumulator = 0.0
+
+    def advance(self, frame_ms):
+        """累加本帧真实耗时（毫秒），返回本帧需要执行的逻辑步数"""
+        self.accumulator += frame_ms
+        steps = int(self.accumulator // self.step_ms)
+        if steps > self.max_steps:
+            # 落后太多时丢弃多余时间，宁可变慢也不卡死
+            steps = self.max_steps
+            self.accumulator = 0.0
+        else:
+            self.accumulator -= steps * self.step_ms
+        return steps
+
+    @property
+    def alpha(self):
+        """渲染插值系数（0..1）：当前时刻位于上一逻辑步与下一逻辑步之间的位置"""
+        return min(1.0, self.accumulator / self.step_ms)
+
+    def reset(self):
+        self.accumulator = 0.0
+
+
+def wait_events(timeout_ms):
+    """阻塞到有事件或超时（毫秒；<=0 不等待），返回取到的全部事件"""
+    if timeout_ms <= 0:
+        return pygame.event.get()
+    first = pygame.event.wait(int(timeout_ms))
+    if first.type == pygame.NOEVENT:
+        return []
+    return [first] + pygame.event.get()
+
+
+class WindowFocus:
+    """按窗口事件跟踪窗口是否在前台（失焦或最小化即为后台）。
+    不用 key.get_focused()：无头/dummy 驱动下它总是 False，这里默认在前台"""
+    def __init__(self):
+        self.focused = True
+        self.minimized = False
+
+    @property
+    def active(self):
+        return self.focused and not self.minimized
+
+    def update(self, event):
+        """处理一个事件，窗口由前台转入后台时返回 True"""
+        was_active = self.active
+        t = event.type
+        if t == pygame.WINDOWFOCUSLOST:
+            self.focused = False
+        elif t == pygame.WINDOWFOCUSGAINED:
+            self.focused = True
+        elif t == pygame.WINDOWMINIMIZED:
+            self.minimized = True
+        elif t in (pygame.WINDOWRESTORED, pygame.WINDOWMAXIMIZED, pygame.WINDOWSHOWN):
+            self.minimized = False
+        elif t in (pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN):
+            # 收到按键/点击说明窗口一定在前台（漏掉的焦点事件在这里纠正）
+            self.focused = True; self.minimized = False
+        return was_active and not self.active
+
+
+class MenuPacer:
+    """菜单循环的事件驱动节奏，替代每轮固定的 pygame.time.delay：
+    窗口在前台时背景在动，wait() 最多等到下一帧（frame_ms）就要求重画，期间来了输入立刻返回处理；
+    在后台时背景停住，阻塞在 event.wait 上，最长 idle_ms 醒一次，只有收到事件才重画。"""
+    def __init__(self, focus, frame_ms=30, idle_ms=500):
+        self.focus = focus
+        self.frame_ms = frame_ms
+        self.idle_ms = idle_ms
+        self._next = 0
+        self._pending = True
+
+    def wait(self):
+        """返回 (本轮事件, 是否重画)"""
+        now = pygame.time.get_ticks()
+        if self.focus.active or self._pending:
+            timeout = self._next - now
+        else:
+            timeout = self.idle_ms
+        events = wait_events(timeout)
+        for event in events:
+            self.focus.update(event)
+        if events:
+            self._pending = True
+        now = pygame.time.get_ticks()
+        redraw = now >= self._next and (self.focus.active or self._pending)
+        if redraw:
+            self._next = now + self.frame_ms
+            self._pending = False
+        return events, redraw
+
+
+class RngStreams:
+    """按用途拆分的随机流，每条流由 (本局种子, 流名) 独立播种：
+    worldgen 墙体布局与出生点，spawning 刷怪数量/种类/属性与 Boss 初始方向，combat 战斗中的判定
+    （射击冷却、墙挡子弹、Boss 免伤与游走），loot 道具掉落与奖励/商店选项，effects 纯装饰（震屏、道具浮动相位、火花）。
+    一条流用多少次不会影响其他流，所以特效数量、画质档位、是否绘制都不会让回放和基准场景失步"""
+    STREAMS = ("worldgen", "spawning", "combat", "loot", "effects")
+
+    def __init__(self, seed=None):
+        for name in self.STREAMS:
+            setattr(self, name, random.Random())
+        self.seed(seed)
+
+    def seed(self, seed=None):
+        self.base_seed = random.randrange(1 << 31) if seed is None else int(seed)
+        for name in self.STREAMS:
+            # 字符串种子经 SHA-512 展开，跨进程/平台稳定
+            getattr(self, name).seed(f"{self.base_seed}:{name}")
+
+    def getstate(self):
+        return tuple(getattr(self, name).getstate() for name in self.STREAMS)
+
+    def setstate(self, state):
+        for name, st in zip(self.STREAMS, state):
+            getattr(self, name).setstate(st)
+
+    def numpy(self, name):
+        """同一用途的 NumPy 随机源（整列取随机数的场合，如火花发射器），同样由本局种子派生"""
+        return np.random.default_rng([self.base_seed, self.STREAMS.index(name)])
+
+
+class SpatialHash:
+    """均匀网格宽相：对象按圆心登记到所在格子，查询时按已登记对象的最大半径外扩，
+    只返回附近格子里的候选。候选按登记顺序返回，与直接遍历原列表的先后一致（命中判定保持确定性）。"""
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self.max_radius = 0
+        self._cells = {}
+        self._order = {}
+
+    def clear(self):
+        self._cells.clear()
+        self._order.clear()
+        self.max_radius = 0
+
+    def __len__(self):
+        return len(self._order)
+
+    def insert(self, obj, x, y, radius=0):
+        cs = self.cell_size
+        key = (int(x // cs), int(y // cs))
+        self._order[obj] = len(self._order)
+        bucket = self._cells.get(key)
+        if bucket is None:
+            self._cells[key] = [obj]
+        else:
+            bucket.append(obj)
+        if radius > self.max_radius:
+            self.max_radius = radius
+
+    def rebuild(self, objs):
+        """清空后按迭代顺序重新登记（对象需有 x/y/radius）"""
+        self.clear()
+        cs = self.cell_size
+        cells = self._cells; order = self._order
+        max_r = 0
+        for i, o in enumerate(objs):
+            order[o] = i
+            key = (int(o.x // cs), int(o.y // cs))
+            bucket = cells.get(key)
+            if bucket is None:
+                cells[key] = [o]
+            else:
+                bucket.append(o)
+            if o.radius > max_r:
+                max_r = o.radius
+        self.max_radius = max_r
+
+    def query(self, x, y, radius=0):
+        """返回可能与圆 (x, y, radius) 相交的对象（按登记顺序），调用方再做精确判定"""
+        cs = self.cell_size
+        cells = self._cells
+        r = radius + self.max_radius
+        x0 = int((x - r) // cs); x1 = int((x + r) // cs)
+        y0 = int((y - r) // cs); y1 = int((y + r) // cs)
+        found = []
+        buckets = 0
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = cells.get((cx, cy))
+                if bucket:
+                    found.extend(bucket)
+                    buckets += 1
+        if buckets > 1:
+            found.sort(key=self._order.__getitem__)
+        return found
+
+    def near_mask(self, xs, ys, radius=0):
+        """query 的批量粗筛：xs/ys（及 radius）为 NumPy 数组，返回各点查询范围内是否有已登记对象。
+        用占用格子的二维前缀和，一次得到全部结果；为 True 的点再用 query 取精确候选"""
+        n = len(xs)
+        if not self._cells or not n:
+            return np.zeros(n, dtype=bool)
+        cs = self.cell_size
+        keys = np.array(list(self._cells), dtype=np.int64)
+        kx0 = keys[:, 0].min(); ky0 = keys[:, 1].min()
+        w = int(keys[:, 0].max() - kx0) + 1; h = int(keys[:, 1].max() - ky0) + 1
+        occ = np.zeros((h + 1, w + 1), dtype=np.int32)
+        occ[keys[:, 1] - ky0 + 1, keys[:, 0] - kx0 + 1] = 1
+        sat = occ.cumsum(0).cumsum(1)
+        r = radius + self.max_radius
+        x0 = np.maximum(np.floor_divide(xs - r, cs).astype(np.int64) - kx0, 0)
+        x1 = np.minimum(np.floor_divide(xs + r, cs).astype(np.int64) - kx0, w - 1)
+        y0 = np.maximum(np.floor_divide(ys - r, cs).astype(np.int64) - ky0, 0)
+        y1 = np.minimum(np.floor_divide(ys + r, cs).astype(np.int64) - ky0, h - 1)
+        valid = (x0 <= x1) & (y0 <= y1)
+        x0 = np.where(valid, x0, 0); x1 = np.where(valid, x1, 0)
+        y0 = np.where(valid, y0, 0); y1 = np.where(valid, y1, 0)
+        count = sat[y1 + 1, x1 + 1] - sat[y0, x1 + 1] - sat[y1 + 1, x0] + sat[y0, x0]
+        return valid & (count > 0)
+
+
+# 字体与文字表面缓存：SysFont 在 Linux 上要走 fontconfig 查找，渲染文字也要逐字光栅化，
+# 两者都不该在每帧里重复做
+class FontManager:
+    """按 (name, size) 复用字体对象；按 (font, text, color, antialias) 缓存渲染好的文字表面（LRU）。
+    返回的表面是共享的，调用方不要在上面再画或改 alpha"""
+    def __init__(self, capacity=512):
+        self.capacity = capacity
+        self._fonts = {}
+        self._texts = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, size, name=None):
+        key = (name, size)
+        font = self._fonts.get(key)
+        if font is None:
+            font = self._fonts[key] = pygame.font.SysFont(name, size)
+        return font
+
+    def render(self, font, text, color, antialias=True):
+        """font 为字体对象或字号（默认字体）；等价于 font.render(text, antialias, color)"""
+        if not isinstance(font, pygame.font.Font):
+            font = self.get(font)
+        key = (font, text, tuple(color), antialias)
+        texts = self._texts
+        surf = texts.get(key)
+        if surf is not None:
+            self.hits += 1
+            texts.move_to_end(key)
+            return surf
+        self.misses += 1
+        surf = texts[key] = font.render(text, antialias, color)
+        if len(texts) > self.capacity:
+            texts.popitem(last=False)
+            self.evictions += 1
+        return surf
+
+    def stats(self):
+        return {"fonts": len(self._fonts), "texts": len(self._texts), "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions}
+
+    def clear(self):
+        self._texts.clear()
+
+
+class GlyphAtlas:
+    """漂浮数字的字形图集：按 (颜色, 字符) 只光栅化一次单个字形，数字串由字形拼接而成；
+    淡出用按档位缓存的预乘透明度副本（透明度阶梯），稳定后绘制不再调用 font.render。
+
+    拼接按各字形的 advance 排版，不含字偶距调整，与整串 render 相比个别数字可能差 1 像素。"""
+    CHARSET = "0123456789+-g"
+
+    def __init__(self, font, alpha_steps=16, capacity=256):
+        self.font = font
+        self.alpha_steps = alpha_steps
+        self.capacity = capacity
+        self._glyphs = {}
+        self._texts = OrderedDict()   # (text, color) -> [拼好的表面, 各透明度档位的副本...]
+        self.rasterized = 0
+
+    def preload(self, colors, chars=None):
+        """预先光栅化给定颜色的字形（默认数字、+、-、g）"""
+        for color in colors:
+            for ch in chars or self.CHARSET:
+                self.glyph(ch, color)
+
+    def glyph(self, ch, color):
+        key = (ch, tuple(color))
+        entry = self._glyphs.get(key)
+        if entry is None:
+            self.rasterized += 1
+            metrics = self.font.metrics(ch)[0]
+            advance = metrics[4] if metrics else self.font.size(ch)[0]
+            entry = self._glyphs[key] = (self.font.render(ch, True, color), advance)
+        return entry
+
+    def compose(self, text, color):
+        """text 在该颜色下的完整表面（未淡出）"""
+        return self._ladder(text, color)[0]
+
+    def _ladder(self, text, color):
+        key = (text, tuple(color))
+        texts = self._texts
+        ladder = texts.get(key)
+        if ladder is not None:
+            texts.move_to_end(key)
+            return ladder
+        glyphs = [self.glyph(ch, color) for ch in text]
+        width = max(1, sum(advance for _, advance in glyphs))
+        height = max([surf.get_height() for surf, _ in glyphs] or [self.font.get_height()])
+        surf = pygame.Surface((width, height), pygame.SRCALPHA)
+        x = 0
+        for g, advance in glyphs:
+            # 同色字形的抗锯齿边缘可能重叠，取透明度最大值而不是叠加混合
+            surf.blit(g, (x, 0), special_flags=pygame.BLEND_RGBA_MAX)
+            x += advance
+        ladder = texts[key] = [surf] + [None] * self.alpha_steps
+        if len(texts) > self.capacity:
+            texts.popitem(last=False)
+        return ladder
+
+    def faded(self, text, color, alpha):
+        """透明度 alpha（0~255）取最近档位后的表面（不为 0 时至少一档）；完全透明时返回 None"""
+        if alpha <= 0:
+            return None
+        steps = self.alpha_steps
+        level = max(1, min(steps, (alpha * steps + 127) // 255))
+        ladder = self._ladder(text, color)
+        surf = ladder[level]
+        if surf is None:
+            surf = ladder[0]
+            if level < steps:
+                surf = surf.copy()
+                surf.fill((255, 255, 255, level * 255 // steps), special_flags=pygame.BLEND_RGBA_MULT)
+            ladder[level] = surf
+        return surf
+
+    def clear(self):
+        self._glyphs.clear()
+        self._texts.clear()
+
+
+# 可复用的渲染目标：全屏半透明遮罩、逐帧重填的闪屏层等不该每帧 pygame.Surface 一次
+class RenderTargets:
+    """按 (尺寸, 是否带 alpha, 用途) 复用已 convert 的临时表面；按 (尺寸, RGBA) 缓存纯色遮罩。
+    需要在 display 初始化之后使用"""
+    def __init__(self):
+        self._scratch = {}
+        self._overlays = {}
+        self.allocations = 0
+
+    def _new(self, size, alpha):
+        self.allocations += 1
+        if alpha:
+            return pygame.Surface(size, pygame.SRCALPHA).convert_alpha()
+        return pygame.Surface(size).convert()
+
+    def scratch(self, size, alpha=False, tag=None):
+        """同一 (size, alpha, tag) 总是返回同一张表面，内容为上次使用留下的，调用方自行重填。
+        不同用途用不同 tag，避免同一帧里互相覆盖"""
+        key = (tuple(size), alpha, tag)
+        surf = self._scratch.get(key)
+        if surf is None:
+            surf = self._scratch[key] = self._new(size, alpha)
+        return surf
+
+    def overlay(self, size, color):
+        """填满 color（RGBA）的遮罩，只在第一次用到时创建并填充；调用方不要在上面画"""
+        key = (tuple(size), tuple(color))
+        surf = self._overlays.get(key)
+        if surf is None:
+            surf = self._overlays[key] = self._new(size, True)
+            surf.fill(color)
+        return surf
+
+    def stats(self):
+        return {"scratch": len(self._scratch), "overlays": len(self._overlays), "allocations": self.allocations}
+
+    def clear(self):
+        self._scratch.clear()
+        self._overlays.clear()
+
+
+# 全局共享实例（主菜单与游戏共用）
+fonts = FontManager()
+window_focus = WindowFocus()
+render_targets = RenderTargets()
@@ -4,18 +4,53 @@ import sys
 import random
 import math
 import os
-from game_utils import GameData, load_sound, set_input_method_to_english, get_current_input_method, restore_input_method
+import numpy as np
+from collections import deque
+from contextlib import contextmanager
+from game_utils import GameData, FixedTimestep, RngStreams, SpatialHash, GlyphAtlas, fonts, render_targets, window_focus, wait_events, load_sound, set_input_method_to_english, get_current_input_method, restore_input_method
 from achievement_system import achievement_system, ACHIEVEMENTS
+from replay import ReplayWriter, ReplayReader
+from profiler import FrameProfiler
+from quality import QualityGovernor, FULL as QUALITY_FULL
+from dirty_rects import DirtyRegion
+from projectiles import ProjectileStore
+from particles import ParticleEmitter
+from explosions import ExplosionFlipbooks, ExplosionList
+from enemy_swarm import EnemySwarm
+from sprite_cache import SpriteCache, ENEMY_PAD, BOSS_PAD, GRENADE_PAD, POWERUP_PAD, METEOR_ORIGIN
+
+# 无头模式：SDL dummy 视频驱动、无声音、无帧率限制（用于压测/性能剖析）
+# 需在 pygame 初始化前确定，可通过 --headless 参数或环境变量 WARRIOR_HEADLESS=1 开启
+HEADLESS = os.environ.get("WARRIOR_HEADLESS") == "1" or "--headless" in sys.argv
+if HEADLESS:
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
 
 # 初始化
 pygame.init()
-pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=512)
-pygame.mixer.set_num_channels(16)
+if not HEADLESS:
+    pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=512)
+    pygame.mixer.set_num_channels(16)
 
 # 窗口
 WIDTH, HEIGHT = 800, 600
+
+# 逻辑与渲染频率：所有计时器/速度均按 60Hz 逻辑帧设计，逻辑固定步长推进；
+# 渲染帧率可独立配置（WARRIOR_RENDER_FPS，0 表示不限帧），绘制时对位置做插值
+SIM_TICK_RATE = 60
+try:
+    RENDER_FPS = max(0, int(os.environ.get("WARRIOR_RENDER_FPS", "60")))
+except ValueError:
+    RENDER_FPS = 60
+# 窗口失焦或最小化：对局自动暂停，菜单/暂停/结算画面不再按 60 Hz 空转，
+# 而是睡在 event.wait 上，最长 BACKGROUND_WAIT_MS 醒一次（约 4 Hz）
+BACKGROUND_WAIT_MS = 250
 screen = pygame.display.set_mode((WIDTH, HEIGHT))
 pygame.display.set_caption("Warrior Rimer")
+# 敌人/Boss 预渲染精灵（某种外观第一次出现时绘制并缓存）
+sprite_cache = SpriteCache()
+# 爆炸动画（每种配色 × 尺寸档一组帧；main() 启动时预先生成，无头模式用到时才生成）
+explosion_books = ExplosionFlipbooks()
 
 # 颜色
 BACKGROUND = (20, 20, 35)
@@ -35,20 +70,23 @@ FLOAT_TEXT_COLOR_ENEMY = (255, 220, 120)
 FLOAT_TEXT_COLOR_BOSS = (255, 180, 255)
 FLOAT_TEXT_COLOR_PLAYER = (255, 100, 100)
 
-# 音效
+# 音效（无头模式下全部静音）
+def _load_sound(filename):
+    return load_sound(filename, muted=HEADLESS)
+
 shoot_sounds = [
-    load_sound("shoot1.wav"),   # 手枪
-    load_sound("shoot2.wav"),   # 霰弹
-    load_sound("grenade_throw.wav"),  # 手雷
+    _load_sound("shoot1.wav"),   # 手枪
+    _load_sound("shoot2.wav"),   # 霰弹
+    _load_sound("grenade_throw.wav"),  # 手雷
 ]
-explosion_sound = load_sound("explosion.wav")
-enemy_shoot_sound = load_sound("enemy_shoot.wav")
-player_hit_sound = load_sound("player_hit.wav")
-powerup_sound = load_sound("powerup.wav")
-weapon_switch_sound = load_sound("weapon_switch.wav")
-skill_activate_sound = load_sound("skill_activate.wav")
-boss_spawn_sound = load_sound("striking.wav")
-boss_roar_sound = load_sound("roar.wav")
+explosion_sound = _load_sound("explosion.wav")
+enemy_shoot_sound = _load_sound("enemy_shoot.wav")
+player_hit_sound = _load_sound("player_hit.wav")
+powerup_sound = _load_sound("powerup.wav")
+weapon_switch_sound = _load_sound("weapon_switch.wav")
+skill_activate_sound = _load_sound("skill_activate.wav")
+boss_spawn_sound = _load_sound("striking.wav")
+boss_roar_sound = _load_sound("roar.wav")
 
 for s in shoot_sounds: s.set_volume(0.4)
 explosion_sound.set_volume(0.6)
@@ -60,82 +98,55 @@ skill_activate_sound.set_volume(0.5)
 boss_spawn_sound.set_volume(0.9)
 boss_roar_sound.set_volume(0.8)
 
-# 漂浮文字小字体
-float_font = pygame.font.SysFont(None, 22)
-
-# 预创建常用字体，避免每帧频繁构造
-FONT_48 = pygame.font.SysFont(None, 48)
-FONT_36 = pygame.font.SysFont(None, 36)
-FONT_32 = pygame.font.SysFont(None, 32)
-FONT_30 = pygame.font.SysFont(None, 30)
-FONT_28 = pygame.font.SysFont(None, 28)
-FONT_24 = pygame.font.SysFont(None, 24)
+# 漂浮文字小字体；伤害数字/金币由字形图集拼接，淡出走缓存的透明度阶梯，不再逐帧光栅化
+float_font = fonts.get(22)
+float_glyphs = GlyphAtlas(float_font)
+float_glyphs.preload((FLOAT_TEXT_COLOR_ENEMY, FLOAT_TEXT_COLOR_BOSS, FLOAT_TEXT_COLOR_PLAYER, (255, 215, 0)))
+
+# 常用字体统一从 game_utils.fonts 取（按字号只创建一次）；逐帧文字用 fonts.render 走 LRU 缓存
+FONT_48 = fonts.get(48)
+FONT_36 = fonts.get(36)
+FONT_32 = fonts.get(32)
+FONT_30 = fonts.get(30)
+FONT_28 = fonts.get(28)
+FONT_24 = fonts.get(24)
+
+# 敌人宽相网格的格子边长（约为敌人直径的两倍，子弹查询通常只落在 1~4 格）
+ENEMY_GRID_CELL = 64
+# 玩家子弹达到该数量时先用 SpatialHash.near_mask 整批粗筛，再逐颗精确查询
+GRID_BATCH_MIN = 48
+# 敌人达到该数量时移动/冷却走 EnemySwarm 整列更新，更少时逐个 move() 更快
+ENEMY_BATCH_MIN = 24
+
+# 游戏随机源：按用途拆成 worldgen/spawning/combat/loot/effects 几条流（game_utils.RngStreams），
+# 每局用种子重置以便复现/回放。装饰只用 effects 流，特效多画少画、画质升降都不会改变其他流的结果；
+# 与对局无关的绘制随机（背景星点）用固定种子的 _STAR_RNG
+game_rng = RngStreams()
+
+# 分阶段帧剖析（F3 开关叠加图，F4 导出 CSV；WARRIOR_PROFILE=1 启动即开启）
+PROFILE_PHASES = (
+    "events", "input", "boss", "player", "spawning", "enemies", "powerups", "grenades",
+    "bullets", "enemy_bullets", "particles", "sim_misc",
+    "draw_background", "draw_walls", "draw_enemies", "draw_bullets", "draw_grenades",
+    "draw_player", "draw_particles", "draw_powerups", "draw_boss", "hud", "overlays", "flip",
+)
+# text_hits/text_misses 为文字表面缓存的累计命中/未命中（未命中才真正光栅化），glyph_rasters 为漂浮数字字形的累计光栅化次数，
+# hud_redraws 为 HUD 缓存层的累计重画次数
+PROFILE_COUNTERS = ("enemies", "bullets", "enemy_bullets", "particles", "floating_texts", "text_hits", "text_misses",
+                    "glyph_rasters", "hud_redraws", "explosions", "quality")
+profiler = FrameProfiler(PROFILE_PHASES, PROFILE_COUNTERS, enabled=os.environ.get("WARRIOR_PROFILE") == "1")
+# 自适应画质（quality.py）：按实测帧耗时升降装饰负载档位，剖析器计数 quality 为当前档位（3 为全特效）。
+# WARRIOR_QUALITY=0~3 固定档位；无头模拟和基准测试不记录帧耗时，始终是固定档位
+_QUALITY_ENV = os.environ.get("WARRIOR_QUALITY", "auto")
+quality = QualityGovernor(1000 / (RENDER_FPS or 60), level=(int(_QUALITY_ENV) if _QUALITY_ENV.isdigit() else QUALITY_FULL),
+                          enabled=not _QUALITY_ENV.isdigit())
+# 可选的脏矩形渲染（WARRIOR_DIRTY_RECTS=1）：只恢复/重画/提交变化区域，变化面积过大时自动整屏
+dirty_region = DirtyRegion(WIDTH, HEIGHT, enabled=os.environ.get("WARRIOR_DIRTY_RECTS") == "1")
 
 # 轻量对象池，减少频繁创建/销毁带来的压力
 # 全局池与节流变量（用于性能优化）
-_PARTICLE_POOL = []
 _FLOAT_TEXT_POOL = []
 _EXPLOSION_SND_NEXT_TICK = 0
-# 暂停菜单
-class PauseMenu:
-    def __init__(self):
-        self.visible = False
-        self.continue_button = pygame.Rect(WIDTH//2 - 100, HEIGHT//2 - 50, 200, 60)
-        self.quit_button = pygame.Rect(WIDTH//2 - 100, HEIGHT//2 + 50, 200, 60)
-
-    def draw(self):
-        overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 180))
-        screen.blit(overlay, (0, 0))
-
-        menu_rect = pygame.Rect(WIDTH//2 - 150, HEIGHT//2 - 100, 300, 250)
-        pygame.draw.rect(screen, (40, 40, 80), menu_rect, border_radius=15)
-        pygame.draw.rect(screen, (80, 80, 120), menu_rect, 3, border_radius=15)
-
-        title = FONT_48.render("PAUSED", True, (255, 215, 0))
-        screen.blit(title, (WIDTH//2 - title.get_width()//2, HEIGHT//2 - 130))
-
-        mouse_pos = pygame.mouse.get_pos()
-        cont_hover = self.continue_button.collidepoint(mouse_pos)
-        quit_hover = self.quit_button.collidepoint(mouse_pos)
-
-        cont_color = (100, 200, 100) if cont_hover else (70, 160, 70)
-        pygame.draw.rect(screen, cont_color, self.continue_button, border_radius=10)
-        pygame.draw.rect(screen, (150, 250, 150), self.continue_button, 3, border_radius=10)
-        cont_text = FONT_36.render("CONTINUE", True, (255, 255, 255))
-        screen.blit(cont_text, (self.continue_button.centerx - cont_text.get_width()//2, self.continue_button.centery - cont_text.get_height()//2))
-
-        quit_color = (200, 100, 100) if quit_hover else (160, 70, 70)
-        pygame.draw.rect(screen, quit_color, self.quit_button, border_radius=10)
-        pygame.draw.rect(screen, (250, 150, 150), self.quit_button, 3, border_radius=10)
-        quit_text = FONT_36.render("QUIT", True, (255, 255, 255))
-        screen.blit(quit_text, (self.quit_button.centerx - quit_text.get_width()//2, self.quit_button.centery - quit_text.get_height()//2))
-
-        info_text = FONT_24.render("Progress saved automatically", True, (180, 180, 200))
-        screen.blit(info_text, (WIDTH//2 - info_text.get_width()//2, HEIGHT//2 + 120))
-
-    def handle_event(self, event, player, enemies, score):
-        if event.type == pygame.MOUSEBUTTONDOWN:
-            if self.continue_button.collidepoint(event.pos):
-                self.visible = False
-                return True
-            if self.quit_button.collidepoint(event.pos):
-                GameData.save_game_state({
-                    "player": {
-                        "x": player.x, "y": player.y, "health": player.health,
-                        "shield": player.shield, "weapon": player.weapon, "score": player.score,
-                        "attack_boost_active": player.attack_boost_active,
-                        "attack_boost_duration": player.attack_boost_duration,
-                        "attack_boost_cooldown": player.attack_boost_cooldown,
-                        "grenade_cooldown": player.grenade_cooldown,
-                        "fire_binding": getattr(player, 'fire_binding', 'space')
-                    },
-                    "enemies": [{"x": e.x, "y": e.y, "health": e.health} for e in enemies],
-                    "score": score
-                })
-                return False
-        return True
-
 class Player:
     def __init__(self):
         self.x = WIDTH // 2
@@ -185,15 +196,18 @@ class Player:
             pygame.draw.circle(screen, (255, 255, 255, 80), (self.x, self.y), self.radius + 2, 2)
 
     def move(self, keys, walls):
-        dx = (keys[pygame.K_d] - keys[pygame.K_a]) * self.speed
-        dy = (keys[pygame.K_s] - keys[pygame.K_w]) * self.speed
+        self.move_dir(keys[pygame.K_d] - keys[pygame.K_a], keys[pygame.K_s] - keys[pygame.K_w], walls)
+
+    def move_dir(self, mx, my, walls):
+        # mx/my 取 -1/0/1，与按键状态解耦，便于无头模拟与回放
+        dx = mx * self.speed
+        dy = my * self.speed
         if dx or dy:
             # 预计算目标位置并限制在屏幕边界内
             nx = min(max(self.radius, self.x + dx), WIDTH - self.radius)
             ny = min(max(self.radius, self.y + dy), HEIGHT - self.radius)
-            new_rect = pygame.Rect(nx - self.radius, ny - self.radius, self.radius*2, self.radius*2)
             # 避开墙体碰撞
-            if not any(new_rect.colliderect(w.rect) for w in walls):
+            if not walls.overlaps_rect(nx - self.radius, ny - self.radius, self.radius*2, self.radius*2):
                 self.x = nx; self.y = ny
                 self.rect.topleft = (self.x - self.radius, self.y - self.radius)
 
@@ -201,22 +215,14 @@ class Player:
         mult = 0.5 if self.attack_boost_active and self.weapon != 2 else 1.0
         # Pistol
         if self.weapon == 0 and self.gun_cooldown == 0:
-            if hasattr(bullets, 'add'):
-                bullets.add(Bullet(self.x, self.y - 30, -10, PLAYER_BULLET_COLOR, "player"))
-            else:
-                bullets.append(Bullet(self.x, self.y - 30, -10, PLAYER_BULLET_COLOR, "player"))
+            bullets.spawn(self.x, self.y - 30, -10, PLAYER_BULLET_COLOR, "player")
             self.gun_cooldown = int(15 * mult)
             shoot_sounds[0].play(); return True
         # Shotgun
         if self.weapon == 1 and self.gun_cooldown == 0:
-            if hasattr(bullets, 'add'):
-                bullets.add(Bullet(self.x - 10, self.y - 30, -10, SHOTGUN_COLOR, "player", 8))
-                bullets.add(Bullet(self.x, self.y - 30, -12, SHOTGUN_COLOR, "player", 8))
-                bullets.add(Bullet(self.x + 10, self.y - 30, -10, SHOTGUN_COLOR, "player", 8))
-            else:
-                bullets.append(Bullet(self.x - 10, self.y - 30, -10, SHOTGUN_COLOR, "player", 8))
-                bullets.append(Bullet(self.x, self.y - 30, -12, SHOTGUN_COLOR, "player", 8))
-                bullets.append(Bullet(self.x + 10, self.y - 30, -10, SHOTGUN_COLOR, "player", 8))
+            bullets.spawn(self.x - 10, self.y - 30, -10, SHOTGUN_COLOR, "player", 8)
+            bullets.spawn(self.x, self.y - 30, -12, SHOTGUN_COLOR, "player", 8)
+            bullets.spawn(self.x + 10, self.y - 30, -10, SHOTGUN_COLOR, "player", 8)
             self.gun_cooldown = int(30 * mult)
             shoot_sounds[1].play(); return True
         # Grenade
@@ -334,10 +340,7 @@ class Player:
                     rad = math.radians(ang)
                     vx = base_speed * math.sin(rad)
                     vy = -base_speed * math.cos(rad)  # 向上为负
-                    if hasattr(bullets, 'add'):
-                        bullets.add(Bullet(center_x, center_y, vy, SHOTGUN_COLOR, 'player', 6, dx=vx, dy=vy))
-                    else:
-                        bullets.append(Bullet(center_x, center_y, vy, SHOTGUN_COLOR, 'player', 6, dx=vx, dy=vy))
+                    bullets.spawn(center_x, center_y, vy, SHOTGUN_COLOR, 'player', 6, dx=vx, dy=vy)
             # 十轮，角度与速度逐步增加，形成更强的覆盖与层次
             for i in range(10):
                 t = i / 9.0  # 0..1
@@ -353,43 +356,42 @@ class Enemy(pygame.sprite.Sprite):
     def __init__(self, walls):
         super().__init__()
         self.radius = 18
-        self.speed = random.uniform(1.0, 2.5)
-        self.shoot_cooldown = random.randint(30, 120)
-        self.color = (random.randint(200, 255), random.randint(50, 100), random.randint(50, 100))
+        self.speed = game_rng.spawning.uniform(1.0, 2.5)
+        self.shoot_cooldown = game_rng.spawning.randint(30, 120)
+        self.color = (game_rng.spawning.randint(200, 255), game_rng.spawning.randint(50, 100), game_rng.spawning.randint(50, 100))
         self.health = 50
         self.max_health = 50
-        self.direction = random.choice([-1, 1])
+        self.direction = game_rng.spawning.choice([-1, 1])
         self.collision_cooldown = 0
         self.flash = 0
         valid = False; tries = 0
         while not valid and tries < 100:
             tries += 1
-            self.x = random.randint(self.radius, WIDTH - self.radius)
-            self.y = random.randint(self.radius, HEIGHT // 2)
-            r = pygame.Rect(self.x - self.radius, self.y - self.radius, self.radius*2, self.radius*2)
-            valid = not any(r.colliderect(w.rect) for w in walls)
+            self.x = game_rng.spawning.randint(self.radius, WIDTH - self.radius)
+            self.y = game_rng.spawning.randint(self.radius, HEIGHT // 2)
+            valid = not walls.overlaps_rect(self.x - self.radius, self.y - self.radius, self.radius*2, self.radius*2)
         self.rect = pygame.Rect(self.x - self.radius, self.y - self.radius, self.radius*2, self.radius*2)
 
-    def draw(self, player):
-        pygame.draw.circle(screen, self.color, (self.x, self.y), self.radius)
-        # 眼睛
-        eye_offset = 6
-        pygame.draw.circle(screen, (255, 255, 255), (self.x - eye_offset, self.y - 5), 5)
-        pygame.draw.circle(screen, (255, 255, 255), (self.x + eye_offset, self.y - 5), 5)
-        ang = math.atan2(player.y - self.y, player.x - self.x)
-        pupil = 2
-        pygame.draw.circle(screen, (0, 0, 0), (int(self.x - eye_offset + pupil*math.cos(ang)), int(self.y - 5 + pupil*math.sin(ang))), 2)
-        pygame.draw.circle(screen, (0, 0, 0), (int(self.x + eye_offset + pupil*math.cos(ang)), int(self.y - 5 + pupil*math.sin(ang))), 2)
-        # 血条
+    def draw(self, player, detail=True):
+        # 身体/眼睛/瞳孔来自预渲染精灵（瞳孔按朝向档位），血条从缓存的整条切片；
+        # detail=False（降档后的远处敌人）不画瞳孔和血条
+        ang = math.atan2(player.y - self.y, player.x - self.x) if detail else None
+        pad = self.radius + ENEMY_PAD
+        screen.blit(sprite_cache.enemy(self.radius, self.color, ang, self.RING), (int(self.x) - pad, int(self.y) - pad))
+        if detail:
+            self.draw_health_bar()
+
+    # 外环标记（颜色, 半径增量, 线宽），普通敌人没有
+    RING = None
+
+    def draw_health_bar(self):
         bw, bh = 40, 5
-        hp = self.health / self.max_health
-        pygame.draw.rect(screen, (100, 0, 0), (self.x - bw//2, self.y + self.radius + 5, bw, bh))
-        pygame.draw.rect(screen, (0, 200, 0), (self.x - bw//2, self.y + self.radius + 5, bw*hp, bh))
+        sprite_cache.draw_bar(screen, self.x - bw//2, self.y + self.radius + 5, bw, bh,
+                              self.health / self.max_health, (100, 0, 0), (0, 200, 0))
 
     def move(self, walls, player):
         dx = self.speed * self.direction
-        new_rect = pygame.Rect(self.x - self.radius + dx, self.y - self.radius, self.radius*2, self.radius*2)
-        if any(new_rect.colliderect(w.rect) for w in walls):
+        if walls.overlaps_rect(self.x - self.radius + dx, self.y - self.radius, self.radius*2, self.radius*2):
             # 撞到墙体，反向
             self.direction *= -1
         else:
@@ -406,26 +408,26 @@ class Enemy(pygame.sprite.Sprite):
         self.y = max(self.radius, min(HEIGHT - self.radius, self.y))
         # 撞玩家
         if self.collision_cooldown == 0:
-            dist = math.hypot(self.x - player.x, self.y - player.y)
-            if dist < self.radius + player.radius:
-                player.take_damage(5); self.health -= 10
-                self.collision_cooldown = 30; player.collision_cooldown = 30
-                if self.health <= 0:
-                    return True, False, True
-                if player.health <= 0:
-                    return True, True, False
-                return True, False, False
+            if self.collide_with_player(player):
+                return self.hit_player(player)
         else:
             self.collision_cooldown -= 1
         return False, False, False
 
+    def hit_player(self, player):
+        # 撞上玩家的结算（双方都掉血并进入冷却），返回值同 move
+        player.take_damage(5); self.health -= 10
+        self.collision_cooldown = 30; player.collision_cooldown = 30
+        if self.health <= 0:
+            return True, False, True
+        if player.health <= 0:
+            return True, True, False
+        return True, False, False
+
     def shoot(self, enemy_bullets):
         if self.shoot_cooldown <= 0:
-            if hasattr(enemy_bullets, 'add'):
-                enemy_bullets.add(Bullet(self.x, self.y + 30, 5, ENEMY_BULLET_COLOR, "enemy"))
-            else:
-                enemy_bullets.append(Bullet(self.x, self.y + 30, 5, ENEMY_BULLET_COLOR, "enemy"))
-            self.shoot_cooldown = random.randint(60, 180)
+            enemy_bullets.spawn(self.x, self.y + 30, 5, ENEMY_BULLET_COLOR, "enemy")
+            self.shoot_cooldown = game_rng.combat.randint(60, 180)
             enemy_shoot_sound.play(); return True
         return False
 
@@ -448,42 +450,68 @@ class Bomber(Enemy):
         self.death_explode_radius = 80 + int(1.5 * r)
         self.death_explode_damage = 18 + int(0.6 * r)
 
-    def draw(self, player):
-        super().draw(player)
-        # 标记环
-        pygame.draw.circle(screen, (255, 180, 80), (self.x, self.y), self.radius+4, 2)
+    # 标记环
+    RING = ((255, 180, 80), 4, 2)
 
     def on_death(self, player, particles, enemies=None):
-        # 自身爆炸效果
-        create_explosion(particles, self.x, self.y, 1.2)
-        # 对玩家结算
-        if math.hypot(player.x - self.x, player.y - self.y) < self.death_explode_radius + player.radius:
-            player.take_damage(self.death_explode_damage)
-            spawn_floating_text(particles, player.x, player.y - player.radius - 8, self.death_explode_damage, FLOAT_TEXT_COLOR_PLAYER)
-        if enemies is None:
-            return
-        # 对周围敌人结算（可能连锁）
-        for other in list(enemies):
-            if other is self:
+        return resolve_bomber_chain(self, player, particles, enemies)
+
+
+def resolve_bomber_chain(first, player, particles, enemies=None):
+    """结算一次自爆连锁：first 已死亡（调用方已计入它本身的击杀），返回 {kills, gold, score, blasts}。
+
+    用工作队列代替递归：每个爆炸的 Bomber 只入队一次，每次爆炸用一次网格查询找出波及的存活敌人，
+    被炸死的 Bomber 再入队。伤害数字按敌人汇总、分数/金币/成就在最后一次性结算，
+    链再长也不会递归、也不会重复击杀已死亡的敌人。"""
+    queue = deque([first])
+    dead = {first}
+    grid = None
+    if enemies:
+        grid = SpatialHash(ENEMY_GRID_CELL)
+        grid.rebuild(enemies)
+    taken = {}  # 敌人 -> 本次连锁累计受到的伤害（保持首次受伤的顺序）
+    player_damage = 0
+    kills = 0; blasts = 0
+    while queue:
+        b = queue.popleft()
+        blasts += 1
+        radius = b.death_explode_radius; dmg = b.death_explode_damage
+        create_explosion(particles, b.x, b.y, 1.2)
+        if math.hypot(player.x - b.x, player.y - b.y) < radius + player.radius:
+            player_damage += dmg
+        if grid is None:
+            continue
+        for other in grid.query(b.x, b.y, radius):
+            if other in dead or not enemies.has_internal(other):
                 continue
-            try:
-                if math.hypot(other.x - self.x, other.y - self.y) < self.death_explode_radius + getattr(other, 'radius', 0):
-                    other.health -= self.death_explode_damage
-                    spawn_floating_text(particles, other.x, other.y - other.radius - 8, self.death_explode_damage, FLOAT_TEXT_COLOR_ENEMY)
-                    if other.health <= 0:
-                        create_explosion(particles, other.x, other.y, 1.0)
-                        try:
-                            other.on_death(player, particles, enemies)
-                        except:
-                            pass
-                        if other in enemies:
-                            enemies.remove(other)
-                        player.score += 10
-                        player.add_gold(5)
-                        spawn_floating_text(particles, other.x, other.y, "+5g", (255, 215, 0))
-                        achievement_system.update_progress("kill_count", 1)
-            except:
+            if math.hypot(other.x - b.x, other.y - b.y) >= radius + getattr(other, 'radius', 0):
                 continue
+            other.health -= dmg
+            taken[other] = taken.get(other, 0) + dmg
+            if other.health <= 0:
+                dead.add(other)
+                enemies.remove(other)
+                kills += 1
+                if isinstance(other, Bomber):
+                    queue.append(other)
+                else:
+                    create_explosion(particles, other.x, other.y, 1.0)
+                    try:
+                        other.on_death(player, particles, enemies)
+                    except:
+                        pass
+    if player_damage:
+        player.take_damage(player_damage)
+        spawn_floating_text(particles, player.x, player.y - player.radius - 8, player_damage, FLOAT_TEXT_COLOR_PLAYER)
+    for other, amount in taken.items():
+        spawn_floating_text(particles, other.x, other.y - other.radius - 8, amount, FLOAT_TEXT_COLOR_ENEMY)
+    score = 10 * kills; gold = 5 * kills
+    if kills:
+        player.score += score
+        player.add_gold(gold)
+        spawn_floating_text(particles, first.x, first.y, f"+{gold}g", (255, 215, 0))
+        achievement_system.update_progress("kill_count", kills)
+    return {"kills": kills, "gold": gold, "score": score, "blasts": blasts}
 
 class Charger(Enemy):
     """爆破手：随机进入冲锋状态，移动一定距离后爆炸造成高伤害（随风险增强/冷却缩短）"""
@@ -503,23 +531,20 @@ class Charger(Enemy):
         lo = max(40, 120 - 3 * r)
         hi = max(80, 240 - 5 * r)
         if hi < lo: hi = lo
-        self.charge_cooldown = random.randint(lo, hi)
+        self.charge_cooldown = game_rng.spawning.randint(lo, hi)
         # 爆炸随风险增强
         self.explode_radius = 110 + int(1.5 * r)
         self.explode_damage = 26 + int(0.8 * r)
 
-    def draw(self, player):
+    def draw(self, player, detail=True):
         # 充能时颜色闪烁
         c = (230, 130, 255) if self.is_charging and (pygame.time.get_ticks() // 120) % 2 == 0 else self.color
-        pygame.draw.circle(screen, c, (self.x, self.y), self.radius)
         # 提示环
         ring_c = (255, 100, 200) if self.is_charging else (160, 80, 180)
-        pygame.draw.circle(screen, ring_c, (self.x, self.y), self.radius+6, 2)
-        # 血条
-        bw, bh = 40, 5
-        hp = self.health / self.max_health
-        pygame.draw.rect(screen, (100, 0, 0), (self.x - bw//2, self.y + self.radius + 5, bw, bh))
-        pygame.draw.rect(screen, (0, 200, 0), (self.x - bw//2, self.y + self.radius + 5, bw*hp, bh))
+        pad = self.radius + ENEMY_PAD
+        screen.blit(sprite_cache.charger(self.radius, c, ring_c), (int(self.x) - pad, int(self.y) - pad))
+        if detail:
+            self.draw_health_bar()
 
     def move(self, walls, player):
         # 返回 (collided_with_player, player_died, enemy_died)
@@ -531,36 +556,41 @@ class Charger(Enemy):
             # 边界限制
             nx = min(max(self.radius, nx), WIDTH - self.radius)
             ny = min(max(self.radius, ny), HEIGHT - self.radius)
-            new_rect = pygame.Rect(nx - self.radius, ny - self.radius, self.radius*2, self.radius*2)
-            if any(new_rect.colliderect(w.rect) for w in walls):
+            if walls.overlaps_rect(nx - self.radius, ny - self.radius, self.radius*2, self.radius*2):
                 # 撞墙提前引爆
                 self._explode(player)
                 return False, False, True
             self.x = nx; self.y = ny
             self.rect.topleft = (self.x - self.radius, self.y - self.radius)
             self.charge_travel += step
-            # 撞玩家直接引爆
-            if self.collide_with_player(player):
-                self._explode(player)
-                return True, player.health <= 0, True
-            # 距离达到阈值则自爆
-            if self.charge_travel >= self.charge_distance:
-                self._explode(player)
-                return False, player.health <= 0, True
-            return False, False, False
+            return self.charge_outcome(player)
         else:
             # 普通游走（沿用父类横向移动），并倒计时进入冲锋
             col, player_died, enemy_died = super().move(walls, player)
             if self.charge_cooldown > 0:
                 self.charge_cooldown -= 1
             else:
-                # 进入冲锋，朝玩家方向
-                ang = math.atan2(player.y - self.y, player.x - self.x)
-                self.charge_dir = (math.cos(ang), math.sin(ang))
-                self.is_charging = True
-                self.charge_travel = 0.0
+                self.begin_charge(player)
             return col, player_died, enemy_died
 
+    def begin_charge(self, player):
+        # 进入冲锋，朝玩家方向
+        ang = math.atan2(player.y - self.y, player.x - self.x)
+        self.charge_dir = (math.cos(ang), math.sin(ang))
+        self.is_charging = True
+        self.charge_travel = 0.0
+
+    def charge_outcome(self, player):
+        # 冲锋推进一步之后：撞玩家直接引爆
+        if self.collide_with_player(player):
+            self._explode(player)
+            return True, player.health <= 0, True
+        # 距离达到阈值则自爆
+        if self.charge_travel >= self.charge_distance:
+            self._explode(player)
+            return False, player.health <= 0, True
+        return False, False, False
+
     def _explode(self, player):
         # 直接在当前位置爆炸并结算伤害
         explosion_sound.play()
@@ -595,7 +625,7 @@ def spawn_random_enemy(walls, rl):
     s = (w_enemy + w_bomber + w_charger)
     w_enemy, w_bomber, w_charger = w_enemy/s, w_bomber/s, w_charger/s
     weighted = [(Enemy, w_enemy), (Bomber, w_bomber), (Charger, w_charger)]
-    rnum = random.random(); acc = 0.0
+    rnum = game_rng.spawning.random(); acc = 0.0
     for cls, w in weighted:
         acc += w
         if rnum <= acc:
@@ -607,54 +637,6 @@ def spawn_random_enemy(walls, rl):
                 return Charger(walls, rl)
     return Enemy(walls)
 
-class Bullet(pygame.sprite.Sprite):
-    def __init__(self, x, y, speed, color, owner, size=5, dx=None, dy=None):
-        super().__init__()
-        self.x = x; self.y = y
-        self.radius = size
-        # 兼容：旧代码使用 speed 表示纵向速度；新代码可传入 dx/dy 表示方向速度
-        self.speed = speed
-        self.vx = 0 if dx is None else dx
-        self.vy = speed if dy is None else dy
-        self.color = color
-        self.owner = owner  # "player" 或 "enemy"
-        self.trail = []
-        self.rect = pygame.Rect(self.x - self.radius, self.y - self.radius, self.radius*2, self.radius*2)
-
-    def draw(self):
-        if self.owner == "player":
-            for i, pos in enumerate(reversed(self.trail)):
-                alpha = 200 - i*40
-                size = max(1, int(self.radius * (1 - i/max(1, len(self.trail)))))
-                pygame.draw.circle(screen, (*self.color, max(0, alpha)), pos, size)
-            pygame.draw.circle(screen, self.color, (self.x, self.y), self.radius)
-            pygame.draw.circle(screen, (255, 255, 255), (self.x - 2, self.y - 2), max(1, self.radius // 2))
-        else:
-            pygame.draw.circle(screen, (255, 100, 100, 150), (self.x, self.y), self.radius + 2)
-            pygame.draw.circle(screen, self.color, (self.x, self.y), self.radius)
-            pygame.draw.circle(screen, (255, 150, 150), (self.x, self.y), max(1, self.radius // 2))
-
-    def move(self):
-        # 支持斜向移动（霰弹锥形）
-        self.x += self.vx
-        self.y += self.vy
-        self.trail.append((self.x, self.y))
-        if len(self.trail) > 5: self.trail.pop(0)
-
-    def off_screen(self):
-        # 出界判定包含左右边界，留少量缓冲
-        return (self.y < -20 or self.y > HEIGHT + 20 or self.x < -20 or self.x > WIDTH + 20)
-
-    def collide_with_player(self, player):
-        return math.hypot(self.x - player.x, self.y - player.y) < self.radius + player.radius
-
-    def collide_with_enemy(self, enemy):
-        return math.hypot(self.x - enemy.x, self.y - enemy.y) < self.radius + enemy.radius
-
-    def collide_with_wall(self, wall):
-        r = pygame.Rect(self.x - self.radius, self.y - self.radius, self.radius*2, self.radius*2)
-        return r.colliderect(wall.rect)
-
 class Grenade(pygame.sprite.Sprite):
     def __init__(self, x, y, speed, color, owner):
         super().__init__()
@@ -675,19 +657,25 @@ class Grenade(pygame.sprite.Sprite):
         # 为了保留闪烁提示，仍保留一个用于 UI 的倒计时（不再决定爆炸触发）
         self.timer = int(self.max_distance / max(1, abs(self.speed)))
 
-    def draw(self):
-        for i, pos in enumerate(self.trail):
-            alpha = int(200 * (1 - i/max(1, len(self.trail))))
-            pygame.draw.circle(screen, (*self.color, alpha), pos, max(1, int(self.radius * (1 - i/max(1,len(self.trail))))))
+    def draw(self, trail=None):
+        # trail 限制最多画最新的几个拖尾点（画质降档）
+        n = len(self.trail)
+        start = 0 if trail is None else max(0, n - trail)
+        for i in range(start, n):
+            x, y = self.trail[i]
+            # 拖尾圆点是缓存的半透明精灵，越旧（i 越小）越大越不透明
+            size = max(1, int(self.radius * (1 - i / n)))
+            screen.blit(sprite_cache.stamp(self.color, size, int(200 * (1 - i / n))), (int(x) - size - 1, int(y) - size - 1))
+        x = int(self.x); y = int(self.y)
         if not self.exploded:
             t = max(0, self.timer)
             flash = (t < self.warning_timer and ((t // 3) % 2 == 0))
             c = (255, 100, 100) if flash else self.color
-            pygame.draw.circle(screen, c, (self.x, self.y), self.radius)
-            pygame.draw.circle(screen, (200, 200, 200), (self.x, self.y), self.radius - 2)
-            pygame.draw.rect(screen, (150, 150, 150), (self.x - 2, self.y - 10, 4, 6))
+            pad = self.radius + GRENADE_PAD
+            screen.blit(sprite_cache.grenade(self.radius, c), (x - pad, y - pad))
         else:
-            pygame.draw.circle(screen, GRENADE_EXPLOSION_COLOR, (self.x, self.y), self.explosion_radius // 2)
+            r = self.explosion_radius // 2
+            screen.blit(sprite_cache.disc(r, GRENADE_EXPLOSION_COLOR), (x - r, y - r))
 
     def update(self):
         if not self.exploded:
@@ -718,8 +706,8 @@ class Boss:
         self.radius = 45
         self.x = WIDTH // 2
         self.y = HEIGHT // 4
-        self.speed_x = random.choice([-3, 3])
-        self.speed_y = random.choice([-3, 3])
+        self.speed_x = game_rng.spawning.choice([-3, 3])
+        self.speed_y = game_rng.spawning.choice([-3, 3])
         # 获取BOSS等级（用于属性增强）
         boss_level = rl.get_boss_level() if rl else 1
         # 根据风险/难度和BOSS等级调整Boss属性
@@ -744,31 +732,19 @@ class Boss:
         self._rl = rl
 
     def draw(self):
+        pad = self.radius + BOSS_PAD
+        pos = (int(self.x) - pad, int(self.y) - pad)
         if self.spawn_effect_timer > 0:
-            pulse = abs(math.sin(self.spawn_effect_timer * 0.1)) * 10
-            color = (min(255, 180 + int(pulse * 7)), 50, min(255, 180 + int(pulse * 7)))
-            pygame.draw.circle(screen, color, (self.x, self.y), self.radius + int(pulse))
-            pygame.draw.circle(screen, BOSS_COLOR, (self.x, self.y), self.radius)
+            screen.blit(sprite_cache.boss_spawn(self.radius, BOSS_COLOR, self.spawn_effect_timer), pos)
         else:
-            color = (255, 255, 200) if self.flash > 0 else BOSS_COLOR
+            screen.blit(sprite_cache.boss(self.radius, BOSS_COLOR, self.flash > 0), pos)
             if self.flash > 0: self.flash -= 1
-            pygame.draw.circle(screen, color, (self.x, self.y), self.radius)
-            pygame.draw.circle(screen, (100, 0, 100), (self.x, self.y), self.radius - 8)
-            pygame.draw.circle(screen, (255, 50, 50), (self.x - 15, self.y - 10), 12)
-            pygame.draw.circle(screen, (255, 50, 50), (self.x + 15, self.y - 10), 12)
-            pygame.draw.circle(screen, (0, 0, 0), (self.x - 15, self.y - 10), 6)
-            pygame.draw.circle(screen, (0, 0, 0), (self.x + 15, self.y - 10), 6)
-            pygame.draw.polygon(screen, (150, 0, 150), [(self.x - 20, self.y - 40),(self.x - 30, self.y - 60),(self.x - 10, self.y - 45)])
-            pygame.draw.polygon(screen, (150, 0, 150), [(self.x + 20, self.y - 40),(self.x + 30, self.y - 60),(self.x + 10, self.y - 45)])
-            pygame.draw.arc(screen, (255, 50, 50), [self.x - 20, self.y, 40, 30], math.pi, 2 * math.pi, 3)
         # 血条
         bw, bh = 150, 15
-        pygame.draw.rect(screen, (100, 0, 0), (self.x - bw//2, self.y - self.radius - 30, bw, bh))
-        pygame.draw.rect(screen, (0, 200, 0), (self.x - bw//2, self.y - self.radius - 30, bw * (self.health / self.max_health), bh))
-        pygame.draw.rect(screen, (200, 200, 200), (self.x - bw//2, self.y - self.radius - 30, bw, bh), 2)
-        font = pygame.font.SysFont(None, 30)
+        sprite_cache.draw_bar(screen, self.x - bw//2, self.y - self.radius - 30, bw, bh, self.health / self.max_health,
+                              (100, 0, 0), (0, 200, 0), border=((200, 200, 200), 2))
         boss_level = self._rl.get_boss_level() if self._rl else 1
-        name_text = font.render(f"BOSS LV.{boss_level}", True, (255, 100, 255))
+        name_text = fonts.render(FONT_30, f"BOSS LV.{boss_level}", (255, 100, 255))
         screen.blit(name_text, (self.x - name_text.get_width() // 2, self.y - self.radius - 50))
 
     def move(self):
@@ -786,11 +762,11 @@ class Boss:
             self.x += self.speed_x; self.y += self.speed_y
             if self.x <= self.radius or self.x >= WIDTH - self.radius: self.speed_x *= -1
             if self.y <= self.radius or self.y >= HEIGHT - self.radius: self.speed_y *= -1
-            if random.random() < 0.01: self.speed_x = random.choice([-3, -2, 2, 3])
-            if random.random() < 0.01: self.speed_y = random.choice([-3, -2, 2, 3])
+            if game_rng.combat.random() < 0.01: self.speed_x = game_rng.combat.choice([-3, -2, 2, 3])
+            if game_rng.combat.random() < 0.01: self.speed_y = game_rng.combat.choice([-3, -2, 2, 3])
             if self.charge_cooldown > 0: self.charge_cooldown -= 1
-            if self.charge_cooldown <= 0 and random.random() < 0.02:
-                ang = random.uniform(0, 2 * math.pi)
+            if self.charge_cooldown <= 0 and game_rng.combat.random() < 0.02:
+                ang = game_rng.combat.uniform(0, 2 * math.pi)
                 self.charge_direction = (math.cos(ang), math.sin(ang))
                 self.is_charging = True; self.charge_timer = 60
 
@@ -806,7 +782,7 @@ class Boss:
         return {"x": self.x, "y": self.y, "radius": 10, "max_radius": 180 + r_bonus, "damage": 20 + d_bonus, "damaged_player": False}
 
     def take_damage(self, amount, source=None):
-        if source != "grenade" and random.random() < self.immune_chance:
+        if source != "grenade" and game_rng.combat.random() < self.immune_chance:
             return False
         self.health -= amount; self.flash = 5; return True
 
@@ -817,38 +793,31 @@ class Boss:
         player.take_damage(20 if self.is_charging else 10)
         self.speed_x *= -1; self.speed_y *= -1; self.collision_cooldown = 30
 
-class Particle(pygame.sprite.Sprite):
-    def __init__(self, x, y, color):
+class ParticleGroup(pygame.sprite.Group):
+    """特效组：漂浮文字仍是精灵成员；技能火花存放在 NumPy 发射器（self.sparks）里，
+    爆炸是预渲染动画的播放列表（self.explosions），都不再是精灵。
+    迭代、len() 只涉及漂浮文字，火花/爆炸数量用 len(group.sparks) / len(group.explosions)"""
+    def __init__(self, rng=None):
         super().__init__()
-        self.x = x; self.y = y
-        self.color = color
-        self.size = random.randint(2, 6)
-        self.speed_x = random.uniform(-3, 3)
-        self.speed_y = random.uniform(-3, 3)
-        self.life = random.randint(20, 40)
-        self.rect = pygame.Rect(self.x, self.y, 1, 1)
+        self.sparks = ParticleEmitter(rng)
+        self.explosions = ExplosionList()
 
-    def update(self):
-        self.x += self.speed_x; self.y += self.speed_y
-        self.life -= 1; self.size = max(0, self.size - 0.1)
-        if self.life <= 0:
-            self.kill()
-            _recycle_particle(self)
-            return False
-        return True
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self.sparks.update()
+        self.explosions.update()
 
-    def draw(self):
-        if self.color == GRENADE_EXPLOSION_COLOR:
-            pygame.draw.circle(screen, (255, 200, 100, min(255, self.life*6)), (int(self.x), int(self.y)), int(self.size))
-            pygame.draw.circle(screen, (255, 150, 50, min(255, self.life*3)), (int(self.x), int(self.y)), max(1, int(self.size * 1.5)), 1)
-        else:
-            alpha = min(255, int(self.life * 6))
-            pygame.draw.circle(screen, (*self.color, alpha), (int(self.x), int(self.y)), int(self.size))
+    def empty(self):
+        super().empty()
+        self.sparks.empty()
+        self.explosions.empty()
 
 class FloatingText(pygame.sprite.Sprite):
     def __init__(self, x, y, text, color=(255, 255, 255)):
         super().__init__()
         self.x = x; self.y = y
+        # 生成的那一帧没有“上一步”位置，插值时就画在生成点
+        self.prev_x = x; self.prev_y = y
         self.text = str(text)
         self.color = color
         self.alpha = 255
@@ -865,33 +834,16 @@ class FloatingText(pygame.sprite.Sprite):
         return True
 
     def draw(self):
-        surf = float_font.render(self.text, True, self.color)
-        surf.set_alpha(self.alpha)
+        surf = float_glyphs.faded(self.text, self.color, self.alpha)
+        if surf is None:
+            return
         screen.blit(surf, (int(self.x - surf.get_width()/2), int(self.y - surf.get_height()/2)))
 
 # 工厂/复用函数
-def _get_particle(x, y, color):
-    if _PARTICLE_POOL:
-        p = _PARTICLE_POOL.pop()
-        # 重置属性
-        p.x = x; p.y = y; p.color = color
-        p.size = random.randint(2, 6)
-        p.speed_x = random.uniform(-3, 3)
-        p.speed_y = random.uniform(-3, 3)
-        p.life = random.randint(20, 40)
-        return p
-    return Particle(x, y, color)
-
-def _recycle_particle(p):
-    try:
-        _PARTICLE_POOL.append(p)
-    except:
-        pass
-
 def _get_float_text(x, y, text, color):
     if _FLOAT_TEXT_POOL:
         ft = _FLOAT_TEXT_POOL.pop()
-        ft.x = x; ft.y = y; ft.text = str(text); ft.color = color
+        ft.x = x; ft.y = y; ft.prev_x = x; ft.prev_y = y; ft.text = str(text); ft.color = color
         ft.alpha = 255; ft.vy = -1.0; ft.life = 40
         return ft
     return FloatingText(x, y, text, color)
@@ -916,37 +868,89 @@ class Wall(pygame.sprite.Sprite):
         self.color = WALL_COLOR
         self.border_color = (80, 80, 100)
 
-    def draw(self):
-        pygame.draw.rect(screen, self.color, self.rect)
-        pygame.draw.rect(screen, self.border_color, self.rect, 2)
+    def draw(self, dest=None):
+        dest = screen if dest is None else dest
+        pygame.draw.rect(dest, self.color, self.rect)
+        pygame.draw.rect(dest, self.border_color, self.rect, 2)
+
+    def block_bullet(self):
+        return game_rng.combat.random() < 0.3
+
+
+class WallGroup(pygame.sprite.Group):
+    """房间墙体组：墙在一个房间内静止，首次查询时把全部墙烘焙成整屏像素占用图（pygame.Mask），
+    之后每次重叠判定都是一次 C 层的 overlap，不再逐墙遍历、也不再临时创建 Rect；增删墙体后自动重烘焙。
+    version 在每次增删后递增，供背景层判断是否需要重新烘焙墙体画面"""
+    def __init__(self, *sprites):
+        self._mask = None
+        self._rects = None
+        self._boxes = {}
+        self.version = 0
+        super().__init__(*sprites)
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite, layer)
+        self._mask = None
+        self.version += 1
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        self._mask = None
+        self.version += 1
+
+    def _box(self, w, h):
+        box = self._boxes.get((w, h))
+        if box is None:
+            box = self._boxes[(w, h)] = pygame.Mask((w, h), fill=True)
+        return box
+
+    def bake(self):
+        mask = pygame.Mask((WIDTH, HEIGHT))
+        for w in self:
+            mask.draw(self._box(w.rect.w, w.rect.h), w.rect.topleft)
+        self._mask = mask
+        self._rects = np.array([tuple(w.rect) for w in self], dtype=np.int64).reshape(-1, 4)
+        return mask
+
+    def rects(self):
+        """全部墙体的 (x, y, w, h) 数组（W×4），供子弹整列粗筛"""
+        if self._mask is None:
+            self.bake()
+        return self._rects
+
+    def overlaps_rect(self, x, y, w, h):
+        """等价于 any(pygame.Rect(x, y, w, h).colliderect(wall.rect) for wall in self)"""
+        w = int(w); h = int(h)
+        if w <= 0 or h <= 0:
+            return False
+        mask = self._mask or self.bake()
+        return mask.overlap(self._box(w, h), (int(x), int(y))) is not None
 
-    def block_bullet(self, bullet):
-        return random.random() < 0.3
+    def overlaps_circle(self, x, y, radius):
+        """圆的包围盒是否压到墙"""
+        return self.overlaps_rect(x - radius, y - radius, radius*2, radius*2)
 
 class PowerUp(pygame.sprite.Sprite):
     def __init__(self, x, y):
         super().__init__()
         self.x = x; self.y = y
         self.radius = 12
-        self.type = random.choice(["health", "shield", "points"])
+        self.type = game_rng.loot.choice(["health", "shield", "points"])
         self.timer = 300
-        self.float_offset = random.uniform(0, math.pi*2)
+        self.float_offset = game_rng.effects.uniform(0, math.pi*2)
         self.rect = pygame.Rect(self.x - self.radius, self.y - self.radius, self.radius*2, self.radius*2)
 
-    def draw(self):
-        fy = self.y + math.sin(pygame.time.get_ticks()/200 + self.float_offset) * 5
-        color = (0, 200, 0) if self.type == "health" else ((100, 200, 255) if self.type == "shield" else (255, 215, 0))
-        pygame.draw.circle(screen, color, (self.x, fy), self.radius)
-        pygame.draw.circle(screen, (200, 200, 200), (self.x, fy), self.radius, 2)
-        pulse = abs(math.sin(pygame.time.get_ticks()/200)) * 2
-        pygame.draw.circle(screen, (*color, 50), (self.x, fy), int(self.radius + pulse))
-        if self.type == "health":
-            pygame.draw.rect(screen, (255, 255, 255), (self.x - 4, fy - 8, 8, 16))
-            pygame.draw.polygon(screen, (255, 255, 255), [(self.x, fy - 10), (self.x - 6, fy + 2), (self.x + 6, fy + 2)])
-        elif self.type == "shield":
-            pygame.draw.circle(screen, (255, 255, 255), (self.x, fy), 6, 2)
-        else:
-            pygame.draw.circle(screen, (255, 255, 255), (self.x, fy), 6)
+    COLORS = {"health": (0, 200, 0), "shield": (100, 200, 255), "points": (255, 215, 0)}
+
+    def draw(self, glow=None):
+        """glow 为光圈外扩像素（0~2，所有道具同步脉动），由调用方每帧算一次传入"""
+        t = pygame.time.get_ticks() / 200
+        if glow is None:
+            glow = int(abs(math.sin(t)) * 2)
+        fy = self.y + math.sin(t + self.float_offset) * 5
+        pad = self.radius + POWERUP_PAD
+        sprite = sprite_cache.powerup(self.type, self.radius, self.COLORS[self.type], glow)
+        screen.blit(sprite, (int(self.x) - pad, int(fy) - pad))
 
     def update(self):
         self.timer -= 1; return self.timer > 0
@@ -962,35 +966,33 @@ class PauseMenu:
         self.quit_button = pygame.Rect(WIDTH//2 - 100, HEIGHT//2 + 50, 200, 60)
 
     def draw(self):
-        overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 180))
-        screen.blit(overlay, (0, 0))
+        """背后是打开暂停时的最后一帧；只有按钮悬停状态变化时才重画菜单，返回变化区域"""
+        mouse_pos = pygame.mouse.get_pos()
+        hover = (self.continue_button.collidepoint(mouse_pos), self.quit_button.collidepoint(mouse_pos))
+        return menu_scene.draw("pause", screen.copy, hover, lambda surf: self._paint(surf, *hover), dim=(0, 0, 0, 180))
 
+    def _paint(self, surf, cont_hover, quit_hover):
         menu_rect = pygame.Rect(WIDTH//2 - 150, HEIGHT//2 - 100, 300, 250)
-        pygame.draw.rect(screen, (40, 40, 80), menu_rect, border_radius=15)
-        pygame.draw.rect(screen, (80, 80, 120), menu_rect, 3, border_radius=15)
+        pygame.draw.rect(surf, (40, 40, 80), menu_rect, border_radius=15)
+        pygame.draw.rect(surf, (80, 80, 120), menu_rect, 3, border_radius=15)
 
-        title = FONT_48.render("PAUSED", True, (255, 215, 0))
-        screen.blit(title, (WIDTH//2 - title.get_width()//2, HEIGHT//2 - 130))
-
-        mouse_pos = pygame.mouse.get_pos()
-        cont_hover = self.continue_button.collidepoint(mouse_pos)
-        quit_hover = self.quit_button.collidepoint(mouse_pos)
+        title = fonts.render(FONT_48, "PAUSED", (255, 215, 0))
+        surf.blit(title, (WIDTH//2 - title.get_width()//2, HEIGHT//2 - 130))
 
         cont_color = (100, 200, 100) if cont_hover else (70, 160, 70)
-        pygame.draw.rect(screen, cont_color, self.continue_button, border_radius=10)
-        pygame.draw.rect(screen, (150, 250, 150), self.continue_button, 3, border_radius=10)
-        cont_text = FONT_36.render("CONTINUE", True, (255, 255, 255))
-        screen.blit(cont_text, (self.continue_button.centerx - cont_text.get_width()//2, self.continue_button.centery - cont_text.get_height()//2))
+        pygame.draw.rect(surf, cont_color, self.continue_button, border_radius=10)
+        pygame.draw.rect(surf, (150, 250, 150), self.continue_button, 3, border_radius=10)
+        cont_text = fonts.render(FONT_36, "CONTINUE", (255, 255, 255))
+        surf.blit(cont_text, (self.continue_button.centerx - cont_text.get_width()//2, self.continue_button.centery - cont_text.get_height()//2))
 
         quit_color = (200, 100, 100) if quit_hover else (160, 70, 70)
-        pygame.draw.rect(screen, quit_color, self.quit_button, border_radius=10)
-        pygame.draw.rect(screen, (250, 150, 150), self.quit_button, 3, border_radius=10)
-        quit_text = FONT_36.render("QUIT", True, (255, 255, 255))
-        screen.blit(quit_text, (self.quit_button.centerx - quit_text.get_width()//2, self.quit_button.centery - quit_text.get_height()//2))
+        pygame.draw.rect(surf, quit_color, self.quit_button, border_radius=10)
+        pygame.draw.rect(surf, (250, 150, 150), self.quit_button, 3, border_radius=10)
+        quit_text = fonts.render(FONT_36, "QUIT", (255, 255, 255))
+        surf.blit(quit_text, (self.quit_button.centerx - quit_text.get_width()//2, self.quit_button.centery - quit_text.get_height()//2))
 
-        info_text = FONT_24.render("Progress saved automatically", True, (180, 180, 200))
-        screen.blit(info_text, (WIDTH//2 - info_text.get_width()//2, HEIGHT//2 + 120))
+        info_text = fonts.render(FONT_24, "Progress saved automatically", (180, 180, 200))
+        surf.blit(info_text, (WIDTH//2 - info_text.get_width()//2, HEIGHT//2 + 120))
 
     def handle_event(self, event, player, enemies, score):
         if event.type == pygame.MOUSEBUTTONDOWN:
@@ -1025,55 +1027,64 @@ class RewardMenu:
             ("+0.5 Move Speed", lambda p: setattr(p, 'speed', p.speed + 0.5)),
             ("+2 Bullet Damage", lambda p: setattr(p, 'bullet_damage', p.bullet_damage + 2)),
         ]
-        random.shuffle(self.options)
+        game_rng.loot.shuffle(self.options)
         self.options = self.options[:3]
 
-    def draw(self):
-        overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 200)); screen.blit(overlay, (0, 0))
+    def draw(self, s):
+        """背后是冻结的对局画面（只拍一次）；选项不变就不重画，返回变化区域"""
+        names = tuple(name for name, _ in self.options)
+        return menu_scene.draw(frozen_world_key(s, "reward"), lambda: draw_frozen_world(s), names, self._paint, dim=(0, 0, 0, 200))
+
+    def _paint(self, surf):
         panel = pygame.Rect(WIDTH//2 - 250, HEIGHT//2 - 150, 500, 320)
-        pygame.draw.rect(screen, (40, 60, 90), panel, border_radius=12)
-        pygame.draw.rect(screen, (100, 150, 220), panel, 3, border_radius=12)
-        title = FONT_48.render("CHOOSE ONE", True, (255, 215, 0))
-        screen.blit(title, (WIDTH//2 - title.get_width()//2, panel.top + 20))
+        pygame.draw.rect(surf, (40, 60, 90), panel, border_radius=12)
+        pygame.draw.rect(surf, (100, 150, 220), panel, 3, border_radius=12)
+        title = fonts.render(FONT_48, "CHOOSE ONE", (255, 215, 0))
+        surf.blit(title, (WIDTH//2 - title.get_width()//2, panel.top + 20))
         small = FONT_28
-        hint = small.render("Press 1 / 2 / 3 to pick", True, (220, 220, 240))
-        screen.blit(hint, (WIDTH//2 - hint.get_width()//2, panel.bottom - 40))
+        hint = fonts.render(small, "Press 1 / 2 / 3 to pick", (220, 220, 240))
+        surf.blit(hint, (WIDTH//2 - hint.get_width()//2, panel.bottom - 40))
         for i, (name, _) in enumerate(self.options):
             box = pygame.Rect(panel.left + 30, panel.top + 80 + i*70, 440, 50)
-            pygame.draw.rect(screen, (60, 80, 110), box, border_radius=8)
-            pygame.draw.rect(screen, (120, 170, 240), box, 2, border_radius=8)
-            label = FONT_36.render(f"{i+1}. {name}", True, (255, 255, 255))
-            screen.blit(label, (box.left + 12, box.top + 10))
-        
+            pygame.draw.rect(surf, (60, 80, 110), box, border_radius=8)
+            pygame.draw.rect(surf, (120, 170, 240), box, 2, border_radius=8)
+            label = fonts.render(FONT_36, f"{i+1}. {name}", (255, 255, 255))
+            surf.blit(label, (box.left + 12, box.top + 10))
+
     def handle_event(self, event, player, rl_manager=None, was_boss_battle=False):
         if event.type == pygame.KEYDOWN:
             idx = None
             if event.key == pygame.K_1: idx = 0
             elif event.key == pygame.K_2: idx = 1
             elif event.key == pygame.K_3: idx = 2
-            if idx is not None and 0 <= idx < len(self.options):
-                try:
-                    self.options[idx][1](player)
-                except:
-                    pass
-                
-                # 如果是BOSS战胜利，应用永久加成
-                boss_bonus_info = None
-                if was_boss_battle and rl_manager:
-                    boss_bonus_info = rl_manager.apply_boss_victory_bonus(player)
-                
-                # 推进到下一房间/层
-                end_of_floor = False
-                if rl_manager:
-                    # 在推进前判断是否处于层末尾
-                    end_of_floor = (rl_manager.room >= rl_manager.rooms_per_floor)
-                    rl_manager.advance()
-                
-                self.visible = False
-                return True, boss_bonus_info, end_of_floor
+            if idx is not None:
+                return self.pick(idx, player, rl_manager, was_boss_battle)
         return False, None, False
 
+    def pick(self, idx, player, rl_manager=None, was_boss_battle=False):
+        # 返回 (handled, boss_bonus_info, end_of_floor)
+        if not (0 <= idx < len(self.options)):
+            return False, None, False
+        try:
+            self.options[idx][1](player)
+        except:
+            pass
+        
+        # 如果是BOSS战胜利，应用永久加成
+        boss_bonus_info = None
+        if was_boss_battle and rl_manager:
+            boss_bonus_info = rl_manager.apply_boss_victory_bonus(player)
+        
+        # 推进到下一房间/层
+        end_of_floor = False
+        if rl_manager:
+            # 在推进前判断是否处于层末尾
+            end_of_floor = (rl_manager.room >= rl_manager.rooms_per_floor)
+            rl_manager.advance()
+        
+        self.visible = False
+        return True, boss_bonus_info, end_of_floor
+
 
 class ShopMenu:
     def __init__(self):
@@ -1089,77 +1100,82 @@ class ShopMenu:
             { 'name': '+10 Grenade Damage', 'price': 35, 'apply': lambda p: None },  # 真正加成为 rl 的永久加成，由主循环应用
             { 'name': '+0.5 Move Speed', 'price': 30, 'apply': lambda p: setattr(p, 'speed', p.speed + 0.5) },
         ]
-        random.shuffle(candidates)
+        game_rng.loot.shuffle(candidates)
         # 取前三项
         self.items = []
         for it in candidates[:3]:
             self.items.append({ **it, 'purchased': False })
 
-    def draw(self, player):
-        overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 200)); screen.blit(overlay, (0, 0))
+    def draw(self, s):
+        """背后是冻结的对局画面（购买改变血量/护盾时才重拍）；金币与已购买状态不变就不重画，返回变化区域"""
+        player = s.player
+        key = (player.gold, tuple((it['name'], it['purchased']) for it in self.items))
+        return menu_scene.draw(frozen_world_key(s, "shop"), lambda: draw_frozen_world(s), key,
+                               lambda surf: self._paint(surf, player), dim=(0, 0, 0, 200))
 
+    def _paint(self, surf, player):
         panel = pygame.Rect(WIDTH//2 - 280, HEIGHT//2 - 200, 560, 380)
-        pygame.draw.rect(screen, (40, 60, 90), panel, border_radius=12)
-        pygame.draw.rect(screen, (120, 170, 240), panel, 3, border_radius=12)
-        title = FONT_48.render("SHOP", True, (255, 215, 0))
-        screen.blit(title, (panel.centerx - title.get_width()//2, panel.top + 16))
+        pygame.draw.rect(surf, (40, 60, 90), panel, border_radius=12)
+        pygame.draw.rect(surf, (120, 170, 240), panel, 3, border_radius=12)
+        title = fonts.render(FONT_48, "SHOP", (255, 215, 0))
+        surf.blit(title, (panel.centerx - title.get_width()//2, panel.top + 16))
 
         # Gold 显示
         small = FONT_28
-        gold_text = small.render(f"Gold: {player.gold}", True, (255, 215, 0))
-        screen.blit(gold_text, (panel.left + 20, panel.top + 18))
+        gold_text = fonts.render(small, f"Gold: {player.gold}", (255, 215, 0))
+        surf.blit(gold_text, (panel.left + 20, panel.top + 18))
 
         # 商品列表
         item_font = FONT_30
         for i, it in enumerate(self.items):
             box = pygame.Rect(panel.left + 26, panel.top + 70 + i*80, panel.width - 52, 60)
-            pygame.draw.rect(screen, (60, 80, 110), box, border_radius=10)
-            pygame.draw.rect(screen, (120, 170, 240), box, 2, border_radius=10)
-            label = item_font.render(f"{i+1}. {it['name']}  -  {it['price']}g", True, (255, 255, 255))
-            screen.blit(label, (box.left + 14, box.top + 16))
+            pygame.draw.rect(surf, (60, 80, 110), box, border_radius=10)
+            pygame.draw.rect(surf, (120, 170, 240), box, 2, border_radius=10)
+            label = fonts.render(item_font, f"{i+1}. {it['name']}  -  {it['price']}g", (255, 255, 255))
+            surf.blit(label, (box.left + 14, box.top + 16))
             # 购买状态
             status = "Purchased" if it['purchased'] else ("Buy" if player.gold >= it['price'] else "Need Gold")
             color = (120, 220, 140) if not it['purchased'] and player.gold >= it['price'] else ((180,180,180) if it['purchased'] else (220,120,120))
-            st = small.render(status, True, color)
-            screen.blit(st, (box.right - st.get_width() - 12, box.top + 18))
+            st = fonts.render(small, status, color)
+            surf.blit(st, (box.right - st.get_width() - 12, box.top + 18))
 
         # 下一层按钮
         self.next_btn = pygame.Rect(panel.centerx - 120, panel.bottom - 60, 240, 44)
-        pygame.draw.rect(screen, (60, 150, 90), self.next_btn, border_radius=10)
-        pygame.draw.rect(screen, (90, 200, 130), self.next_btn, 2, border_radius=10)
-        nlabel = FONT_32.render("NEXT FLOOR", True, (255, 255, 255))
-        screen.blit(nlabel, (self.next_btn.centerx - nlabel.get_width()//2, self.next_btn.centery - nlabel.get_height()//2))
+        pygame.draw.rect(surf, (60, 150, 90), self.next_btn, border_radius=10)
+        pygame.draw.rect(surf, (90, 200, 130), self.next_btn, 2, border_radius=10)
+        nlabel = fonts.render(FONT_32, "NEXT FLOOR", (255, 255, 255))
+        surf.blit(nlabel, (self.next_btn.centerx - nlabel.get_width()//2, self.next_btn.centery - nlabel.get_height()//2))
 
-    def handle_event(self, event, player, rl_manager=None):
-        # 返回 (consumed, proceed_next)
+    def handle_event(self, event):
+        # 返回 ('next', None) / ('buy', idx) / None；实际结算交给 GameSession（以便录像）
         if event.type == pygame.MOUSEBUTTONDOWN:
             if self.next_btn.collidepoint(pygame.mouse.get_pos()):
-                self.visible = False
-                return True, True
+                return 'next', None
         if event.type == pygame.KEYDOWN:
             if event.key == pygame.K_n:
-                self.visible = False
-                return True, True
-            idx = None
-            if event.key == pygame.K_1: idx = 0
-            elif event.key == pygame.K_2: idx = 1
-            elif event.key == pygame.K_3: idx = 2
-            if idx is not None and 0 <= idx < len(self.items):
-                it = self.items[idx]
-                if not it['purchased'] and player.gold >= it['price']:
-                    if it['name'].startswith('+10 Grenade Damage') and rl_manager is not None:
-                        # 特殊：手雷伤害加成归入永久加成池
-                        rl_manager.player_permanent_bonuses['grenade_damage_bonus'] += 10
-                    ok = player.spend_gold(it['price'])
-                    if ok:
-                        try:
-                            it['apply'](player)
-                        except:
-                            pass
-                        it['purchased'] = True
-                        return True, False
-        return False, False
+                return 'next', None
+            if event.key == pygame.K_1: return 'buy', 0
+            elif event.key == pygame.K_2: return 'buy', 1
+            elif event.key == pygame.K_3: return 'buy', 2
+        return None
+
+    def buy(self, idx, player, rl_manager=None):
+        if not (0 <= idx < len(self.items)):
+            return False
+        it = self.items[idx]
+        if not it['purchased'] and player.gold >= it['price']:
+            if it['name'].startswith('+10 Grenade Damage') and rl_manager is not None:
+                # 特殊：手雷伤害加成归入永久加成池
+                rl_manager.player_permanent_bonuses['grenade_damage_bonus'] += 10
+            ok = player.spend_gold(it['price'])
+            if ok:
+                try:
+                    it['apply'](player)
+                except:
+                    pass
+                it['purchased'] = True
+                return True
+        return False
 
 # Roguelike 地城管理
 class RoguelikeManager:
@@ -1219,7 +1235,7 @@ class RoguelikeManager:
             self.enemy_scale_bonus = 0.0
 
     def gen_walls(self):
-        walls = pygame.sprite.Group()
+        walls = WallGroup()
         # 基于房间生成一些不重叠的平台/墙
         count = 5 + (self.room % 3)
         min_w, max_w = 80, 180
@@ -1230,9 +1246,9 @@ class RoguelikeManager:
         for _ in range(count):
             placed = False
             for _try in range(200):
-                w = random.randint(min_w, max_w); h = random.randint(min_h, max_h)
-                x = random.randint(margin, WIDTH - w - margin)
-                y = random.randint(80, HEIGHT - h - 120)
+                w = game_rng.worldgen.randint(min_w, max_w); h = game_rng.worldgen.randint(min_h, max_h)
+                x = game_rng.worldgen.randint(margin, WIDTH - w - margin)
+                y = game_rng.worldgen.randint(80, HEIGHT - h - 120)
                 r = pygame.Rect(x, y, w, h)
                 # 要求与已放置墙体保持 gap 间隔
                 inflated = r.inflate(gap, gap)
@@ -1254,7 +1270,7 @@ class RoguelikeManager:
         self.timer = 0
         self.cap = max(3, 5 + self.room + self.cap_base_offset)
         base = max(3, 6 + (self.floor - 1) * 2 + self.base_enemies_offset)
-        self.target_enemies = base + random.randint(0, 3)
+        self.target_enemies = base + game_rng.spawning.randint(0, 3)
         
         # 检查是否需要生成BOSS（第5层开始，每5层的第4个房间）
         if self.is_boss_floor() and self.room == 4 and boss_warning_timer_ref is not None:
@@ -1278,10 +1294,9 @@ class RoguelikeManager:
             player = self.player
             safe_pos_found = False
             for _ in range(120):
-                px = random.randint(player.radius + 10, WIDTH - player.radius - 10)
-                py = random.randint(HEIGHT//2, HEIGHT - player.radius - 10)
-                prect = pygame.Rect(px - player.radius, py - player.radius, player.radius*2, player.radius*2)
-                if not any(prect.colliderect(w.rect) for w in walls):
+                px = game_rng.worldgen.randint(player.radius + 10, WIDTH - player.radius - 10)
+                py = game_rng.worldgen.randint(HEIGHT//2, HEIGHT - player.radius - 10)
+                if not walls.overlaps_rect(px - player.radius, py - player.radius, player.radius*2, player.radius*2):
                     player.x = px; player.y = py
                     player.rect.topleft = (player.x - player.radius, player.y - player.radius)
                     safe_pos_found = True
@@ -1381,76 +1396,134 @@ class RoguelikeManager:
         self.boss_explosion_damage_bonus = int(1 * r + 0.5 * extra)  # ~24 dmg at 20
 
 # 绘制
-def draw_background():
-    screen.fill(BACKGROUND)
-    for i in range(100):
-        x = (i * 37) % WIDTH; y = (i * 23) % HEIGHT
-        size = random.randint(1, 2); b = random.randint(100, 200)
-        pygame.draw.circle(screen, (b, b, 255), (x, y), size)
-    t = pygame.time.get_ticks() / 1000
-    for i in range(5):
-        sp = 0.5 + i * 0.2
-        x = (t * sp * 50) % WIDTH; y = (t * sp * 30 + i * 100) % HEIGHT
-        for j in range(10):
-            px = x - j * 3; py = y - j * 1.5; alpha = max(0, 255 - j * 25)
-            size = max(1, int(3 - j * 0.3))
-            pygame.draw.circle(screen, (200, 200, 255, alpha), (int(px), int(py)), size)
-
-def draw_health_bar(player, x, y, w, h):
-    pygame.draw.rect(screen, (50, 50, 80), (x, y, w, h))
+# 星空：位置固定，大小/亮度用独立随机源只取一次（原来每帧重新随机，星星会闪烁）
+_STAR_RNG = random.Random(20251117)
+STARS = [((i * 37) % WIDTH, (i * 23) % HEIGHT, _STAR_RNG.randint(1, 2), _STAR_RNG.randint(100, 200)) for i in range(100)]
+METEOR_COLOR = (200, 200, 255)
+
+
+class BackgroundLayer:
+    """按房间烘焙的静态背景：底色 + 星空 + 当前房间的墙画进一张 convert 过的整屏表面，
+    墙体组变化（进入新房间）时才重新烘焙；每帧只贴这一张，再用缓存的拖尾精灵画 5 颗流星"""
+    def __init__(self):
+        self._stars = None
+        self._room = None
+        self._key = None
+        self.bakes = 0
+
+    def starfield(self):
+        if self._stars is None:
+            surf = pygame.Surface((WIDTH, HEIGHT))
+            surf.fill(BACKGROUND)
+            for x, y, size, b in STARS:
+                pygame.draw.circle(surf, (b, b, 255), (x, y), size)
+            self._stars = surf.convert()
+        return self._stars
+
+    def room(self, walls):
+        key = (walls, walls.version)
+        if self._key != key:
+            surf = self.starfield().copy()
+            for w in walls:
+                w.draw(surf)
+            self._room = surf
+            self._key = key
+            self.bakes += 1
+        return self._room
+
+    def meteors(self):
+        """本帧各流星的 (拖尾精灵, 贴图位置)；数量随画质档位（全特效 5 颗）"""
+        t = pygame.time.get_ticks() / 1000
+        ox, oy = METEOR_ORIGIN
+        for i in range(quality.settings.meteors):
+            sp = 0.5 + i * 0.2
+            x = (t * sp * 50) % WIDTH; y = (t * sp * 30 + i * 100) % HEIGHT
+            yield sprite_cache.meteor_trail(METEOR_COLOR, y % 1 >= 0.5), (int(x) - ox, int(y) - oy)
+
+    def draw(self, dest, walls=None, rects=None, offset=(0, 0)):
+        """rects 不为 None 时只从烘焙背景恢复这些区域（脏矩形渲染）。
+        offset 为镜头偏移（屏幕震动）：背景与流星整体平移，移开后露出的边缘用未平移的背景补上；
+        震动帧总是整屏重画，不与 rects 同时使用"""
+        base = self.starfield() if walls is None else self.room(walls)
+        dx, dy = offset
+        if rects is not None:
+            for r in rects:
+                dest.blit(base, r, r)
+        elif dx or dy:
+            dest.blit(base, (dx, dy))
+            w, h = dest.get_size()
+            for edge in ((0 if dx > 0 else w + dx, 0, abs(dx), h), (0, 0 if dy > 0 else h + dy, w, abs(dy))):
+                if edge[2] and edge[3]:
+                    dest.blit(base, edge[:2], edge)
+        else:
+            dest.blit(base, (0, 0))
+        for trail, (x, y) in self.meteors():
+            dest.blit(trail, (x + dx, y + dy))
+
+
+background_layer = BackgroundLayer()
+
+
+def draw_background(walls=None):
+    """整屏背景；传入墙体组时墙已烘焙在背景里，流星画在墙之上"""
+    background_layer.draw(screen, walls)
+
+# 血量/护盾渐变条按填充宽度缓存（渐变铺满填充部分，所以每个宽度一张，最多 w+1 张）
+_GRADIENT_STRIPS = {}
+
+def _gradient_strip(kind, fill, h):
+    key = (kind, fill, h)
+    strip = _GRADIENT_STRIPS.get(key)
+    if strip is None:
+        strip = _GRADIENT_STRIPS[key] = pygame.Surface((max(1, int(fill)), h))
+        for i in range(int(fill)):
+            if kind == "health":
+                color_value = int(200 * (i / max(1, fill)))
+                color = (color_value, 200 - color_value//2, 50)
+            else:
+                color = (50, 150, min(255, 150 + int(100 * (i / max(1, fill)))))
+            pygame.draw.line(strip, color, (i, 0), (i, h))
+    return strip
+
+def draw_health_bar(player, x, y, w, h, dest=None):
+    dest = screen if dest is None else dest
+    pygame.draw.rect(dest, (50, 50, 80), (x, y, w, h))
     hw = w * (player.health / 100)
-    for i in range(int(hw)):
-        color_value = int(200 * (i / max(1, hw)))
-        pygame.draw.line(screen, (color_value, 200 - color_value//2, 50), (x + i, y), (x + i, y + h))
-    pygame.draw.rect(screen, (150, 150, 200), (x, y, w, h), 2)
+    if int(hw) > 0:
+        dest.blit(_gradient_strip("health", hw, h + 1), (x, y), (0, 0, int(hw), h + 1))
+    pygame.draw.rect(dest, (150, 150, 200), (x, y, w, h), 2)
     small_font = FONT_24
-    screen.blit(small_font.render(f"{player.health}%", True, TEXT_COLOR), (x + w + 10, y))
+    dest.blit(fonts.render(small_font, f"{player.health}%", TEXT_COLOR), (x + w + 10, y))
     sh_h = h // 2; sh_y = y + h + 5
-    pygame.draw.rect(screen, (30, 30, 60), (x, sh_y, w, sh_h))
+    pygame.draw.rect(dest, (30, 30, 60), (x, sh_y, w, sh_h))
     if player.shield > 0:
         sw = w * (player.shield / player.shield_max)
-        for i in range(int(sw)):
-            bv = min(255, 150 + int(100 * (i / max(1, sw))))
-            pygame.draw.line(screen, (50, 150, bv), (x + i, sh_y), (x + i, sh_y + sh_h))
-    pygame.draw.rect(screen, (100, 150, 255), (x, sh_y, w, sh_h), 2)
-    screen.blit(small_font.render(f"Shield: {player.shield:.0f}/{player.shield_max}", True, (100, 200, 255)), (x + w + 10, sh_y))
+        if int(sw) > 0:
+            dest.blit(_gradient_strip("shield", sw, sh_h + 1), (x, sh_y), (0, 0, int(sw), sh_h + 1))
+    pygame.draw.rect(dest, (100, 150, 255), (x, sh_y, w, sh_h), 2)
+    dest.blit(fonts.render(small_font, f"Shield: {player.shield:.0f}/{player.shield_max}", (100, 200, 255)), (x + w + 10, sh_y))
 
-def draw_weapon_indicator(x, y, weapon_index):
+def draw_weapon_indicator(x, y, weapon_index, dest=None):
+    dest = screen if dest is None else dest
     colors = [PLAYER_BULLET_COLOR, SHOTGUN_COLOR, GRENADE_COLOR]
-    pygame.draw.rect(screen, (40, 40, 60), (x, y, 120, 40), border_radius=5)
+    pygame.draw.rect(dest, (40, 40, 60), (x, y, 120, 40), border_radius=5)
     for i in range(3):
         icon = pygame.Rect(x + 10 + i*40, y + 5, 30, 30)
         if i == weapon_index:
-            pygame.draw.rect(screen, (80, 80, 120), icon, border_radius=5)
-            pygame.draw.rect(screen, colors[i], icon, 2, border_radius=5)
-            pulse = abs(math.sin(pygame.time.get_ticks()/200)) * 10
-            pygame.draw.rect(screen, (*colors[i], 50), pygame.Rect(x + 5 + i*40, y, 40, 40), border_radius=8)
+            pygame.draw.rect(dest, (80, 80, 120), icon, border_radius=5)
+            pygame.draw.rect(dest, colors[i], icon, 2, border_radius=5)
+            pygame.draw.rect(dest, colors[i], pygame.Rect(x + 5 + i*40, y, 40, 40), border_radius=8)
         else:
-            pygame.draw.rect(screen, (60, 60, 80), icon, border_radius=5)
-        if i == 0: pygame.draw.rect(screen, colors[i], (x+15+i*40, y+15, 20, 8))
+            pygame.draw.rect(dest, (60, 60, 80), icon, border_radius=5)
+        if i == 0: pygame.draw.rect(dest, colors[i], (x+15+i*40, y+15, 20, 8))
         elif i == 1:
-            pygame.draw.rect(screen, colors[i], (x+15+i*40, y+15, 10, 8))
-            pygame.draw.rect(screen, colors[i], (x+25+i*40, y+12, 5, 14))
+            pygame.draw.rect(dest, colors[i], (x+15+i*40, y+15, 10, 8))
+            pygame.draw.rect(dest, colors[i], (x+25+i*40, y+12, 5, 14))
         else:
-            pygame.draw.circle(screen, colors[i], (x+25+i*40, y+20), 8)
+            pygame.draw.circle(dest, colors[i], (x+25+i*40, y+20), 8)
 
-def draw_ui_panel(player):
-    ui_surf = pygame.Surface((WIDTH, 80), pygame.SRCALPHA); ui_surf.fill(UI_BG)
-    screen.blit(ui_surf, (0, HEIGHT - 80))
-    font = FONT_36; small_font = FONT_24
-    screen.blit(font.render(f"Weapon: {player.weapon_names[player.weapon]}", True, TEXT_COLOR), (20, HEIGHT - 70))
-    screen.blit(small_font.render("Press 1,2,3 to switch weapons", True, (180, 180, 180)), (20, HEIGHT - 35))
-    skill_name = {
-        None: "No Skill",
-        'rapid': 'Rapid Fire',
-        'fortify': 'Fortify',
-        'triple': 'Triple Buckshot',
-    }.get(getattr(player, 'selected_skill', None), 'Skill')
-    screen.blit(small_font.render(f"Press F: {skill_name}", True, (200, 200, 100)), (450, HEIGHT - 35))
-    input_warning = small_font.render("(Use Eng.input!)", True, (255, 100, 100))
-    screen.blit(input_warning, (WIDTH - input_warning.get_width() - 20, HEIGHT - 35))
-    # 技能冷却统一显示（rapid 使用 attack_boost_*，其余使用 skill_cooldown）
-    pygame.draw.rect(screen, (50, 50, 80), (450, HEIGHT - 65, 200, 20))
+def _skill_cooldown(player):
+    # 技能冷却统一显示（rapid 使用 attack_boost_*，其余使用 skill_cooldown），返回 (进度, 文字)
     cd_ratio = 1.0; cd_text = "Ready"
     if getattr(player, 'selected_skill', None) == 'rapid':
         if player.attack_boost_cooldown > 0:
@@ -1462,36 +1535,244 @@ def draw_ui_panel(player):
         if player.skill_cooldown > 0:
             cd_ratio = 1 - (player.skill_cooldown / 900)
             cd_text = f"CD: {player.skill_cooldown//60+1}s"
-    pygame.draw.rect(screen, (255, 200, 0), (450, HEIGHT - 65, int(200 * cd_ratio), 20))
-    pygame.draw.rect(screen, (150, 150, 50), (450, HEIGHT - 65, 200, 20), 2)
-    screen.blit(small_font.render(cd_text, True, TEXT_COLOR), (455, HEIGHT - 65))
+    return cd_ratio, cd_text
+
+_UI_PANEL_BG = {}
+
+def _ui_panel_background():
+    # 底部面板的半透明底板只创建一次
+    bg = _UI_PANEL_BG.get(UI_BG)
+    if bg is None:
+        bg = _UI_PANEL_BG[UI_BG] = pygame.Surface((WIDTH, 80), pygame.SRCALPHA)
+        bg.fill(UI_BG)
+    return bg
+
+def draw_ui_panel(player, dest=None, top=HEIGHT - 80, background=True):
+    dest = screen if dest is None else dest
+    if background:
+        dest.blit(_ui_panel_background(), (0, top))
+    font = FONT_36; small_font = FONT_24
+    dest.blit(fonts.render(font, f"Weapon: {player.weapon_names[player.weapon]}", TEXT_COLOR), (20, top + 10))
+    dest.blit(fonts.render(small_font, "Press 1,2,3 to switch weapons", (180, 180, 180)), (20, top + 45))
+    skill_name = {
+        None: "No Skill",
+        'rapid': 'Rapid Fire',
+        'fortify': 'Fortify',
+        'triple': 'Triple Buckshot',
+    }.get(getattr(player, 'selected_skill', None), 'Skill')
+    dest.blit(fonts.render(small_font, f"Press F: {skill_name}", (200, 200, 100)), (450, top + 45))
+    input_warning = fonts.render(small_font, "(Use Eng.input!)", (255, 100, 100))
+    dest.blit(input_warning, (WIDTH - input_warning.get_width() - 20, top + 45))
+    pygame.draw.rect(dest, (50, 50, 80), (450, top + 15, 200, 20))
+    cd_ratio, cd_text = _skill_cooldown(player)
+    pygame.draw.rect(dest, (255, 200, 0), (450, top + 15, int(200 * cd_ratio), 20))
+    pygame.draw.rect(dest, (150, 150, 50), (450, top + 15, 200, 20), 2)
+    dest.blit(fonts.render(small_font, cd_text, TEXT_COLOR), (455, top + 15))
     if player.weapon == 2:
-        pygame.draw.rect(screen, (50, 50, 80), (250, HEIGHT - 65, 150, 20))
+        pygame.draw.rect(dest, (50, 50, 80), (250, top + 15, 150, 20))
         if player.grenade_cooldown > 0:
             cp = 1 - (player.grenade_cooldown / 600)
-            pygame.draw.rect(screen, (100, 255, 100), (250, HEIGHT - 65, int(150 * cp), 20))
+            pygame.draw.rect(dest, (100, 255, 100), (250, top + 15, int(150 * cp), 20))
         else:
-            pygame.draw.rect(screen, (100, 255, 100), (250, HEIGHT - 65, 150, 20))
-        pygame.draw.rect(screen, (50, 150, 50), (250, HEIGHT - 65, 150, 20), 2)
-        gt = small_font.render((f"Grenade CD: {player.grenade_cooldown//60+1}s" if player.grenade_cooldown>0 else "Grenade Ready"), True, TEXT_COLOR)
-        screen.blit(gt, (255, HEIGHT - 65))
+            pygame.draw.rect(dest, (100, 255, 100), (250, top + 15, 150, 20))
+        pygame.draw.rect(dest, (50, 150, 50), (250, top + 15, 150, 20), 2)
+        gt = fonts.render(small_font, (f"Grenade CD: {player.grenade_cooldown//60+1}s" if player.grenade_cooldown>0 else "Grenade Ready"), TEXT_COLOR)
+        dest.blit(gt, (255, top + 15))
+
+
+# HUD 上下两条的高度：上条为分数/金币/楼层/敌人数与血条，下条为武器指示器与底部面板
+HUD_TOP_H = 90
+HUD_BOTTOM_H = 120
+
+
+class HudLayer:
+    """变化驱动的 HUD 缓存层。
+
+    上下两条各画进一张透明工作表面，再复制成 RLE 编码的表面供逐帧贴图；只有输入
+    （血量、护盾、金币、分数、武器、冷却进度档位、楼层/房间/风险、敌人数）变化时才重画。
+    内容都画在完全透明或不透明的像素上，贴到屏幕上与直接绘制一致；底部面板的半透明
+    底板仍每帧单独贴（两层半透明预先合成会改变混合结果）。"""
+    def __init__(self):
+        self._work = {
+            "top": pygame.Surface((WIDTH, HUD_TOP_H), pygame.SRCALPHA),
+            "bottom": pygame.Surface((WIDTH, HUD_BOTTOM_H), pygame.SRCALPHA),
+        }
+        self._keys = {}
+        self._layers = {}
+        self.redraws = 0
+
+    def _layer(self, name, key, paint):
+        if self._keys.get(name) != key:
+            work = self._work[name]
+            work.fill((0, 0, 0, 0))
+            paint(work)
+            layer = work.copy()
+            layer.set_alpha(255, pygame.RLEACCEL)
+            self._layers[name] = layer
+            self._keys[name] = key
+            self.redraws += 1
+        return self._layers[name]
+
+    def _inputs(self, s, stats):
+        player = s.player; rl = s.rl
+        top_key = (player.health, player.shield, player.shield_max)
+        if stats:
+            top_key += (player.score, player.gold, rl.floor, rl.room, rl.risk, len(s.enemies), rl.cap)
+        cd_ratio, cd_text = _skill_cooldown(player)
+        grenade = None
+        if player.weapon == 2:
+            grenade = (player.grenade_cooldown // 60, int(150 * (1 - player.grenade_cooldown / 600))
+                       if player.grenade_cooldown > 0 else None)
+        bottom_key = (player.weapon, getattr(player, 'selected_skill', None), cd_text, int(200 * cd_ratio), grenade)
+        return top_key, bottom_key
+
+    def changed_rects(self, s, stats=True):
+        """输入有变化、下一次 draw 会重画的条带区域（脏矩形渲染据此整条恢复）"""
+        top_key, bottom_key = self._inputs(s, stats)
+        rects = []
+        if self._keys.get("top") != top_key:
+            rects.append(pygame.Rect(0, 0, WIDTH, HUD_TOP_H))
+        if self._keys.get("bottom") != bottom_key:
+            rects.append(pygame.Rect(0, HEIGHT - HUD_BOTTOM_H, WIDTH, HUD_BOTTOM_H))
+        return rects
+
+    def draw(self, dest, s, stats=True, rects=None):
+        """stats=False 时只画血条、武器与面板（奖励/商店背后的静止画面）；
+        rects 不为 None 时只贴与这些区域相交的部分（其余像素沿用上一帧，避免半透明反复叠加）"""
+        player = s.player
+        top_key, bottom_key = self._inputs(s, stats)
+        top = self._layer("top", top_key, lambda surf: self._paint_top(surf, s, stats))
+        bottom = self._layer("bottom", bottom_key, lambda surf: self._paint_bottom(surf, player))
+        for surf, y in ((_ui_panel_background(), HEIGHT - 80), (top, 0), (bottom, HEIGHT - HUD_BOTTOM_H)):
+            if rects is None:
+                dest.blit(surf, (0, y))
+                continue
+            area = surf.get_rect(top=y)
+            for r in rects:
+                part = area.clip(r)
+                if part:
+                    dest.blit(surf, part, part.move(0, -y))
+
+    def _paint_top(self, surf, s, stats):
+        player = s.player; rl = s.rl
+        if stats:
+            surf.blit(fonts.render(FONT_36, f"Score: {player.score}", TEXT_COLOR), (20, 25))
+            surf.blit(fonts.render(FONT_36, f"Gold: {player.gold}", (255, 215, 0)), (20, 55))
+            fr_text = fonts.render(FONT_36, f"Floor {rl.floor} - Room {rl.room}  (Risk {rl.risk}/20)", TEXT_COLOR)
+            surf.blit(fr_text, (WIDTH - fr_text.get_width() - 20, 20))
+            enemies_text = fonts.render(FONT_24, f"Enemies: {len(s.enemies)}/{rl.cap}", (200, 150, 150))
+            surf.blit(enemies_text, (WIDTH - enemies_text.get_width() - 20, 60))
+        draw_health_bar(player, 150, 25, 200, 20, surf)
+
+    def _paint_bottom(self, surf, player):
+        draw_weapon_indicator(20, 0, player.weapon, surf)
+        draw_ui_panel(player, surf, top=HUD_BOTTOM_H - 80, background=False)
+
+
+hud_layer = HudLayer()
+
+
+def _disjoint_rects(rects):
+    """把互相重叠的矩形合并成并集，直到两两不重叠（半透明层按区域补画时不能重复叠加）"""
+    rects = list(rects)
+    i = 0
+    while i < len(rects):
+        for j in range(i + 1, len(rects)):
+            if rects[i].colliderect(rects[j]):
+                rects[i] = rects[i].union(rects.pop(j))
+                i = -1
+                break
+        i += 1
+    return rects
+
+
+class MenuScene:
+    """静止界面（暂停/奖励/商店/技能与控制选择/结算/胜利）的缓存画面。
+
+    画面分三层：背后的画面 world（冻结的对局画面或星空）、半透明遮罩 dim、菜单本身（面板、标题、
+    选项与数值，画在透明底上再转成 RLE 层）。三层只在 key（悬停/选中项、金币、已购买等）变化时
+    合成一张整屏表面贴到 screen 上，之后各帧什么都不用画。meteors=True 时（背后是星空）流星继续移动：
+    只在流星新旧位置的小块区域按 world → 流星 → 遮罩 → 菜单层的顺序补画，与逐层整屏绘制的结果一致。
+    其他代码在 screen 上画过东西后（对局画面、进入新的菜单流程）要调用 invalidate()"""
+    def __init__(self):
+        self._work = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
+        self._world_key = None
+        self._world = None
+        self._key = None
+        self._layer = None
+        self._dim = None
+        self._meteor_rects = []
+        self.redraws = 0
+
+    def invalidate(self):
+        self._world_key = None
+        self._key = None
+
+    def draw(self, world_key, world, key, paint, dim=None, meteors=False):
+        """world 为表面或返回表面的函数（world_key 变化时才调用，可以先在 screen 上画好再拍下来）；
+        paint(surf) 把菜单画到透明表面上。返回本帧 screen 上变化的区域，None 表示整屏"""
+        if world_key != self._world_key:
+            self._world = world() if callable(world) else world
+            self._world_key = world_key
+            self._key = None
+        if (world_key, key) != self._key:
+            work = self._work
+            work.fill((0, 0, 0, 0))
+            paint(work)
+            self._layer = work.copy()
+            self._layer.set_alpha(255, pygame.RLEACCEL)
+            self._dim = None if dim is None else render_targets.overlay((WIDTH, HEIGHT), dim)
+            screen.blit(self._world, (0, 0))
+            if self._dim is not None:
+                screen.blit(self._dim, (0, 0))
+            screen.blit(self._layer, (0, 0))
+            self._key = (world_key, key)
+            self._meteor_rects = []
+            self.redraws += 1
+            if meteors:
+                self._draw_meteors()
+            return None
+        return self._draw_meteors() if meteors else []
+
+    def _draw_meteors(self):
+        bounds = screen.get_rect()
+        current = []
+        for trail, pos in background_layer.meteors():
+            r = trail.get_rect(topleft=pos).clip(bounds)
+            if r:
+                current.append((trail, pos, r))
+        rects = _disjoint_rects(self._meteor_rects + [r for _, _, r in current])
+        for r in rects:
+            screen.blit(self._world, r, r)
+        for trail, pos, _ in current:
+            screen.blit(trail, pos)
+        for r in rects:
+            if self._dim is not None:
+                screen.blit(self._dim, r, r)
+            screen.blit(self._layer, r, r)
+        self._meteor_rects = [r for _, _, r in current]
+        return rects
+
+
+menu_scene = MenuScene()
 
 # 工具
-def create_explosion(particles, x, y, size=1.0):
-    use_add = hasattr(particles, 'add')
-    for _ in range(int(30 * size)):
-        (particles.add if use_add else particles.append)(_get_particle(x, y, (255, 220, 100)))
-    for _ in range(int(20 * size)):
-        (particles.add if use_add else particles.append)(_get_particle(x, y, (255, 100, 50)))
-    for _ in range(int(10 * size)):
-        (particles.add if use_add else particles.append)(_get_particle(x, y, (150, 150, 150)))
-    for i in range(5):
-        radius = i * 15; alpha = 200 - i * 40
-        pygame.draw.circle(screen, (255, 200, 100, alpha), (x, y), radius, 2)
+def create_explosion(particles, x, y, size=1.0, palette="enemy"):
+    """在 (x, y) 播放一段预渲染爆炸动画（palette: enemy/grenade/boss/player；size 决定尺寸档）。
+    降档后同时播放的爆炸数有上限，超出的只播音效"""
+    cap = quality.settings.max_explosions
+    if cap is None or len(particles.explosions) < cap:
+        particles.explosions.spawn(x, y, size, palette)
     _play_explosion_sound()
 
 def spawn_floating_text(particles, x, y, text, color):
     try:
+        # 降档后同时显示的漂浮数字有上限：满了先回收最旧的，保证新伤害数字总能显示
+        cap = quality.settings.max_floating_texts
+        if cap is not None and hasattr(particles, 'add'):
+            while len(particles) >= cap:
+                oldest = next(iter(particles))
+                oldest.kill(); _recycle_float_text(oldest)
         ft = _get_float_text(x, y, text, color)
         if hasattr(particles, 'add'):
             particles.add(ft)
@@ -1512,20 +1793,22 @@ class SkillSelectMenu:
         self.selected = 0
 
     def draw(self):
-        overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 160))
-        screen.blit(overlay, (0, 0))
-        title = FONT_48.render("Choose a Skill", True, (255, 255, 255))
-        screen.blit(title, (WIDTH//2 - title.get_width()//2, HEIGHT//2 - 180))
+        """星空背景上的菜单：选中项变化时才重画，流星照常移动；返回变化区域"""
+        return menu_scene.draw("starfield", background_layer.starfield(), (type(self).__name__, self.selected), self._paint,
+                               dim=(0, 0, 0, 160), meteors=True)
+
+    def _paint(self, surf):
+        title = fonts.render(FONT_48, "Choose a Skill", (255, 255, 255))
+        surf.blit(title, (WIDTH//2 - title.get_width()//2, HEIGHT//2 - 180))
         for i, (name, _, desc) in enumerate(self.options):
             y = HEIGHT//2 - 60 + i*60
             color = (255, 255, 0) if i == self.selected else (220, 220, 220)
-            text = FONT_36.render(f"{i+1}. {name}", True, color)
-            screen.blit(text, (WIDTH//2 - 220, y))
-            d = FONT_24.render(desc, True, (200, 200, 200))
-            screen.blit(d, (WIDTH//2 - 220, y + 32))
-        hint = FONT_24.render("Press 1/2/3 or Enter to confirm", True, (200, 200, 200))
-        screen.blit(hint, (WIDTH//2 - hint.get_width()//2, HEIGHT//2 + 140))
+            text = fonts.render(FONT_36, f"{i+1}. {name}", color)
+            surf.blit(text, (WIDTH//2 - 220, y))
+            d = fonts.render(FONT_24, desc, (200, 200, 200))
+            surf.blit(d, (WIDTH//2 - 220, y + 32))
+        hint = fonts.render(FONT_24, "Press 1/2/3 or Enter to confirm", (200, 200, 200))
+        surf.blit(hint, (WIDTH//2 - hint.get_width()//2, HEIGHT//2 + 140))
 
     def handle_event(self, event):
         if event.type == pygame.KEYDOWN:
@@ -1549,20 +1832,22 @@ class ControlSelectMenu:
         self.selected = 0
 
     def draw(self):
-        overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 160))
-        screen.blit(overlay, (0, 0))
-        title = FONT_48.render("Choose Controls", True, (255, 255, 255))
-        screen.blit(title, (WIDTH//2 - title.get_width()//2, HEIGHT//2 - 180))
+        """星空背景上的菜单：选中项变化时才重画，流星照常移动；返回变化区域"""
+        return menu_scene.draw("starfield", background_layer.starfield(), (type(self).__name__, self.selected), self._paint,
+                               dim=(0, 0, 0, 160), meteors=True)
+
+    def _paint(self, surf):
+        title = fonts.render(FONT_48, "Choose Controls", (255, 255, 255))
+        surf.blit(title, (WIDTH//2 - title.get_width()//2, HEIGHT//2 - 180))
         for i, (name, _, desc) in enumerate(self.options):
             y = HEIGHT//2 - 60 + i*60
             color = (255, 255, 0) if i == self.selected else (220, 220, 220)
-            text = FONT_36.render(f"{i+1}. {name}", True, color)
-            screen.blit(text, (WIDTH//2 - 220, y))
-            d = FONT_24.render(desc, True, (200, 200, 200))
-            screen.blit(d, (WIDTH//2 - 220, y + 32))
-        hint = FONT_24.render("Press 1/2 or Enter to confirm", True, (200, 200, 200))
-        screen.blit(hint, (WIDTH//2 - hint.get_width()//2, HEIGHT//2 + 140))
+            text = fonts.render(FONT_36, f"{i+1}. {name}", color)
+            surf.blit(text, (WIDTH//2 - 220, y))
+            d = fonts.render(FONT_24, desc, (200, 200, 200))
+            surf.blit(d, (WIDTH//2 - 220, y + 32))
+        hint = fonts.render(FONT_24, "Press 1/2 or Enter to confirm", (200, 200, 200))
+        surf.blit(hint, (WIDTH//2 - hint.get_width()//2, HEIGHT//2 + 140))
 
     def handle_event(self, event):
         if event.type == pygame.KEYDOWN:
@@ -1578,10 +1863,35 @@ def show_victory_screen(player, rl_manager):
     """显示游戏胜利界面"""
     # 触发游戏完成成就
     achievement_system.update_progress("game_complete", 1)
-    
+    menu_scene.invalidate()
+
     font = FONT_48
     small_font = FONT_36
-    
+
+    def paint(surf):
+        # 胜利文本
+        victory_text = fonts.render(font, "CONGRATULATIONS!", (255, 215, 0))
+        surf.blit(victory_text, (WIDTH//2 - victory_text.get_width()//2, HEIGHT//2 - 150))
+
+        complete_text = fonts.render(small_font, "You have conquered all 15 floors!", (150, 255, 150))
+        surf.blit(complete_text, (WIDTH//2 - complete_text.get_width()//2, HEIGHT//2 - 100))
+
+        score_text = fonts.render(small_font, f"Final Score: {player.score}", (255, 255, 255))
+        surf.blit(score_text, (WIDTH//2 - score_text.get_width()//2, HEIGHT//2 - 50))
+
+        bosses_defeated = len([f for f in range(5, 16, 5) if f <= rl_manager.floor])
+        boss_text = fonts.render(small_font, f"Bosses Defeated: {bosses_defeated}/3", (255, 180, 255))
+        surf.blit(boss_text, (WIDTH//2 - boss_text.get_width()//2, HEIGHT//2))
+
+        bonuses = rl_manager.player_permanent_bonuses
+        bonus_text = fonts.render(small_font, f"Permanent Bonuses: +{bonuses['health_bonus']} HP, +{int(bonuses['damage_bonus']*100)}% DMG, +{bonuses['grenade_damage_bonus']} Grenade", (200, 200, 255))
+        surf.blit(bonus_text, (WIDTH//2 - bonus_text.get_width()//2, HEIGHT//2 + 50))
+
+        continue_text = fonts.render(small_font, "Press R to return to menu", (200, 200, 200))
+        surf.blit(continue_text, (WIDTH//2 - continue_text.get_width()//2, HEIGHT//2 + 100))
+
+    # 文字内容整屏期间不变：画一次，之后每帧只补画流星
+    key = ("victory", player.score, rl_manager.floor)
     while True:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
@@ -1590,42 +1900,728 @@ def show_victory_screen(player, rl_manager):
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_r:
                     return
-        
-        draw_background()
-        
-        # 胜利文本
-        victory_text = font.render("CONGRATULATIONS!", True, (255, 215, 0))
-        screen.blit(victory_text, (WIDTH//2 - victory_text.get_width()//2, HEIGHT//2 - 150))
-        
-        complete_text = small_font.render("You have conquered all 15 floors!", True, (150, 255, 150))
-        screen.blit(complete_text, (WIDTH//2 - complete_text.get_width()//2, HEIGHT//2 - 100))
-        
-        score_text = small_font.render(f"Final Score: {player.score}", True, (255, 255, 255))
-        screen.blit(score_text, (WIDTH//2 - score_text.get_width()//2, HEIGHT//2 - 50))
-        
-        bosses_defeated = len([f for f in range(5, 16, 5) if f <= rl_manager.floor])
-        boss_text = small_font.render(f"Bosses Defeated: {bosses_defeated}/3", True, (255, 180, 255))
-        screen.blit(boss_text, (WIDTH//2 - boss_text.get_width()//2, HEIGHT//2))
-        
-        bonuses = rl_manager.player_permanent_bonuses
-        bonus_text = small_font.render(f"Permanent Bonuses: +{bonuses['health_bonus']} HP, +{int(bonuses['damage_bonus']*100)}% DMG, +{bonuses['grenade_damage_bonus']} Grenade", True, (200, 200, 255))
-        screen.blit(bonus_text, (WIDTH//2 - bonus_text.get_width()//2, HEIGHT//2 + 50))
-        
-        continue_text = small_font.render("Press R to return to menu", True, (200, 200, 200))
-        screen.blit(continue_text, (WIDTH//2 - continue_text.get_width()//2, HEIGHT//2 + 100))
-        
-        pygame.display.flip()
+
+        present_frame(menu_scene.draw("starfield", background_layer.starfield(), key, paint, meteors=True), scene="menu")
         pygame.time.delay(30)
 
 
+# 单帧输入快照：主循环由键盘/鼠标事件生成，无头模拟与回放可直接构造
+class TickInput:
+    __slots__ = ("move_x", "move_y", "fire", "weapon", "skill")
+
+    def __init__(self, move_x=0, move_y=0, fire=False, weapon=None, skill=False):
+        self.move_x = move_x    # -1/0/1（A/D）
+        self.move_y = move_y    # -1/0/1（W/S）
+        self.fire = fire        # 本帧是否触发开火（空格/鼠标左键按下）
+        self.weapon = weapon    # 本帧切换到的武器索引（1/2/3 键），None 表示不切换
+        self.skill = skill      # 本帧是否按下 F
+
+    @classmethod
+    def from_keys(cls, keys):
+        inp = cls()
+        inp.set_move(keys)
+        return inp
+
+    def set_move(self, keys):
+        self.move_x = keys[pygame.K_d] - keys[pygame.K_a]
+        self.move_y = keys[pygame.K_s] - keys[pygame.K_w]
+
+    def consume_actions(self):
+        # 一次性动作只交给本渲染帧的第一个逻辑步，后续步只保留移动
+        self.fire = False; self.weapon = None; self.skill = False
+
+
+class GameSession:
+    """一局游戏的可模拟状态：step_session 推进一帧逻辑，draw_session 负责绘制"""
+    def __init__(self, difficulty="Normal", skill=None, fire_binding='space', load_saved_state=False, seed=None, recorder=None):
+        self.difficulty = difficulty
+        # 每局种子：相同种子 + 相同输入序列 => 完全相同的一局
+        self.seed = random.randrange(1 << 31) if seed is None else int(seed)
+        game_rng.seed(self.seed)
+        self.recorder = recorder  # replay.ReplayWriter 或 None
+        player = Player()
+        player.selected_skill = skill or 'rapid'
+        player.fire_binding = fire_binding or 'space'
+        self.player = player
+        # 子弹用 NumPy 结构数组存储（projectiles.ProjectileStore），不再是逐颗 Sprite
+        self.bullets = ProjectileStore(WIDTH, HEIGHT)
+        self.enemy_bullets = ProjectileStore(WIDTH, HEIGHT)
+        self.grenades = pygame.sprite.Group()
+        # 火花用 effects 流的 NumPy 随机源，爆发时整列取随机数
+        self.particles = ParticleGroup(game_rng.numpy("effects"))
+        self.powerups = pygame.sprite.Group()
+
+        self.walls = WallGroup()
+        for w in [
+            Wall(100, 200, 80, 20), Wall(300, 150, 20, 100), Wall(500, 250, 120, 20),
+            Wall(200, 400, 20, 80), Wall(600, 350, 80, 20), Wall(150, 500, 200, 20), Wall(450, 100, 20, 80)
+        ]:
+            self.walls.add(w)
+
+        self.enemies = pygame.sprite.Group()
+        for _ in range(5):
+            self.enemies.add(Enemy(self.walls))
+        # 敌人宽相网格：每帧敌人移动结束后重建，供手雷/子弹命中查询
+        self.enemy_grid = SpatialHash(ENEMY_GRID_CELL)
+        # 敌人运动状态的结构数组（enemy_swarm.EnemySwarm），逐帧整列推进
+        self.enemy_swarm = EnemySwarm(WIDTH, HEIGHT, ENEMY_BATCH_MIN)
+
+        self.boss = None; self.boss_explosions = []; self.boss_warning_timer = [0]; self.boss_spawned = False
+
+        self.game_over = False
+        self.powerup_timer = 0
+        self.shake_time = 0; self.shake_intensity = 0; self.shake_offset = (0, 0)
+        self.enemy_kills = 0
+        self.player_died_from_explosion = False
+        self.player_died_from_collision = False
+        self.ticks = 0
+        # 渲染插值：开启后每个逻辑步开始前记录实体上一步位置（无头模式无需）
+        self.interpolate = False
+
+        self.reward_menu = RewardMenu()
+        self.shop_menu = ShopMenu()
+        # 支持两种模式：
+        # 1) 传统 Easy/Normal/Hard（每房间自动增加风险）
+        # 2) Risk 模式（以固定 Risk 等级开始，不自动增加）
+        if isinstance(difficulty, dict) and difficulty.get('type') == 'risk':
+            rl = RoguelikeManager("Normal")
+            rl.risk = max(0, min(20, int(difficulty.get('value', 0))))
+            rl.risk_fixed = True
+            rl.apply_risk_modifiers()
+        else:
+            rl = RoguelikeManager(difficulty)
+        # 让 Roguelike 管理器可以在换房间时重定位玩家
+        rl.player = player
+        self.rl = rl
+
+        if load_saved_state:
+            self.load_saved_state()
+
+        # 初始房间生成
+        rl.start_room(self.enemies, self.walls, self.boss_warning_timer)
+
+    def load_saved_state(self):
+        saved = GameData.load_game_state()
+        if not saved:
+            return
+        player = self.player
+        p = saved.get("player", {})
+        player.x = p.get("x", player.x); player.y = p.get("y", player.y)
+        player.health = p.get("health", player.health)
+        player.shield = p.get("shield", player.shield)
+        player.weapon = p.get("weapon", player.weapon)
+        player.score = p.get("score", player.score)
+        player.attack_boost_active = p.get("attack_boost_active", False)
+        player.attack_boost_duration = p.get("attack_boost_duration", 0)
+        player.attack_boost_cooldown = p.get("attack_boost_cooldown", 0)
+        player.grenade_cooldown = p.get("grenade_cooldown", 0)
+        player.fire_binding = p.get("fire_binding", getattr(player, 'fire_binding', 'space'))
+        self.enemies.empty()
+        for ed in saved.get("enemies", []):
+            e = Enemy(self.walls)
+            e.x = ed.get("x", e.x)
+            e.y = ed.get("y", e.y)
+            e.health = ed.get("health", e.health)
+            e.rect.topleft = (e.x - e.radius, e.y - e.radius)
+            self.enemies.add(e)
+
+    @property
+    def paused_for_menu(self):
+        return self.reward_menu.visible or self.shop_menu.visible
+
+    def pick_reward(self, idx):
+        """奖励菜单选择；返回 'victory' 表示通关全部楼层，否则 None"""
+        # 检查是否刚刚击败了BOSS
+        was_boss_battle = (self.boss is None and self.boss_spawned)
+        handled, boss_bonus, end_of_floor = self.reward_menu.pick(idx, self.player, self.rl, was_boss_battle)
+        if not handled:
+            return None
+        if self.recorder:
+            self.recorder.reward_pick(idx)
+        if boss_bonus and not HEADLESS:
+            # 显示BOSS胜利奖励信息
+            print(f"BOSS defeated! Bonuses: +{boss_bonus['health']} HP, +{boss_bonus['damage']}% Damage, +{boss_bonus['grenade']} Grenade Damage, +{boss_bonus['speed']} Speed")
+        # 检查是否游戏胜利
+        if self.rl.is_final_floor() and self.rl.room > self.rl.rooms_per_floor:
+            return 'victory'
+        # 重置BOSS状态
+        if was_boss_battle:
+            self.boss_spawned = False
+        # 层结束则进入商店
+        if end_of_floor:
+            self.shop_menu.visible = True
+            self.shop_menu.build_options(self.player)
+        else:
+            self.rl.start_room(self.enemies, self.walls, self.boss_warning_timer)
+        return None
+
+    def buy_item(self, idx):
+        ok = self.shop_menu.buy(idx, self.player, self.rl)
+        if ok and self.recorder:
+            self.recorder.shop_buy(idx)
+        return ok
+
+    def leave_shop(self):
+        # 商店结束后开始下一房间/层（RewardMenu 已经 advance 过）
+        if self.recorder:
+            self.recorder.shop_leave()
+        self.shop_menu.visible = False
+        self.rl.start_room(self.enemies, self.walls, self.boss_warning_timer)
+
+
+def _bullet_blocked(walls, x, y, radius):
+    # 子弹包围盒压到的每面墙依次掷拦截概率（与逐颗子弹逐面墙判定的顺序一致）
+    r = pygame.Rect(x - radius, y - radius, radius*2, radius*2)
+    for w in walls:
+        if r.colliderect(w.rect) and w.block_bullet():
+            return True
+    return False
+
+
+def _death_rattle(s, enemy):
+    # 亡语；Bomber 返回连锁结算结果，连锁击杀也计入本局击杀数
+    try:
+        chain = enemy.on_death(s.player, s.particles, s.enemies)
+    except:
+        return
+    if chain:
+        s.enemy_kills += chain["kills"]
+
+
+def step_session(s, inp):
+    """推进一帧游戏逻辑（不绘制、不限帧）；返回本帧是否实际推进了模拟"""
+    player = s.player
+    bullets = s.bullets; enemy_bullets = s.enemy_bullets; grenades = s.grenades
+    particles = s.particles; powerups = s.powerups; walls = s.walls; enemies = s.enemies
+    rl = s.rl
+    if s.recorder:
+        s.recorder.tick(inp)
+
+    # 输入动作（与原事件处理顺序一致：切换武器/开火/技能）
+    if not s.game_over:
+        if inp.weapon is not None:
+            player.weapon = inp.weapon
+        if inp.fire:
+            player.shoot(bullets, grenades)
+        if inp.skill:
+            if player.activate_selected_skill(bullets):
+                particles.sparks.emit(player.x, player.y, quality.scaled(30), (255, 200, 100), ring=(255, 150, 50))
+                skill_activate_sound.play()
+
+    if s.game_over or s.paused_for_menu:
+        return False
+    s.ticks += 1
+    if s.interpolate:
+        snapshot_positions(s)
+    profiler.lap("input")
+
+    # BOSS出现警告
+    if s.boss_warning_timer[0] > 0:
+        s.boss_warning_timer[0] -= 1
+        if s.boss_warning_timer[0] <= 0 and not s.boss_spawned:
+            s.boss = Boss(rl); s.boss_spawned = True; boss_spawn_sound.play()
+
+    # BOSS逻辑
+    boss = s.boss
+    if boss:
+        boss.move()
+        if boss.update_explosion(player, walls):
+            s.boss_explosions.append(boss.create_explosion()); boss_roar_sound.play()
+        for ex in s.boss_explosions[:]:
+            ex["radius"] += 5
+            if not ex["damaged_player"]:
+                if math.hypot(player.x - ex["x"], player.y - ex["y"]) < ex["radius"] + player.radius:
+                    player.take_damage(ex["damage"]); ex["damaged_player"] = True
+                    spawn_floating_text(particles, player.x, player.y - player.radius - 8, ex["damage"], FLOAT_TEXT_COLOR_PLAYER)
+                    if player.health <= 0:
+                        s.game_over = True; s.player_died_from_explosion = True; create_explosion(particles, player.x, player.y, palette="player")
+            if ex["radius"] >= ex["max_radius"]:
+                s.boss_explosions.remove(ex)
+        if boss.collide_with_player(player) and boss.collision_cooldown <= 0:
+            boss.collision_damage(player)
+            spawn_floating_text(particles, player.x, player.y - player.radius - 8, (20 if boss.is_charging else 10), FLOAT_TEXT_COLOR_PLAYER)
+            if player.health <= 0:
+                s.game_over = True; s.player_died_from_collision = True; create_explosion(particles, player.x, player.y, palette="player")
+        else:
+            if boss.collision_cooldown > 0: boss.collision_cooldown -= 1
+    profiler.lap("boss")
+
+    # 玩家移动与技能
+    player.move_dir(inp.move_x, inp.move_y, walls)
+    player.update_skills()
+    profiler.lap("player")
+
+    # Roguelike 刷怪
+    rl.update_spawning(enemies, walls)
+
+    # 道具生成
+    s.powerup_timer += 1
+    if s.powerup_timer >= 600 and len(powerups) < 3:
+        powerups.add(PowerUp(game_rng.loot.randint(50, WIDTH-50), game_rng.loot.randint(100, HEIGHT-100)))
+        s.powerup_timer = 0
+    profiler.lap("spawning")
+
+    # 敌人移动/射击
+    s.player_died_from_collision = False
+    # 移动、冷却、冲锋推进整列完成；只有撞玩家/开火/冲锋起止的敌人按组内顺序逐个结算
+    swarm = s.enemy_swarm
+    members = enemies.sprites()
+    for i in swarm.advance(members, walls, player):
+        enemy = members[i]
+        col, player_died, enemy_died = swarm.resolve(i, player)
+        swarm.fire(i, enemy_bullets)
+        if enemy_died:
+            create_explosion(particles, enemy.x, enemy.y)
+            # 亡语
+            _death_rattle(s, enemy)
+            enemies.remove(enemy)
+            player.score += 10
+            player.add_gold(5)
+            spawn_floating_text(particles, enemy.x, enemy.y, "+5g", (255, 215, 0))
+            s.enemy_kills += 1
+            # 成就触发：击杀敌人
+            achievement_system.update_progress("kill_count", 1)
+            if game_rng.loot.random() < 0.2:
+                powerups.add(PowerUp(enemy.x, enemy.y))
+            continue
+        if player_died:
+            s.player_died_from_collision = True
+        elif col:
+            create_explosion(particles, enemy.x, enemy.y, palette="player")
+            spawn_floating_text(particles, player.x, player.y - player.radius - 8, 5, FLOAT_TEXT_COLOR_PLAYER)
+            s.shake_time = 5
+            s.shake_intensity = 3
+    swarm.flush()
+    if s.player_died_from_collision:
+        s.game_over = True
+        create_explosion(particles, player.x, player.y, palette="player")
+    # 本帧敌人位置已定：有子弹/手雷需要查询时重建网格（之后被击杀的敌人仍在格子里，查询结果需再确认仍在组内）
+    grid = s.enemy_grid; in_enemies = enemies.has_internal
+    if bullets or grenades:
+        grid.rebuild(enemies)
+    profiler.lap("enemies")
+
+    # 道具更新
+    for p in list(powerups):
+        if not p.update():
+            powerups.remove(p)
+        elif p.collide_with_player(player):
+            if p.type == "health": player.health = min(100, player.health + 20)
+            elif p.type == "shield": player.add_shield(20)
+            else: player.score += 50
+            powerup_sound.play(); powerups.remove(p)
+    profiler.lap("powerups")
+
+    # 手雷
+    for g in list(grenades):
+        if g.update():
+            create_explosion(particles, g.x, g.y, 1.5, "grenade")
+            nearby = [e for e in grid.query(g.x, g.y, g.explosion_radius) if in_enemies(e)]
+            all_entities = nearby + [player] + ([boss] if boss else [])
+            hit = g.check_explosion_collision(all_entities)
+            for e in hit:
+                if e in enemies:
+                    gd = player.get_grenade_damage(rl)  # 使用新的手雷伤害计算
+                    e.health -= gd; e.flash = 5
+                    spawn_floating_text(particles, e.x, e.y - e.radius - 8, gd, FLOAT_TEXT_COLOR_ENEMY)
+                    if e.health <= 0:
+                        enemies.remove(e); player.score += 15; s.enemy_kills += 1
+                        player.add_gold(5)
+                        spawn_floating_text(particles, e.x, e.y, "+5g", (255, 215, 0))
+                        # 亡语
+                        _death_rattle(s, e)
+                        # 成就触发：手雷击杀敌人
+                        achievement_system.update_progress("kill_count", 1)
+                        achievement_system.update_progress("weapon_kill", 1, weapon=2)  # 手雷是武器索引2
+                elif e is player:
+                    base_self_damage = player.get_grenade_damage(rl) // 2
+                    player.take_damage(base_self_damage)
+                    spawn_floating_text(particles, player.x, player.y - player.radius - 8, base_self_damage, FLOAT_TEXT_COLOR_PLAYER)
+                    if player.health <= 0:
+                        s.game_over = True; s.player_died_from_explosion = True; create_explosion(particles, player.x, player.y, palette="player")
+                elif boss and e is boss:
+                    gd = player.get_grenade_damage(rl)  # 使用新的手雷伤害计算
+                    if boss.take_damage(gd, "grenade"):
+                        if boss.health <= 0:
+                            create_explosion(particles, boss.x, boss.y, 2.0, "boss")
+                            player.score += 500; player.add_gold(30); boss = s.boss = None; s.boss_spawned = False
+                            # 成就触发：Boss击杀
+                            achievement_system.update_progress("boss_kill", 1)
+                        else:
+                            spawn_floating_text(particles, boss.x, boss.y - boss.radius - 10, gd, FLOAT_TEXT_COLOR_BOSS)
+            s.shake_time = 25; s.shake_intensity = 15
+    # 从组中移除已爆炸手雷（已由 update/kill 管理，这里确保干净）
+    for g in list(grenades):
+        if g.exploded and g in grenades:
+            grenades.remove(g)
+    profiler.lap("grenades")
+
+    # 子弹（玩家）：整列移动、出界剔除与粗筛，可能命中的子弹再按发射顺序逐个结算
+    if bullets:
+        bullets.step()
+        keep = ~bullets.offscreen()
+        near_wall = bullets.box_overlaps(walls.rects())
+        none = np.zeros(len(bullets), dtype=bool)
+        if not enemies:
+            near_enemy = none
+        elif len(bullets) < GRID_BATCH_MIN:
+            near_enemy = ~none  # 子弹不多时逐颗查网格比批量粗筛的固定开销更低
+        else:
+            near_enemy = grid.near_mask(bullets.x, bullets.y, bullets.radius)
+        near_boss = bullets.near_circle(boss.x, boss.y, boss.radius) if boss else none
+        bxs = bullets.x.tolist(); bys = bullets.y.tolist(); brs = bullets.radius.tolist()
+        for i in np.flatnonzero(keep & (near_wall | near_enemy | near_boss)).tolist():
+            bx = bxs[i]; by = bys[i]; br = brs[i]
+            if near_wall[i] and _bullet_blocked(walls, bx, by, br):
+                create_explosion(particles, bx, by); keep[i] = False
+                continue
+            if near_enemy[i]:
+                for e in grid.query(bx, by, br):
+                    if in_enemies(e) and math.hypot(bx - e.x, by - e.y) < br + e.radius:
+                        base_dmg = getattr(player, 'bullet_damage', 10)
+                        dmg = player.get_effective_damage(base_dmg, rl)
+                        e.health -= dmg
+                        spawn_floating_text(particles, e.x, e.y - e.radius - 8, dmg, FLOAT_TEXT_COLOR_ENEMY)
+                        if e.health <= 0:
+                            create_explosion(particles, e.x, e.y)
+                            keep[i] = False
+                            enemies.remove(e); player.score += 10; s.enemy_kills += 1
+                            player.add_gold(5)
+                            spawn_floating_text(particles, e.x, e.y, "+5g", (255, 215, 0))
+                            # 亡语
+                            _death_rattle(s, e)
+                            # 成就触发：子弹击杀敌人，根据武器类型记录
+                            achievement_system.update_progress("kill_count", 1)
+                            achievement_system.update_progress("weapon_kill", 1, weapon=player.weapon)
+                            if game_rng.loot.random() < 0.2:
+                                powerups.add(PowerUp(e.x, e.y))
+                        break
+            if boss and keep[i] and near_boss[i] and math.hypot(bx - boss.x, by - boss.y) < br + boss.radius:
+                base_dmg = getattr(player, 'bullet_damage', 10)
+                dmg = player.get_effective_damage(base_dmg, rl)
+                if boss.take_damage(dmg):
+                    if boss.health <= 0:
+                        create_explosion(particles, boss.x, boss.y, 2.0, "boss")
+                        player.score += 500; player.add_gold(30); boss = s.boss = None; s.boss_spawned = False
+                        # 成就触发：Boss击杀
+                        achievement_system.update_progress("boss_kill", 1)
+                    else:
+                        spawn_floating_text(particles, boss.x, boss.y - boss.radius - 10, dmg, FLOAT_TEXT_COLOR_BOSS)
+                keep[i] = False
+        bullets.keep(keep)
+    profiler.lap("bullets")
+
+    # 子弹（敌人）
+    if enemy_bullets:
+        enemy_bullets.step()
+        keep = ~enemy_bullets.offscreen()
+        near_wall = enemy_bullets.box_overlaps(walls.rects())
+        near_player = enemy_bullets.near_circle(player.x, player.y, player.radius)
+        bxs = enemy_bullets.x.tolist(); bys = enemy_bullets.y.tolist(); brs = enemy_bullets.radius.tolist()
+        for i in np.flatnonzero(keep & (near_wall | near_player)).tolist():
+            bx = bxs[i]; by = bys[i]; br = brs[i]
+            if near_wall[i] and _bullet_blocked(walls, bx, by, br):
+                create_explosion(particles, bx, by); keep[i] = False
+                continue
+            if near_player[i] and math.hypot(bx - player.x, by - player.y) < br + player.radius:
+                player.take_damage(10); create_explosion(particles, player.x, player.y, palette="player")
+                spawn_floating_text(particles, player.x, player.y - player.radius - 8, 10, FLOAT_TEXT_COLOR_PLAYER)
+                keep[i] = False
+                if player.health <= 0: s.game_over = True
+        enemy_bullets.keep(keep)
+    profiler.lap("enemy_bullets")
+
+    # 粒子
+    particles.update()
+    profiler.lap("particles")
+
+    # 房间通关：弹出奖励菜单
+    if rl.room_cleared(enemies, s.boss) and not s.reward_menu.visible:
+        s.reward_menu.visible = True
+        s.reward_menu.build_options(player)
+
+    # 震动
+    if s.shake_time > 0:
+        s.shake_offset = (game_rng.effects.randint(-s.shake_intensity, s.shake_intensity), game_rng.effects.randint(-s.shake_intensity, s.shake_intensity))
+        s.shake_time -= 1
+    else:
+        s.shake_offset = (0, 0); s.shake_intensity = 0
+    profiler.lap("sim_misc")
+    return True
+
+
+def _interpolated_entities(s):
+    yield s.player
+    if s.boss:
+        yield s.boss
+    for group in (s.enemies, s.grenades, s.particles):
+        yield from group
+
+
+def snapshot_positions(s):
+    for e in _interpolated_entities(s):
+        e.prev_x = e.x; e.prev_y = e.y
+    s.bullets.snapshot(); s.enemy_bullets.snapshot(); s.particles.sparks.snapshot()
+
+
+@contextmanager
+def interpolated_positions(s, alpha):
+    """绘制期间把实体位置临时替换为上一步与当前步之间的插值，退出时还原"""
+    saved = []
+    stores = []
+    if alpha < 1.0:
+        stores = [(store, store.lerp_positions(alpha)) for store in (s.bullets, s.enemy_bullets, s.particles.sparks)]
+        for e in _interpolated_entities(s):
+            px = getattr(e, 'prev_x', None)
+            if px is None:
+                continue
+            x = e.x; y = e.y
+            saved.append((e, x, y))
+            e.x = px + (x - px) * alpha
+            e.y = e.prev_y + (y - e.prev_y) * alpha
+    try:
+        yield
+    finally:
+        for e, x, y in saved:
+            e.x = x; e.y = y
+        for store, pos in stores:
+            store.restore_positions(pos)
+
+
+@contextmanager
+def camera_offset(s, offset):
+    """绘制世界期间把实体、子弹（含拖尾）、手雷拖尾、道具与 Boss 爆炸临时平移 offset，退出时还原。
+    屏幕震动因此只是绘制时的平移，不必把整帧拷进临时表面再贴回；HUD 与叠加层不受影响"""
+    dx, dy = offset
+    if not (dx or dy):
+        yield
+        return
+    saved = []
+    trails = []
+    explosions = []
+    stores = [(store, store.translate_positions(dx, dy))
+              for store in (s.bullets, s.enemy_bullets, s.particles.sparks, s.particles.explosions)]
+    for e in [*_interpolated_entities(s), *s.powerups]:
+        x = e.x; y = e.y
+        saved.append((e, x, y))
+        e.x = x + dx; e.y = y + dy
+    for g in s.grenades:
+        trails.append((g, g.trail))
+        g.trail = [(x + dx, y + dy) for x, y in g.trail]
+    for ex in s.boss_explosions:
+        explosions.append((ex, ex["x"], ex["y"]))
+        ex["x"] += dx; ex["y"] += dy
+    try:
+        yield
+    finally:
+        for e, x, y in saved:
+            e.x = x; e.y = y
+        for g, trail in trails:
+            g.trail = trail
+        for ex, x, y in explosions:
+            ex["x"] = x; ex["y"] = y
+        for store, pos in stores:
+            store.restore_positions(pos)
+
+
+def draw_frozen_world(s):
+    """奖励/商店界面背后的静止画面：画到 screen 上，并返回一份拷贝供 MenuScene 冻结"""
+    draw_background(s.walls)
+    for e in s.enemies: e.draw(s.player)
+    s.player.draw()
+    hud_layer.draw(screen, s, stats=False)
+    return screen.copy()
+
+
+def frozen_world_key(s, menu):
+    """冻结画面的内容键：换房间，或购买改变了血量/护盾等 HUD 输入时才重拍"""
+    return ("frozen", menu, s.walls, s.walls.version, hud_layer._inputs(s, False))
+
+
+def mark_session_dirty(s, region):
+    """把本帧会画东西的包围盒（保守估计）标到脏区域上"""
+    add = region.add
+    for trail, (x, y) in background_layer.meteors():
+        add(x, y, x + trail.get_width(), y + trail.get_height())
+    for e in s.enemies:
+        # 精灵（含外环）与身体下方的血条
+        pad = max(e.radius + ENEMY_PAD, 21); x = int(e.x); y = int(e.y)
+        add(x - pad - 1, y - pad - 1, x + pad + 2, y + max(pad, e.radius + 11) + 2)
+    for store in (s.bullets, s.enemy_bullets):
+        if store.n:
+            region.add_boxes(*store.bounds())
+    for g in s.grenades:
+        r = (g.explosion_radius // 2 if g.exploded else g.radius) + 2
+        xs = [pos[0] for pos in g.trail] + [g.x]; ys = [pos[1] for pos in g.trail] + [g.y, g.y - 10]
+        add(min(xs) - r, min(ys) - r, max(xs) + r + 1, max(ys) + r + 1)
+    player = s.player; r = player.radius + 12
+    add(player.x - r, player.y - r, player.x + r + 1, player.y + r + 1)
+    if s.particles.sparks.n:
+        region.add_boxes(*s.particles.sparks.bounds())
+    for box in s.particles.explosions.bounds():
+        add(*box)
+    for ft in s.particles:
+        surf = float_glyphs.compose(ft.text, ft.color)
+        hw = surf.get_width() // 2 + 2; hh = surf.get_height() // 2 + 2
+        add(ft.x - hw, ft.y - hh, ft.x + hw + 1, ft.y + hh + 1)
+    for pu in s.powerups:
+        r = pu.radius + 4
+        add(pu.x - r, pu.y - r - 5, pu.x + r + 1, pu.y + r + 6)
+    boss = s.boss
+    if boss:
+        # 精灵、头顶血条（宽 150）与名字
+        pad = max(boss.radius + BOSS_PAD, 100)
+        add(boss.x - pad, boss.y - boss.radius - 52, boss.x + pad + 1, boss.y + boss.radius + BOSS_PAD + 1)
+    for ex in s.boss_explosions:
+        r = ex["radius"] + 2
+        add(ex["x"] - r, ex["y"] - r, ex["x"] + r + 1, ex["y"] + r + 1)
+    for rect in hud_layer.changed_rects(s):
+        region.add_rect(rect)
+
+
+def prepare_dirty_frame(s):
+    """脏矩形模式下标记本帧区域，返回要恢复/重画/提交的矩形；本帧应整屏时返回 None"""
+    region = dirty_region
+    region.begin(("play", s.walls.version))   # 换房间（墙体重建）时整屏
+    if (s.shake_offset != (0, 0) or s.boss_warning_timer[0] > 0 or profiler.enabled
+            or achievement_system.has_notifications()):
+        region.mark_full()
+    mark_session_dirty(s, region)
+    return None if region.full_frame() else region.rects()
+
+
+def present_frame(rects=None, scene=None):
+    """把画好的一帧提交到窗口。
+
+    未开启脏矩形时总是 display.flip()。开启时：游戏画面由 prepare_dirty_frame 给出 rects；
+    菜单/结算等静止画面（scene="menu"）的 rects 是 MenuScene.draw 的返回值——菜单内容变了为 None
+    （整屏提交），否则只有流星补画的区域，冻结的画面什么都不用提交。"""
+    region = dirty_region
+    if not region.enabled:
+        pygame.display.flip()
+        return
+    if scene is not None:
+        region.begin(scene)
+        if region.full_frame():
+            rects = None
+    region.present(rects)
+
+
+def draw_session(s, rects=None):
+    """绘制整帧；rects 不为 None 时（脏矩形模式）背景只恢复这些区域，HUD 只贴与之相交的部分"""
+    # 游戏画面覆盖了屏幕，菜单下次打开要重新拍冻结画面
+    menu_scene.invalidate()
+    player = s.player; boss = s.boss
+    settings = quality.settings
+    # 屏幕震动是世界部分的镜头偏移
+    background_layer.draw(screen, s.walls, rects, s.shake_offset)
+    profiler.lap("draw_background")
+    profiler.lap("draw_walls")  # 墙已烘焙进背景，保留该阶段以保持剖析列不变
+    with camera_offset(s, s.shake_offset):
+        far = settings.detail_radius
+        if far is None:
+            for e in s.enemies: e.draw(player)
+        else:
+            # 降档：离玩家较远的敌人省掉瞳孔朝向与血条
+            px, py, far2 = player.x, player.y, far * far
+            for e in s.enemies: e.draw(player, (e.x - px) ** 2 + (e.y - py) ** 2 <= far2)
+        profiler.lap("draw_enemies")
+        s.bullets.draw(screen, sprite_cache, settings.trail)
+        s.enemy_bullets.draw(screen, sprite_cache)
+        profiler.lap("draw_bullets")
+        for g in s.grenades: g.draw(settings.trail)
+        profiler.lap("draw_grenades")
+        player.draw()
+        profiler.lap("draw_player")
+        s.particles.explosions.draw(screen, explosion_books)
+        s.particles.sparks.draw(screen, sprite_cache)
+        for ft in s.particles: ft.draw()
+        profiler.lap("draw_particles")
+        glow = int(abs(math.sin(pygame.time.get_ticks() / 200)) * 2)
+        for pu in s.powerups: pu.draw(glow)
+        profiler.lap("draw_powerups")
+        if boss: boss.draw()
+        for ex in s.boss_explosions:
+            pygame.draw.circle(screen, BOSS_EXPLOSION_COLOR, (ex["x"], ex["y"]), ex["radius"])
+            pygame.draw.circle(screen, (255, 100, 255, 150), (ex["x"], ex["y"]), ex["radius"], 5)
+        profiler.lap("draw_boss")
+    # 分数/金币/楼层/敌人数、血条、武器与底部面板走变化驱动的缓存层
+    hud_layer.draw(screen, s, rects=rects)
+
+    # 成就通知显示（位于 HUD 两条之间，不与之重叠）
+    if achievement_system.has_notifications():
+        ach_id = achievement_system.pop_notification()
+        if ach_id and ach_id in ACHIEVEMENTS:
+            ach_info = ACHIEVEMENTS[ach_id]
+            # 简单的通知文本（可以做成更华丽的弹窗）
+            notif_font = FONT_28
+            notif_text = fonts.render(notif_font, f"🎉 Achievement Unlocked: {ach_info['name']}", (255, 215, 0))
+            notif_bg = pygame.Surface((notif_text.get_width() + 20, notif_text.get_height() + 10), pygame.SRCALPHA)
+            pygame.draw.rect(notif_bg, (40, 40, 80, 200), notif_bg.get_rect(), border_radius=8)
+            pygame.draw.rect(notif_bg, (255, 215, 0, 150), notif_bg.get_rect(), 2, border_radius=8)
+            screen.blit(notif_bg, (WIDTH//2 - notif_bg.get_width()//2, 100))
+            screen.blit(notif_text, (WIDTH//2 - notif_text.get_width()//2, 105))
+    profiler.lap("hud")
+    if s.boss_warning_timer[0] > 0:
+        # 透明度逐帧变化：复用同一张渲染目标重填，而不是每帧新建
+        warning_surface = render_targets.scratch((WIDTH, HEIGHT), alpha=True, tag="boss_warning")
+        alpha = int(abs(math.sin(pygame.time.get_ticks() / 200)) * 200)
+        warning_surface.fill((255, 50, 50, alpha))
+        screen.blit(warning_surface, (0, 0))
+        warning_font = fonts.get(72)
+        wt = fonts.render(warning_font, "BOSS INCOMING!", (255, 255, 255))
+        screen.blit(wt, (WIDTH//2 - wt.get_width()//2, HEIGHT//2 - 50))
+    profiler.lap("overlays")
+
+
+def draw_game_over(s):
+    """结算画面：文字只在第一帧画一次，之后每帧只补画流星；返回变化区域"""
+    player = s.player
+    cause = ("Crushed by enemies" if s.player_died_from_collision else ("Blown up by grenade" if s.player_died_from_explosion else "Shot by enemies"))
+
+    def paint(surf):
+        death_text = fonts.render(FONT_36, "WASTED!", (255, 50, 50))
+        surf.blit(death_text, (WIDTH//2 - death_text.get_width()//2, HEIGHT//2 - 150))
+        surf.blit(fonts.render(FONT_36, cause, (200, 100, 100)), (WIDTH//2 - FONT_36.size(cause)[0]//2, HEIGHT//2 - 100))
+        surf.blit(fonts.render(FONT_36, "GAME OVER!", (255, 50, 50)), (WIDTH//2 - 100, HEIGHT//2 - 40))
+        surf.blit(fonts.render(FONT_36, f"Final Score: {player.score}", TEXT_COLOR), (WIDTH//2 - 120, HEIGHT//2))
+        surf.blit(fonts.render(FONT_36, f"Floor {s.rl.floor} - Room {s.rl.room}", TEXT_COLOR), (WIDTH//2 - 120, HEIGHT//2 + 40))
+        surf.blit(fonts.render(FONT_36, "Press R to return to menu", TEXT_COLOR), (WIDTH//2 - 180, HEIGHT//2 + 80))
+
+    key = ("game_over", cause, player.score, s.rl.floor, s.rl.room)
+    return menu_scene.draw("starfield", background_layer.starfield(), key, paint, meteors=True)
+
+
+def save_game_over_record(s):
+    player = s.player; difficulty = s.difficulty; rl = s.rl
+    # 保存分数、难度/风险与层数
+    diff_label = (difficulty if isinstance(difficulty, str) else (f"Risk {difficulty.get('value', 0)}" if isinstance(difficulty, dict) and difficulty.get('type')=='risk' else 'Normal'))
+    GameData.add_record(player.score, difficulty=diff_label, floor=rl.floor)
+    
+    # 触发成就系统更新
+    survival_time = s.ticks / SIM_TICK_RATE  # 秒（按逻辑帧计，不受掉帧影响）
+    achievement_system.update_progress("survival_time", survival_time)
+    achievement_system.update_progress("score", player.score)
+    achievement_system.update_progress("floor", rl.floor)
+    if isinstance(difficulty, dict) and difficulty.get('type') == 'risk':
+        achievement_system.update_progress("difficulty", difficulty.get('value', 0))
+    elif difficulty == "Hard":
+        achievement_system.update_progress("difficulty", 8)
+    elif difficulty == "Normal":
+        achievement_system.update_progress("difficulty", 5)
+    else:  # Easy
+        achievement_system.update_progress("difficulty", 3)
+
+
 def main(load_saved_state=False, difficulty="Normal"):
     prev_hkl = get_current_input_method()
     set_input_method_to_english()
     clock = pygame.time.Clock()
-    font = pygame.font.SysFont(None, 36)
-    small_font = pygame.font.SysFont(None, 24)
+    # 爆炸动画在进入对局前一次性生成，避免第一次爆炸时卡顿
+    explosion_books.preload()
+    # 屏幕上是开始菜单的画面，菜单缓存不能沿用上一局
+    menu_scene.invalidate()
 
-    player = Player()
     # 开局技能选择（仅首次进入）
     skill_menu = SkillSelectMenu()
     chosen = None
@@ -1636,10 +2632,7 @@ def main(load_saved_state=False, difficulty="Normal"):
             res = skill_menu.handle_event(event)
             if res is not None:
                 chosen = res
-        draw_background()
-        skill_menu.draw()
-        pygame.display.flip(); clock.tick(60)
-    player.selected_skill = chosen or 'rapid'
+        present_frame(skill_menu.draw(), scene="menu"); clock.tick(60)
     # 控制方式选择
     ctrl_menu = ControlSelectMenu()
     chosen_ctrl = None
@@ -1650,479 +2643,285 @@ def main(load_saved_state=False, difficulty="Normal"):
             res = ctrl_menu.handle_event(event)
             if res is not None:
                 chosen_ctrl = res
-        draw_background()
-        ctrl_menu.draw()
-        pygame.display.flip(); clock.tick(60)
-    player.fire_binding = chosen_ctrl or 'space'
-    bullets = pygame.sprite.Group()
-    enemy_bullets = pygame.sprite.Group()
-    grenades = pygame.sprite.Group()
-    particles = pygame.sprite.Group()
-    powerups = pygame.sprite.Group()
-
-    walls = pygame.sprite.Group()
-    for w in [
-        Wall(100, 200, 80, 20), Wall(300, 150, 20, 100), Wall(500, 250, 120, 20),
-        Wall(200, 400, 20, 80), Wall(600, 350, 80, 20), Wall(150, 500, 200, 20), Wall(450, 100, 20, 80)
-    ]:
-        walls.add(w)
-
-    enemies = pygame.sprite.Group()
-    for _ in range(5):
-        enemies.add(Enemy(walls))
-
-    boss = None; boss_explosions = []; boss_warning_timer = [0]; boss_spawned = False
-
-    game_over = False
-    record_saved = False
-    powerup_timer = 0
-    shake_time = 0; shake_intensity = 0; shake_offset = (0, 0)
-    enemy_kills = 0
-    player_died_from_explosion = False
-    player_died_from_collision = False
-    
+        present_frame(ctrl_menu.draw(), scene="menu"); clock.tick(60)
+
+    seed = os.environ.get("WARRIOR_SEED")
+    session = GameSession(difficulty, skill=chosen, fire_binding=chosen_ctrl, load_saved_state=load_saved_state,
+                          seed=(int(seed) if seed and seed.isdigit() else None))
+    session.interpolate = True
+    # 录像（WARRIOR_RECORD=目录 开启；读档继续的对局无法从种子复现，不录）
+    if os.environ.get("WARRIOR_RECORD") and not load_saved_state:
+        session.recorder = open_recorder(session, os.environ["WARRIOR_RECORD"])
+    player = session.player
+    reward_menu = session.reward_menu
+    shop_menu = session.shop_menu
     pause_menu = PauseMenu()
-    reward_menu = RewardMenu()
-    shop_menu = ShopMenu()
-    # 支持两种模式：
-    # 1) 传统 Easy/Normal/Hard（每房间自动增加风险）
-    # 2) Risk 模式（以固定 Risk 等级开始，不自动增加）
-    if isinstance(difficulty, dict) and difficulty.get('type') == 'risk':
-        rl = RoguelikeManager("Normal")
-        rl.risk = max(0, min(20, int(difficulty.get('value', 0))))
-        rl.risk_fixed = True
-        rl.apply_risk_modifiers()
-    else:
-        rl = RoguelikeManager(difficulty)
-    # 让 Roguelike 管理器可以在换房间时重定位玩家
-    rl.player = player
-
-    if load_saved_state:
-        saved = GameData.load_game_state()
-        if saved:
-            p = saved.get("player", {})
-            player.x = p.get("x", player.x); player.y = p.get("y", player.y)
-            player.health = p.get("health", player.health)
-            player.shield = p.get("shield", player.shield)
-            player.weapon = p.get("weapon", player.weapon)
-            player.score = p.get("score", player.score)
-            player.attack_boost_active = p.get("attack_boost_active", False)
-            player.attack_boost_duration = p.get("attack_boost_duration", 0)
-            player.attack_boost_cooldown = p.get("attack_boost_cooldown", 0)
-            player.grenade_cooldown = p.get("grenade_cooldown", 0)
-            player.fire_binding = p.get("fire_binding", getattr(player, 'fire_binding', 'space'))
-            enemies.empty()
-            for ed in saved.get("enemies", []):
-                e = Enemy(walls)
-                e.x = ed.get("x", e.x)
-                e.y = ed.get("y", e.y)
-                e.health = ed.get("health", e.health)
-                e.rect.topleft = (e.x - e.radius, e.y - e.radius)
-                enemies.add(e)
+    record_saved = False
+    timestep = FixedTimestep(SIM_TICK_RATE)
+    quality.reset()
+    # 跨渲染帧保留尚未被逻辑步消费的一次性动作（渲染快于逻辑时）
+    pending = TickInput()
 
     return_to_menu = False
-    # 初始房间生成
-    rl.start_room(enemies, walls, boss_warning_timer)
-    
-    # 添加游戏开始时间记录（用于生存时间成就）
-    game_start_time = pygame.time.get_ticks()
 
     while not return_to_menu:
-        keys = pygame.key.get_pressed()
-        for event in pygame.event.get():
+        profiler.begin_frame()
+        inp = pending
+        inp.set_move(pygame.key.get_pressed())
+        idle = pause_menu.visible or reward_menu.visible or shop_menu.visible or session.game_over
+        events = pygame.event.get() if window_focus.active or not idle else wait_events(BACKGROUND_WAIT_MS)
+        for event in events:
             if event.type == pygame.QUIT:
                 pygame.quit(); sys.exit()
+            if window_focus.update(event) and not idle:
+                # 切到后台时自动暂停（回到前台后点 Continue 继续）
+                pause_menu.visible = True; idle = True
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                profiler.toggle(); continue
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F4 and profiler.history:
+                print(f"帧剖析已导出: {dump_profile()}"); continue
             if pause_menu.visible:
-                if not pause_menu.handle_event(event, player, enemies, player.score):
+                if not pause_menu.handle_event(event, player, session.enemies, player.score):
                     return_to_menu = True
                 continue
             # 奖励菜单事件
             if reward_menu.visible:
-                # 检查是否刚刚击败了BOSS
-                was_boss_battle = (boss is None and boss_spawned)
-                handled, boss_bonus, end_of_floor = reward_menu.handle_event(event, player, rl, was_boss_battle)
-                if handled:
-                    # 选择完成，检查游戏状态
-                    if boss_bonus:
-                        # 显示BOSS胜利奖励信息
-                        print(f"BOSS defeated! Bonuses: +{boss_bonus['health']} HP, +{boss_bonus['damage']}% Damage, +{boss_bonus['grenade']} Grenade Damage, +{boss_bonus['speed']} Speed")
-                    
-                    # 检查是否游戏胜利
-                    if rl.is_final_floor() and rl.room > rl.rooms_per_floor:
+                if event.type == pygame.KEYDOWN and event.key in (pygame.K_1, pygame.K_2, pygame.K_3):
+                    if session.pick_reward(event.key - pygame.K_1) == 'victory':
                         # 游戏胜利！显示胜利界面
-                        show_victory_screen(player, rl)
+                        show_victory_screen(player, session.rl)
                         return_to_menu = True
-                        continue
-                    
-                    # 重置BOSS状态
-                    if was_boss_battle:
-                        boss_spawned = False
-                    # 层结束则进入商店
-                    if end_of_floor:
-                        shop_menu.visible = True
-                        shop_menu.build_options(player)
-                    else:
-                        rl.start_room(enemies, walls, boss_warning_timer)
                 continue
             # 商店事件
             if shop_menu.visible:
-                consumed, proceed_next = shop_menu.handle_event(event, player, rl)
-                if consumed:
-                    if proceed_next:
-                        # 商店结束后开始下一房间/层（RewardMenu 已经 advance 过）
-                        rl.start_room(enemies, walls, boss_warning_timer)
-                    continue
+                action = shop_menu.handle_event(event)
+                if action is not None:
+                    if action[0] == 'next':
+                        session.leave_shop()
+                        continue
+                    if session.buy_item(action[1]):
+                        continue
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_m:
                     pause_menu.visible = True
                 # 仅当绑定为空格时才响应空格射击
-                if event.key == pygame.K_SPACE and not game_over and getattr(player, 'fire_binding', 'space') == 'space':
-                    player.shoot(bullets, grenades)
-                if event.key == pygame.K_r and game_over:
-                    return_to_menu = True; game_over = False
-                if not game_over:
-                    if event.key == pygame.K_1: player.weapon = 0
-                    elif event.key == pygame.K_2: player.weapon = 1
-                    elif event.key == pygame.K_3: player.weapon = 2
-                    elif event.key == pygame.K_f:
-                        if player.activate_selected_skill(bullets):
-                            for _ in range(30): particles.add(Particle(player.x, player.y, (255, 200, 0)))
-                            skill_activate_sound.play()
+                if event.key == pygame.K_SPACE and getattr(player, 'fire_binding', 'space') == 'space':
+                    inp.fire = True
+                if event.key == pygame.K_r and session.game_over:
+                    return_to_menu = True; session.game_over = False
+                if event.key == pygame.K_1: inp.weapon = 0
+                elif event.key == pygame.K_2: inp.weapon = 1
+                elif event.key == pygame.K_3: inp.weapon = 2
+                elif event.key == pygame.K_f: inp.skill = True
             # 鼠标左键开火（仅当绑定为 mouse）
-            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and not game_over:
+            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                 if getattr(player, 'fire_binding', 'space') == 'mouse':
-                    player.shoot(bullets, grenades)
+                    inp.fire = True
 
         if return_to_menu:
+            if session.recorder:
+                session.recorder.close()
             restore_input_method(prev_hkl)
             return
 
+        # 非战斗界面：逻辑不推进，清空累加器避免返回战斗时集中补帧
         if pause_menu.visible:
-            pause_menu.draw(); pygame.display.flip(); continue
+            timestep.reset(); pending.consume_actions()
+            # 背后是打开暂停时拍下的最后一帧，遮罩只叠一次
+            present_frame(pause_menu.draw(), scene="menu"); clock.tick(60); continue
         if reward_menu.visible:
-            # 奖励选择时仅显示界面
-            draw_background()
-            for w in walls: w.draw()
-            for e in enemies: e.draw(player)
-            player.draw()
-            draw_health_bar(player, 150, 25, 200, 20)
-            draw_weapon_indicator(20, HEIGHT - 120, player.weapon)
-            draw_ui_panel(player)
-            reward_menu.draw()
-            pygame.display.flip(); clock.tick(60); continue
+            timestep.reset(); pending.consume_actions()
+            # 奖励选择时仅显示界面（冻结画面与菜单都只画一次）
+            present_frame(reward_menu.draw(session), scene="menu")
+            clock.tick(60); continue
         if shop_menu.visible:
-            # 商店开启时暂停战斗，仅显示商店界面
-            draw_background()
-            for w in walls: w.draw()
-            for e in enemies: e.draw(player)
-            player.draw()
-            draw_health_bar(player, 150, 25, 200, 20)
-            draw_weapon_indicator(20, HEIGHT - 120, player.weapon)
-            draw_ui_panel(player)
-            shop_menu.draw(player)
-            pygame.display.flip(); clock.tick(60); continue
+            timestep.reset(); pending.consume_actions()
+            # 商店开启时暂停战斗，仅显示商店界面（金币/购买状态变化才重画）
+            present_frame(shop_menu.draw(session), scene="menu")
+            clock.tick(60); continue
 
         # Game over
-        if game_over:
-            draw_background()
+        if session.game_over:
             if not record_saved:
-                # 保存分数、难度/风险与层数
-                diff_label = (difficulty if isinstance(difficulty, str) else (f"Risk {difficulty.get('value', 0)}" if isinstance(difficulty, dict) and difficulty.get('type')=='risk' else 'Normal'))
-                GameData.add_record(player.score, difficulty=diff_label, floor=rl.floor)
-                
-                # 触发成就系统更新
-                survival_time = (pygame.time.get_ticks() - game_start_time) / 1000  # 秒
-                achievement_system.update_progress("survival_time", survival_time)
-                achievement_system.update_progress("score", player.score)
-                achievement_system.update_progress("floor", rl.floor)
-                if isinstance(difficulty, dict) and difficulty.get('type') == 'risk':
-                    achievement_system.update_progress("difficulty", difficulty.get('value', 0))
-                elif difficulty == "Hard":
-                    achievement_system.update_progress("difficulty", 8)
-                elif difficulty == "Normal":
-                    achievement_system.update_progress("difficulty", 5)
-                else:  # Easy
-                    achievement_system.update_progress("difficulty", 3)
-                
+                save_game_over_record(session)
                 record_saved = True
                 # 游戏结束后恢复输入法（只需执行一次）
                 restore_input_method(prev_hkl)
-            death_text = FONT_36.render("WASTED!", True, (255, 50, 50))
-            screen.blit(death_text, (WIDTH//2 - death_text.get_width()//2, HEIGHT//2 - 150))
-            cause = ("Crushed by enemies" if player_died_from_collision else ("Blown up by grenade" if player_died_from_explosion else "Shot by enemies"))
-            screen.blit(FONT_36.render(cause, True, (200, 100, 100)), (WIDTH//2 - FONT_36.size(cause)[0]//2, HEIGHT//2 - 100))
-            screen.blit(FONT_36.render("GAME OVER!", True, (255, 50, 50)), (WIDTH//2 - 100, HEIGHT//2 - 40))
-            screen.blit(FONT_36.render(f"Final Score: {player.score}", True, TEXT_COLOR), (WIDTH//2 - 120, HEIGHT//2))
-            screen.blit(FONT_36.render(f"Floor {rl.floor} - Room {rl.room}", True, TEXT_COLOR), (WIDTH//2 - 120, HEIGHT//2 + 40))
-            screen.blit(FONT_36.render("Press R to return to menu", True, TEXT_COLOR), (WIDTH//2 - 180, HEIGHT//2 + 80))
-            pygame.display.flip(); clock.tick(60); continue
-
-        # BOSS出现警告
-        if boss_warning_timer[0] > 0:
-            boss_warning_timer[0] -= 1
-            if boss_warning_timer[0] <= 0 and not boss_spawned:
-                boss = Boss(rl); boss_spawned = True; boss_spawn_sound.play()
-
-        # BOSS逻辑
-        if boss:
-            boss.move()
-            if boss.update_explosion(player, walls):
-                boss_explosions.append(boss.create_explosion()); boss_roar_sound.play()
-            for ex in boss_explosions[:]:
-                ex["radius"] += 5
-                if not ex["damaged_player"]:
-                    if math.hypot(player.x - ex["x"], player.y - ex["y"]) < ex["radius"] + player.radius:
-                        player.take_damage(ex["damage"]); ex["damaged_player"] = True
-                        spawn_floating_text(particles, player.x, player.y - player.radius - 8, ex["damage"], FLOAT_TEXT_COLOR_PLAYER)
-                        if player.health <= 0:
-                            game_over = True; player_died_from_explosion = True; create_explosion(particles, player.x, player.y)
-                if ex["radius"] >= ex["max_radius"]:
-                    boss_explosions.remove(ex)
-            if boss.collide_with_player(player) and boss.collision_cooldown <= 0:
-                boss.collision_damage(player)
-                spawn_floating_text(particles, player.x, player.y - player.radius - 8, (20 if boss.is_charging else 10), FLOAT_TEXT_COLOR_PLAYER)
-                if player.health <= 0:
-                    game_over = True; player_died_from_collision = True; create_explosion(particles, player.x, player.y)
-            else:
-                if boss.collision_cooldown > 0: boss.collision_cooldown -= 1
-
-        # 玩家移动与技能
-        player.move(keys, walls)
-        player.update_skills()
-
-        # Roguelike 刷怪
-        rl.update_spawning(enemies, walls)
-
-        # 道具生成
-        powerup_timer += 1
-        if powerup_timer >= 600 and len(powerups) < 3:
-            powerups.add(PowerUp(random.randint(50, WIDTH-50), random.randint(100, HEIGHT-100)))
-            powerup_timer = 0
-
-        # 敌人移动/射击
-        player_died_from_collision = False
-        for enemy in list(enemies):
-            col, player_died, enemy_died = enemy.move(walls, player)
-            enemy.shoot_cooldown -= 1
-            enemy.shoot(enemy_bullets)
-            if enemy_died:
-                create_explosion(particles, enemy.x, enemy.y)
-                # 亡语
-                try:
-                    enemy.on_death(player, particles, enemies)
-                except:
-                    pass
-                enemies.remove(enemy)
-                player.score += 10
-                player.add_gold(5)
-                spawn_floating_text(particles, enemy.x, enemy.y, "+5g", (255, 215, 0))
-                enemy_kills += 1
-                # 成就触发：击杀敌人
-                achievement_system.update_progress("kill_count", 1)
-                if random.random() < 0.2:
-                    powerups.add(PowerUp(enemy.x, enemy.y))
-                continue
-            if player_died:
-                player_died_from_collision = True
-            elif col:
-                create_explosion(particles, enemy.x, enemy.y)
-                spawn_floating_text(particles, player.x, player.y - player.radius - 8, 5, FLOAT_TEXT_COLOR_PLAYER)
-                shake_time = 5
-                shake_intensity = 3
-        if player_died_from_collision:
-            game_over = True
-            create_explosion(particles, player.x, player.y)
-
-        # 道具更新
-        for p in list(powerups):
-            if not p.update():
-                powerups.remove(p)
-            elif p.collide_with_player(player):
-                if p.type == "health": player.health = min(100, player.health + 20)
-                elif p.type == "shield": player.add_shield(20)
-                else: player.score += 50
-                powerup_sound.play(); powerups.remove(p)
-
-        # 手雷
-        for g in list(grenades):
-            if g.update():
-                create_explosion(particles, g.x, g.y, 1.5)
-                all_entities = list(enemies) + [player] + ([boss] if boss else [])
-                hit = g.check_explosion_collision(all_entities)
-                for e in hit:
-                    if e in enemies:
-                        gd = player.get_grenade_damage(rl)  # 使用新的手雷伤害计算
-                        e.health -= gd; e.flash = 5
-                        spawn_floating_text(particles, e.x, e.y - e.radius - 8, gd, FLOAT_TEXT_COLOR_ENEMY)
-                        if e.health <= 0:
-                            enemies.remove(e); player.score += 15; enemy_kills += 1
-                            player.add_gold(5)
-                            spawn_floating_text(particles, e.x, e.y, "+5g", (255, 215, 0))
-                            # 亡语
-                            try:
-                                e.on_death(player, particles, enemies)
-                            except:
-                                pass
-                            # 成就触发：手雷击杀敌人
-                            achievement_system.update_progress("kill_count", 1)
-                            achievement_system.update_progress("weapon_kill", 1, weapon=2)  # 手雷是武器索引2
-                    elif e is player:
-                        base_self_damage = player.get_grenade_damage(rl) // 2
-                        player.take_damage(base_self_damage)
-                        spawn_floating_text(particles, player.x, player.y - player.radius - 8, base_self_damage, FLOAT_TEXT_COLOR_PLAYER)
-                        if player.health <= 0:
-                            game_over = True; player_died_from_explosion = True; create_explosion(particles, player.x, player.y)
-                    elif boss and e is boss:
-                        gd = player.get_grenade_damage(rl)  # 使用新的手雷伤害计算
-                        if boss.take_damage(gd, "grenade"):
-                            if boss.health <= 0:
-                                create_explosion(particles, boss.x, boss.y, 2.0)
-                                player.score += 500; player.add_gold(30); boss = None; boss_spawned = False
-                                # 成就触发：Boss击杀
-                                achievement_system.update_progress("boss_kill", 1)
-                            else:
-                                spawn_floating_text(particles, boss.x, boss.y - boss.radius - 10, gd, FLOAT_TEXT_COLOR_BOSS)
-                shake_time = 25; shake_intensity = 15
-        # 从组中移除已爆炸手雷（已由 update/kill 管理，这里确保干净）
-        for g in list(grenades):
-            if g.exploded and g in grenades:
-                grenades.remove(g)
-
-        # 子弹（玩家）
-        for b in list(bullets):
-            b.move()
-            if b.off_screen():
-                if b in bullets: bullets.remove(b)
-                continue
-            blocked = False
-            for w in walls:
-                if b.collide_with_wall(w) and w.block_bullet(b):
-                    create_explosion(particles, b.x, b.y); bullets.remove(b); blocked = True; break
-            if blocked: continue
-            for e in list(enemies):
-                if b.collide_with_enemy(e):
-                    base_dmg = getattr(player, 'bullet_damage', 10)
-                    dmg = player.get_effective_damage(base_dmg, rl)
-                    e.health -= dmg
-                    spawn_floating_text(particles, e.x, e.y - e.radius - 8, dmg, FLOAT_TEXT_COLOR_ENEMY)
-                    if e.health <= 0:
-                        create_explosion(particles, e.x, e.y)
-                        if b in bullets: bullets.remove(b)
-                        enemies.remove(e); player.score += 10; enemy_kills += 1
-                        player.add_gold(5)
-                        spawn_floating_text(particles, e.x, e.y, "+5g", (255, 215, 0))
-                        # 亡语
-                        try:
-                            e.on_death(player, particles, enemies)
-                        except:
-                            pass
-                        # 成就触发：子弹击杀敌人，根据武器类型记录
-                        achievement_system.update_progress("kill_count", 1)
-                        achievement_system.update_progress("weapon_kill", 1, weapon=player.weapon)
-                        if random.random() < 0.2:
-                            powerups.add(PowerUp(e.x, e.y))
-                    break
-            if boss and b in bullets and b.collide_with_enemy(boss):
-                base_dmg = getattr(player, 'bullet_damage', 10)
-                dmg = player.get_effective_damage(base_dmg, rl)
-                if boss.take_damage(dmg):
-                    if boss.health <= 0:
-                        create_explosion(particles, boss.x, boss.y, 2.0)
-                        player.score += 500; player.add_gold(30); boss = None; boss_spawned = False
-                        # 成就触发：Boss击杀
-                        achievement_system.update_progress("boss_kill", 1)
-                    else:
-                        spawn_floating_text(particles, boss.x, boss.y - boss.radius - 10, dmg, FLOAT_TEXT_COLOR_BOSS)
-                if b in bullets: bullets.remove(b)
+            present_frame(draw_game_over(session), scene="menu")
+            clock.tick(60); continue
+
+        profiler.lap("events")
+        # 固定步长推进逻辑：掉帧时一帧内补多步，渲染更快时部分帧不推进
+        for _ in range(timestep.advance(clock.get_time())):
+            step_session(session, inp)
+            inp.consume_actions()
+            if session.game_over or session.paused_for_menu:
+                break
 
-        # 子弹（敌人）
-        for b in list(enemy_bullets):
-            b.move()
-            if b.off_screen():
-                if b in enemy_bullets: enemy_bullets.remove(b)
-                continue
-            blocked = False
-            for w in walls:
-                if b.collide_with_wall(w) and w.block_bullet(b):
-                    create_explosion(particles, b.x, b.y); enemy_bullets.remove(b); blocked = True; break
-            if blocked: continue
-            if b.collide_with_player(player):
-                player.take_damage(10); create_explosion(particles, player.x, player.y)
-                spawn_floating_text(particles, player.x, player.y - player.radius - 8, 10, FLOAT_TEXT_COLOR_PLAYER)
-                if b in enemy_bullets: enemy_bullets.remove(b)
-                if player.health <= 0: game_over = True
+        # 绘制（位置按累加器余量插值）
+        with interpolated_positions(session, timestep.alpha):
+            rects = prepare_dirty_frame(session) if dirty_region.enabled else None
+            draw_session(session, rects)
+        if profiler.enabled:
+            sample_profile_counters(session)
+            profiler.draw(screen, FONT_24)
+            profiler.skip()
+        present_frame(rects)
+        profiler.lap("flip")
+        profiler.end_frame()
+        clock.tick(RENDER_FPS)
+        # 画质档位按不含帧率等待的工作耗时调整（菜单/暂停帧不计入）
+        quality.record(clock.get_rawtime())
+
+
+def sample_profile_counters(s):
+    profiler.sample(enemies=len(s.enemies), bullets=len(s.bullets), enemy_bullets=len(s.enemy_bullets),
+                    particles=len(s.particles.sparks), floating_texts=len(s.particles), explosions=len(s.particles.explosions),
+                    text_hits=fonts.hits, text_misses=fonts.misses,
+                    glyph_rasters=float_glyphs.rasterized, hud_redraws=hud_layer.redraws, quality=quality.level)
+
+
+def dump_profile(directory="."):
+    import datetime
+    stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    return profiler.dump_csv(os.path.join(directory, f"profile_{stamp}.csv"))
+
+
+def open_recorder(s, directory="replays"):
+    import datetime
+    if directory in ("1", "true"):
+        directory = "replays"
+    try:
+        os.makedirs(directory, exist_ok=True)
+        stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(directory, f"run_{stamp}_{s.seed}.wrr")
+        return ReplayWriter(path, {
+            "seed": s.seed, "difficulty": s.difficulty,
+            "skill": s.player.selected_skill, "fire_binding": s.player.fire_binding,
+            "tick_rate": SIM_TICK_RATE,
+        })
+    except Exception as e:
+        print(f"无法创建录像文件: {e}")
+        return None
 
-        # 粒子
-        particles.update()
 
-        # 房间通关：弹出奖励菜单
-        if rl.room_cleared(enemies, boss) and not reward_menu.visible:
-            reward_menu.visible = True
-            reward_menu.build_options(player)
+def play_replay(path, render=False):
+    """回放录像：按记录逐帧喂给 step_session；render=True 时以 60FPS 绘制，否则无头全速运行"""
+    reader = ReplayReader(path)
+    h = reader.header
+    prev_enabled = achievement_system.enabled
+    achievement_system.enabled = False
+    s = GameSession(h.get("difficulty", "Normal"), skill=h.get("skill"), fire_binding=h.get("fire_binding"), seed=h["seed"])
+    clock = pygame.time.Clock()
+    try:
+        for op, arg in reader:
+            if op == "tick":
+                step_session(s, TickInput(*arg))
+                if render:
+                    for event in pygame.event.get():
+                        if event.type == pygame.QUIT:
+                            return s
+                    if s.paused_for_menu:
+                        draw_frozen_world(s)
+                    else:
+                        draw_session(s)
+                    pygame.display.flip(); clock.tick(SIM_TICK_RATE)
+            elif op == "reward":
+                s.pick_reward(arg)
+            elif op == "buy":
+                s.buy_item(arg)
+            elif op == "leave":
+                s.leave_shop()
+    finally:
+        achievement_system.enabled = prev_enabled
+    return s
+
+
+# 无头模拟：默认自动驾驶策略（左右游走并持续开火），仅用于压测
+def autopilot_input(s):
+    player = s.player
+    target = min(s.enemies, key=lambda e: abs(e.x - player.x), default=None)
+    mx = 0
+    if target is not None and abs(target.x - player.x) > 4:
+        mx = 1 if target.x > player.x else -1
+    return TickInput(mx, 0, fire=True)
+
+
+def run_headless(ticks=3600, difficulty="Normal", skill='rapid', policy=None, session=None, seed=None, record_path=None,
+                 profile_path=None):
+    """无头运行若干模拟帧：不绘制、不限帧、不写存档/成就，返回运行统计"""
+    import time
+    policy = policy or autopilot_input
+    prev_enabled = achievement_system.enabled
+    achievement_system.enabled = False
+    s = session or GameSession(difficulty, skill=skill, seed=seed)
+    if record_path:
+        s.recorder = ReplayWriter(record_path, {
+            "seed": s.seed, "difficulty": s.difficulty,
+            "skill": s.player.selected_skill, "fire_binding": s.player.fire_binding,
+            "tick_rate": SIM_TICK_RATE,
+        })
+    simulated = 0
+    prev_profiling = profiler.enabled
+    if profile_path:
+        profiler.enabled = True; profiler.history.clear()
+    t0 = time.perf_counter()
+    try:
+        for _ in range(ticks):
+            if s.game_over:
+                break
+            # 菜单自动处理：奖励选第一项，商店直接离开
+            if s.reward_menu.visible:
+                if s.pick_reward(0) == 'victory':
+                    break
+                continue
+            if s.shop_menu.visible:
+                s.leave_shop()
+                continue
+            profiler.begin_frame()
+            if step_session(s, policy(s)):
+                simulated += 1
+            if profiler.enabled:
+                sample_profile_counters(s)
+                profiler.end_frame()
+    finally:
+        achievement_system.enabled = prev_enabled
+        if profile_path:
+            profiler.dump_csv(profile_path)
+            profiler.enabled = prev_profiling
+        if s.recorder:
+            s.recorder.close(); s.recorder = None
+    elapsed = time.perf_counter() - t0
+    return {
+        "seed": s.seed,
+        "ticks": simulated,
+        "seconds": elapsed,
+        "game_seconds": simulated / 60.0,
+        "speedup": (simulated / 60.0) / elapsed if elapsed > 0 else 0.0,
+        "floor": s.rl.floor, "room": s.rl.room,
+        "score": s.player.score, "kills": s.enemy_kills,
+        "game_over": s.game_over,
+    }
 
-        # 震动
-        if shake_time > 0:
-            shake_offset = (random.randint(-shake_intensity, shake_intensity), random.randint(-shake_intensity, shake_intensity))
-            shake_time -= 1
-        else:
-            shake_offset = (0, 0); shake_intensity = 0
-
-        # 绘制
-        draw_background()
-        for w in walls: w.draw()
-        for e in enemies: e.draw(player)
-        for b in bullets: b.draw()
-        for b in enemy_bullets: b.draw()
-        for g in grenades: g.draw()
-        player.draw()
-        for p in particles: p.draw()
-        for pu in powerups: pu.draw()
-        if boss: boss.draw()
-        for ex in boss_explosions:
-            pygame.draw.circle(screen, BOSS_EXPLOSION_COLOR, (ex["x"], ex["y"]), ex["radius"])
-            pygame.draw.circle(screen, (255, 100, 255, 150), (ex["x"], ex["y"]), ex["radius"], 5)
-        score_text = font.render(f"Score: {player.score}", True, TEXT_COLOR)
-        gold_text = font.render(f"Gold: {player.gold}", True, (255, 215, 0))
-        fr_text = font.render(f"Floor {rl.floor} - Room {rl.room}  (Risk {rl.risk}/20)", True, TEXT_COLOR)
-        screen.blit(score_text, (20, 25))
-        screen.blit(gold_text, (20, 55))
-        screen.blit(fr_text, (WIDTH - fr_text.get_width() - 20, 20))
-
-        # 成就通知显示
-        if achievement_system.has_notifications():
-            ach_id = achievement_system.pop_notification()
-            if ach_id and ach_id in ACHIEVEMENTS:
-                ach_info = ACHIEVEMENTS[ach_id]
-                # 简单的通知文本（可以做成更华丽的弹窗）
-                notif_font = pygame.font.SysFont(None, 28)
-                notif_text = notif_font.render(f"🎉 Achievement Unlocked: {ach_info['name']}", True, (255, 215, 0))
-                notif_bg = pygame.Surface((notif_text.get_width() + 20, notif_text.get_height() + 10), pygame.SRCALPHA)
-                pygame.draw.rect(notif_bg, (40, 40, 80, 200), notif_bg.get_rect(), border_radius=8)
-                pygame.draw.rect(notif_bg, (255, 215, 0, 150), notif_bg.get_rect(), 2, border_radius=8)
-                screen.blit(notif_bg, (WIDTH//2 - notif_bg.get_width()//2, 100))
-                screen.blit(notif_text, (WIDTH//2 - notif_text.get_width()//2, 105))
-        enemies_text = small_font.render(f"Enemies: {len(enemies)}/{rl.cap}", True, (200, 150, 150))
-        screen.blit(enemies_text, (WIDTH - enemies_text.get_width() - 20, 60))
-        draw_health_bar(player, 150, 25, 200, 20)
-        draw_weapon_indicator(20, HEIGHT - 120, player.weapon)
-        draw_ui_panel(player)
-        if boss_warning_timer[0] > 0:
-            warning_surface = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-            alpha = int(abs(math.sin(pygame.time.get_ticks() / 200)) * 200)
-            warning_surface.fill((255, 50, 50, alpha))
-            screen.blit(warning_surface, (0, 0))
-            warning_font = pygame.font.SysFont(None, 72)
-            wt = warning_font.render("BOSS INCOMING!", True, (255, 255, 255))
-            screen.blit(wt, (WIDTH//2 - wt.get_width()//2, HEIGHT//2 - 50))
-        if shake_offset != (0, 0):
-            tmp = pygame.Surface((WIDTH, HEIGHT))
-            tmp.blit(screen, (0, 0))
-            screen.blit(tmp, shake_offset)
-        if pause_menu.visible:
-            pause_menu.draw()
-        pygame.display.flip(); clock.tick(60)
 
 if __name__ == "__main__":
-    main()
-
-
+    if len(sys.argv) > 1:
+        import argparse
+        parser = argparse.ArgumentParser(description="Warrior Rimer headless simulation / replay")
+        parser.add_argument("--headless", action="store_true")
+        parser.add_argument("--ticks", type=int, default=3600)
+        parser.add_argument("--difficulty", default="Normal")
+        parser.add_argument("--seed", type=int, default=None)
+        parser.add_argument("--record", default=None, help="无头运行时写入录像文件")
+        parser.add_argument("--replay", default=None, help="回放录像文件（配合 --headless 则不绘制）")
+        parser.add_argument("--profile", default=None, help="无头运行时把分阶段帧耗时写入 CSV")
+        args = parser.parse_args()
+        if args.replay:
+            s = play_replay(args.replay, render=not HEADLESS)
+            print({"seed": s.seed, "ticks": s.ticks, "floor": s.rl.floor, "room": s.rl.room,
+                   "score": s.player.score, "kills": s.enemy_kills, "game_over": s.game_over})
+        else:
+            print(run_headless(args.ticks, args.difficulty, seed=args.seed, record_path=args.record,
+                               profile_path=args.profile))
+    else:
+        main()
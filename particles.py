@@ -0,0 +1,182 @@
+# particles.py - 爆炸/技能火花的 NumPy 粒子发射器
+#
+# 原来每个火花是一个 Particle 精灵：create_explosion 逐个创建 60 个（每个 4 次 random 调用），
+# 每帧逐个 update()、逐个画 1~2 个圆。这里把火花存成预分配的 NumPy 列
+# （位置、速度、大小、寿命、种类），一次爆发用一次整列随机数生成，移动/缩小/过期整列完成；
+# 绘制按 (种类, 半径) 从 SpriteCache 取预渲染的圆点，整批一次 blits 提交。
+#
+# 火花与原来一样不透明（原来的 RGBA 颜色画在不透明屏幕上，alpha 本来就被忽略）：
+# colorkey 精灵的贴图开销约为逐像素 alpha 精灵的一半，火花数量大时这是绘制的主要成本。
+import numpy as np
+
+MAX_SIZE = 6          # 火花初始半径上限（randint(2, 6)，之后只会变小）
+MAX_RING = 9          # 外环半径上限 int(1.5 * MAX_SIZE)
+
+
+class ParticleEmitter:
+    """一组火花。每种 (颜色, 外环颜色) 组合分配一个种类号；行号即发射顺序，过期时整体压缩保持先后。
+    带外环的种类外环半径为 max(1, int(1.5*半径))、线宽 1"""
+    def __init__(self, rng=None, capacity=1024):
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.n = 0
+        self.kinds = []
+        self._kind_ids = {}
+        self._table = np.empty(0, dtype=object)   # 外观编码 -> 精灵
+        self._table_owner = None
+        self._alloc(capacity)
+
+    def _alloc(self, capacity):
+        self.capacity = capacity
+        self._x = np.zeros(capacity); self._y = np.zeros(capacity)
+        self._vx = np.zeros(capacity); self._vy = np.zeros(capacity)
+        self._size = np.zeros(capacity)
+        self._life = np.zeros(capacity, dtype=np.int32)
+        self._kind = np.zeros(capacity, dtype=np.int16)
+        self._px = np.zeros(capacity); self._py = np.zeros(capacity)  # 渲染插值用的上一步位置
+
+    def _columns(self):
+        return (self._x, self._y, self._vx, self._vy, self._size, self._life, self._kind, self._px, self._py)
+
+    def _grow(self, need):
+        n = self.n
+        old = self._columns()
+        capacity = self.capacity
+        while capacity < need:
+            capacity *= 2
+        self._alloc(capacity)
+        for dst, src in zip(self._columns(), old):
+            dst[:n] = src[:n]
+
+    # 当前存活火花的数组视图
+    @property
+    def x(self): return self._x[:self.n]
+    @property
+    def y(self): return self._y[:self.n]
+    @property
+    def size(self): return self._size[:self.n]
+    @property
+    def life(self): return self._life[:self.n]
+
+    def __len__(self):
+        return self.n
+
+    def kind_id(self, color, ring=None):
+        key = (tuple(color), None if ring is None else tuple(ring))
+        kid = self._kind_ids.get(key)
+        if kid is None:
+            kid = self._kind_ids[key] = len(self.kinds)
+            self.kinds.append(key)
+        return kid
+
+    def emit(self, x, y, count, color, ring=None):
+        """在 (x, y) 爆发 count 个火花：半径 2~6、各轴速度 -3~3、寿命 20~40 帧（整列随机）"""
+        if count <= 0:
+            return
+        n = self.n
+        end = n + count
+        if end > self.capacity:
+            self._grow(end)
+        rng = self.rng
+        self._x[n:end] = x; self._y[n:end] = y
+        self._px[n:end] = x; self._py[n:end] = y
+        self._size[n:end] = rng.integers(2, MAX_SIZE + 1, count)
+        self._vx[n:end] = rng.uniform(-3, 3, count)
+        self._vy[n:end] = rng.uniform(-3, 3, count)
+        self._life[n:end] = rng.integers(20, 41, count)
+        self._kind[n:end] = self.kind_id(color, ring)
+        self.n = end
+
+    def empty(self):
+        self.n = 0
+
+    def update(self):
+        """整体移动一步、缩小 0.1、寿命减一，寿命耗尽的火花移除"""
+        n = self.n
+        if not n:
+            return
+        self._x[:n] += self._vx[:n]
+        self._y[:n] += self._vy[:n]
+        size = self._size[:n]
+        np.maximum(size - 0.1, 0.0, out=size)
+        life = self._life[:n]
+        life -= 1
+        self.keep(life > 0)
+
+    def keep(self, mask):
+        """只保留 mask 为 True 的行（保持原顺序）"""
+        n = self.n
+        k = int(np.count_nonzero(mask))
+        if k == n:
+            return
+        for a in self._columns():
+            a[:k] = a[:n][mask]
+        self.n = k
+
+    def snapshot(self):
+        n = self.n
+        self._px[:n] = self._x[:n]; self._py[:n] = self._y[:n]
+
+    def lerp_positions(self, alpha):
+        """把位置临时替换为上一步与当前步之间的插值，返回用于还原的原位置"""
+        n = self.n
+        saved = (self._x[:n].copy(), self._y[:n].copy())
+        px = self._px[:n]; py = self._py[:n]
+        self._x[:n] = px + (saved[0] - px) * alpha
+        self._y[:n] = py + (saved[1] - py) * alpha
+        return saved
+
+    def translate_positions(self, dx, dy):
+        """把位置临时平移 (dx, dy)（镜头偏移），返回用于还原的原位置"""
+        n = self.n
+        saved = (self._x[:n].copy(), self._y[:n].copy())
+        self._x[:n] += dx; self._y[:n] += dy
+        return saved
+
+    def restore_positions(self, saved):
+        x, y = saved
+        self._x[:len(x)] = x; self._y[:len(y)] = y
+
+    def _radii(self, size):
+        """各火花 (填充半径, 外环半径或 0)"""
+        has_ring = np.array([ring is not None for _, ring in self.kinds])[self._kind[:self.n]]
+        ring = np.where(has_ring, np.maximum(1, (size * 1.5).astype(np.int64)), 0)
+        return size.astype(np.int64), ring
+
+    def bounds(self, pad=2):
+        """每个火花（含外环）的包围盒 (x0, y0, x1, y1)，供脏矩形渲染标记"""
+        fill, ring = self._radii(self.size)
+        r = np.maximum(fill, ring) + pad
+        x = self.x; y = self.y
+        return x - r, y - r, x + r + 1, y + r + 1
+
+    def draw(self, surface, sprites):
+        """用 sprites（SpriteCache）里的预渲染圆点绘制，整批一次 blits 提交（按发射顺序叠放）"""
+        n = self.n
+        if not n:
+            return
+        if self._table_owner is not sprites:
+            self._table = np.empty(0, dtype=object)
+            self._table_owner = sprites
+        fill, ring = self._radii(self.size)
+        visible = (fill > 0) | (ring > 0)
+        # 一个整数编码一种外观：种类 × 填充半径 × 外环半径（外环按未取整的大小算，不能由填充半径推出）
+        codes = ((self._kind[:n] * (MAX_SIZE + 1) + fill) * (MAX_RING + 1) + ring)[visible]
+        if not len(codes):
+            return
+        table = self._table
+        if len(table) <= codes.max():
+            table = self._table = np.concatenate([table, np.full(codes.max() + 1 - len(table), None, dtype=object)])
+        for code in np.flatnonzero(np.bincount(codes)).tolist():
+            if table[code] is None:
+                table[code] = self._sprite(sprites, code)
+        # pygame.draw 对浮点坐标截断取整，astype(int) 同样向零截断
+        off = (np.maximum(fill, ring) + 1)[visible]
+        xs = (self.x.astype(np.int64)[visible] - off).tolist()
+        ys = (self.y.astype(np.int64)[visible] - off).tolist()
+        surface.blits(zip(table[codes].tolist(), zip(xs, ys)), doreturn=False)
+
+    def _sprite(self, sprites, code):
+        code, ring = divmod(code, MAX_RING + 1)
+        kind, size = divmod(code, MAX_SIZE + 1)
+        color, ring_color = self.kinds[kind]
+        return sprites.spark(color, size, None if ring_color is None else (ring_color, ring))
@@ -0,0 +1,140 @@
+# profiler.py - 分阶段帧耗时剖析
+#
+# 在主循环各阶段之间调用 lap(name)，把距上一次打点的时间记到该阶段；
+# 每帧结束时 end_frame() 把各阶段耗时与实体计数写入环形缓冲，可叠加显示为堆叠柱状图，
+# 也可导出 CSV。关闭时 lap/end_frame 只做一次属性判断，几乎无开销。
+import csv
+import time
+from collections import deque
+
+import pygame
+
+
+class FrameProfiler:
+    """按阶段累计单帧耗时（毫秒），保留最近 capacity 帧"""
+    def __init__(self, phases, counters=(), capacity=600, enabled=False):
+        self.phases = list(phases)
+        self.counters = list(counters)
+        self.enabled = enabled
+        self.history = deque(maxlen=capacity)
+        self.frame = 0
+        self._acc = dict.fromkeys(self.phases, 0.0)
+        self._counts = dict.fromkeys(self.counters, 0)
+        self._last = time.perf_counter()
+        self._frame_start = self._last
+        self._colors = {name: self._phase_color(i) for i, name in enumerate(self.phases)}
+        self._text_cache = None
+        self._text_frame = -1
+
+    def _phase_color(self, i):
+        c = pygame.Color(0)
+        c.hsva = ((i * 360.0 / max(1, len(self.phases)) * 7) % 360, 70, 95, 100)
+        return c
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self.begin_frame()
+        return self.enabled
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self._frame_start = self._last = now
+        for k in self._acc:
+            self._acc[k] = 0.0
+
+    def lap(self, name):
+        """把距上次打点的耗时记入阶段 name"""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self._acc[name] += (now - self._last) * 1000.0
+        self._last = now
+
+    def skip(self):
+        """丢弃距上次打点的时间（例如 clock.tick 的等待）"""
+        if self.enabled:
+            self._last = time.perf_counter()
+
+    def sample(self, **counts):
+        if self.enabled:
+            self._counts.update(counts)
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        phases = tuple(self._acc[k] for k in self.phases)
+        counts = tuple(self._counts[k] for k in self.counters)
+        self.history.append((self.frame, (now - self._frame_start) * 1000.0, phases, counts))
+        self.frame += 1
+        self._frame_start = self._last = now
+        for k in self._acc:
+            self._acc[k] = 0.0
+
+    def averages(self, frames=60):
+        """最近 frames 帧各阶段平均耗时 {name: ms}"""
+        rows = list(self.history)[-frames:]
+        if not rows:
+            return dict.fromkeys(self.phases, 0.0)
+        n = len(rows)
+        return {name: sum(r[2][i] for r in rows) / n for i, name in enumerate(self.phases)}
+
+    def dump_csv(self, path):
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(["frame", "frame_ms"] + self.phases + ["n_" + c for c in self.counters])
+            for frame, total, phases, counts in self.history:
+                w.writerow([frame, f"{total:.4f}"] + [f"{v:.4f}" for v in phases] + list(counts))
+        return path
+
+    def draw(self, surface, font, pos=None, frames=120, scale_ms=33.3, height=90):
+        """右下角叠加：最近 frames 帧的堆叠柱状图 + 平均耗时最高的几个阶段"""
+        if not self.history:
+            return
+        width = frames * 2
+        panel = pygame.Surface((width + 8, height + 124), pygame.SRCALPHA)
+        x0, y0 = pos or (surface.get_width() - panel.get_width() - 10, surface.get_height() - panel.get_height() - 90)
+        panel.fill((0, 0, 0, 170))
+        px_per_ms = height / scale_ms
+        rows = list(self.history)[-frames:]
+        for col, (_, _, phases, _) in enumerate(rows):
+            x = 4 + col * 2
+            y = 4 + height
+            for name, ms in zip(self.phases, phases):
+                h = ms * px_per_ms
+                if h < 0.5:
+                    continue
+                top = max(4, int(y - h))
+                pygame.draw.line(panel, self._colors[name], (x, y), (x, top), 2)
+                y = top
+                if y <= 4:
+                    break
+        # 60 FPS 参考线
+        ref_y = 4 + height - int(1000.0 / 60 * px_per_ms)
+        pygame.draw.line(panel, (255, 255, 255, 120), (4, ref_y), (width + 4, ref_y))
+        # 文字每 15 帧刷新一次，避免剖析器自身成为热点
+        if self._text_cache is None or self.frame - self._text_frame >= 15:
+            self._text_frame = self.frame
+            self._text_cache = self._render_text(font, rows)
+        for i, (surf, color) in enumerate(self._text_cache):
+            ty = height + 10 + i * 18
+            if color is not None:
+                pygame.draw.rect(panel, color, (4, ty + 4, 8, 8))
+            panel.blit(surf, (16, ty))
+        surface.blit(panel, (x0, y0))
+
+    def _render_text(self, font, rows):
+        n = len(rows)
+        avg_total = sum(r[1] for r in rows) / n
+        lines = [(font.render(f"frame {avg_total:.2f} ms", True, (255, 255, 255)), None)]
+        avg = self.averages(n)
+        for name in sorted(avg, key=avg.get, reverse=True)[:4]:
+            lines.append((font.render(f"{name} {avg[name]:.2f}", True, (230, 230, 230)), self._colors[name]))
+        if self.counters:
+            last = rows[-1][3]
+            # 计数名取各段首字母：enemy_bullets -> eb
+            text = "  ".join(f"{''.join(w[0] for w in k.split('_'))}:{v}" for k, v in zip(self.counters, last))
+            lines.append((font.render(text, True, (200, 200, 200)), None))
+        return lines
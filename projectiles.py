@@ -0,0 +1,209 @@
+# projectiles.py - 子弹的结构数组（SoA）存储
+#
+# 每颗子弹不再是一个 Sprite 对象，而是若干 NumPy 数组中的一行：
+#   x, y, vx, vy, radius, owner, color_id，以及每行 TRAIL 个槽位的环形拖尾。
+# 移动、拖尾、出界剔除、与墙/玩家的粗筛都是整列运算；命中后的结算（伤害、概率、粒子）
+# 仍由调用方按子弹发射顺序逐个处理，保证随机数消耗顺序与逐个对象处理时一致。
+import numpy as np
+
+from sprite_cache import PROJECTILE_PAD
+
+OWNER_PLAYER = 0
+OWNER_ENEMY = 1
+TRAIL = 5
+
+
+class ProjectileStore:
+    """一组子弹（玩家或敌人）。行号即发射顺序，删除时整体压缩保持先后"""
+    def __init__(self, width, height, capacity=256):
+        self.width = width
+        self.height = height
+        self.n = 0
+        self.palette = []
+        self._color_ids = {}
+        self._alloc(capacity)
+        self.head = 0  # 拖尾环形缓冲当前写入槽（所有子弹同步移动，共用一个写指针）
+
+    def _alloc(self, capacity):
+        self.capacity = capacity
+        self._x = np.zeros(capacity); self._y = np.zeros(capacity)
+        self._vx = np.zeros(capacity); self._vy = np.zeros(capacity)
+        self._radius = np.zeros(capacity, dtype=np.int32)
+        self._owner = np.zeros(capacity, dtype=np.int8)
+        self._color = np.zeros(capacity, dtype=np.int16)
+        self._tx = np.zeros((capacity, TRAIL)); self._ty = np.zeros((capacity, TRAIL))
+        self._tn = np.zeros(capacity, dtype=np.int8)
+        self._px = np.zeros(capacity); self._py = np.zeros(capacity)  # 渲染插值用的上一步位置
+
+    def _columns(self):
+        return (self._x, self._y, self._vx, self._vy, self._radius, self._owner, self._color,
+                self._tx, self._ty, self._tn, self._px, self._py)
+
+    def _grow(self):
+        n = self.n
+        old = self._columns()
+        self._alloc(self.capacity * 2)
+        for dst, src in zip(self._columns(), old):
+            dst[:n] = src[:n]
+
+    # 当前存活子弹的数组视图
+    @property
+    def x(self): return self._x[:self.n]
+    @property
+    def y(self): return self._y[:self.n]
+    @property
+    def vx(self): return self._vx[:self.n]
+    @property
+    def vy(self): return self._vy[:self.n]
+    @property
+    def radius(self): return self._radius[:self.n]
+    @property
+    def owner(self): return self._owner[:self.n]
+
+    def __len__(self):
+        return self.n
+
+    def color_id(self, color):
+        cid = self._color_ids.get(color)
+        if cid is None:
+            cid = self._color_ids[color] = len(self.palette)
+            self.palette.append(color)
+        return cid
+
+    def spawn(self, x, y, speed, color, owner, size=5, dx=None, dy=None):
+        """参数与旧 Bullet 构造一致：speed 为纵向速度，dx/dy 给出时按方向速度（霰弹锥形）"""
+        if self.n == self.capacity:
+            self._grow()
+        i = self.n
+        self._x[i] = x; self._y[i] = y
+        self._vx[i] = 0 if dx is None else dx
+        self._vy[i] = speed if dy is None else dy
+        self._radius[i] = size
+        self._owner[i] = OWNER_PLAYER if owner == "player" else OWNER_ENEMY
+        self._color[i] = self.color_id(color)
+        self._tn[i] = 0
+        self._px[i] = x; self._py[i] = y
+        self.n = i + 1
+        return i
+
+    def empty(self):
+        self.n = 0
+
+    def step(self):
+        """整体移动一步并把新位置写入拖尾"""
+        n = self.n
+        if not n:
+            return
+        self._x[:n] += self._vx[:n]
+        self._y[:n] += self._vy[:n]
+        self.head = (self.head + 1) % TRAIL
+        self._tx[:n, self.head] = self._x[:n]
+        self._ty[:n, self.head] = self._y[:n]
+        tn = self._tn[:n]
+        np.minimum(tn + 1, TRAIL, out=tn)
+
+    def offscreen(self, margin=20):
+        x = self.x; y = self.y
+        return (y < -margin) | (y > self.height + margin) | (x < -margin) | (x > self.width + margin)
+
+    def keep(self, mask):
+        """只保留 mask 为 True 的行（保持原顺序）"""
+        n = self.n
+        k = int(np.count_nonzero(mask))
+        if k == n:
+            return
+        for a in self._columns():
+            a[:k] = a[:n][mask]
+        self.n = k
+
+    def box_overlaps(self, rects):
+        """各子弹包围盒（按 pygame.Rect 的取整方式）是否与 rects（(W, 4) 的 x, y, w, h 数组）中任意一个相交"""
+        n = self.n
+        if not n or not len(rects):
+            return np.zeros(n, dtype=bool)
+        r = self.radius
+        bx = np.trunc(self.x - r).astype(np.int64)[:, None]
+        by = np.trunc(self.y - r).astype(np.int64)[:, None]
+        size = (2 * r)[:, None]
+        wx = rects[:, 0]; wy = rects[:, 1]
+        hit = (bx < wx + rects[:, 2]) & (bx + size > wx) & (by < wy + rects[:, 3]) & (by + size > wy)
+        return hit.any(axis=1)
+
+    def near_circle(self, cx, cy, cr, slack=1.0):
+        """粗筛：与圆 (cx, cy, cr) 可能相交的子弹（略放宽，精确判定交给调用方）"""
+        reach = self.radius + (cr + slack)
+        dx = self.x - cx; dy = self.y - cy
+        return dx * dx + dy * dy < reach * reach
+
+    def snapshot(self):
+        n = self.n
+        self._px[:n] = self._x[:n]; self._py[:n] = self._y[:n]
+
+    def lerp_positions(self, alpha):
+        """把位置临时替换为上一步与当前步之间的插值，返回用于还原的原位置（快照后新发射的子弹不受影响）"""
+        n = self.n
+        saved = (self._x[:n].copy(), self._y[:n].copy())
+        px = self._px[:n]; py = self._py[:n]
+        self._x[:n] = px + (saved[0] - px) * alpha
+        self._y[:n] = py + (saved[1] - py) * alpha
+        return saved
+
+    def translate_positions(self, dx, dy):
+        """把位置与拖尾临时平移 (dx, dy)（镜头偏移），返回用于还原的原位置与原拖尾"""
+        n = self.n
+        saved = (self._x[:n].copy(), self._y[:n].copy(), self._tx[:n].copy(), self._ty[:n].copy())
+        self._x[:n] += dx; self._y[:n] += dy
+        self._tx[:n] += dx; self._ty[:n] += dy
+        return saved
+
+    def restore_positions(self, saved):
+        x, y = saved[:2]
+        self._x[:len(x)] = x; self._y[:len(y)] = y
+        if len(saved) > 2:
+            tx, ty = saved[2:]
+            self._tx[:len(tx)] = tx; self._ty[:len(ty)] = ty
+
+    def bounds(self, pad=3):
+        """每颗子弹（含拖尾、光晕）的包围盒 (x0, y0, x1, y1)，供脏矩形渲染标记。
+        子弹匀速直线飞行，拖尾落在 tn 步前的位置与（插值绘制时）下一步位置之间"""
+        n = self.n
+        x = self._x[:n]; y = self._y[:n]; vx = self._vx[:n]; vy = self._vy[:n]
+        tn = self._tn[:n]
+        xa = x - vx * tn; xb = x + vx
+        ya = y - vy * tn; yb = y + vy
+        r = self._radius[:n] + pad
+        return (np.minimum(xa, xb) - r, np.minimum(ya, yb) - r,
+                np.maximum(xa, xb) + r + 1, np.maximum(ya, yb) + r + 1)
+
+    def draw(self, surface, sprites, trail=None):
+        """用 sprites（SpriteCache）里的预渲染子弹与拖尾圆点绘制，整批一次 blits 提交；
+        每颗子弹先画拖尾（新到旧）再画本体，顺序与逐个画圆时相同。trail 限制每颗最多画几个拖尾点"""
+        n = self.n
+        if not n:
+            return
+        palette = self.palette
+        bullet = sprites.bullet
+        pad = PROJECTILE_PAD
+        # pygame.draw 对浮点坐标截断取整，astype(int) 同样向零截断，位置与直接画圆一致
+        xs = self._x[:n].astype(np.int64).tolist(); ys = self._y[:n].astype(np.int64).tolist()
+        radii = self._radius[:n].tolist(); owners = self._owner[:n].tolist(); colors = self._color[:n].tolist()
+        tns = self._tn[:n].tolist()
+        slots = [(self.head - k) % TRAIL for k in range(TRAIL)]
+        txs = self._tx[:n][:, slots].astype(np.int64).tolist(); tys = self._ty[:n][:, slots].astype(np.int64).tolist()
+        blits = []
+        add = blits.append
+        for i in range(n):
+            r = radii[i]; color = palette[colors[i]]; c = r + pad
+            if owners[i] == OWNER_PLAYER:
+                tn = tns[i]
+                if tn:
+                    tx = txs[i]; ty = tys[i]
+                    stamps = sprites.bullet_trail(r, color, tn)
+                    if trail is not None and tn > trail:
+                        stamps = stamps[:trail]
+                    for k, (stamp, sc) in enumerate(stamps):
+                        add((stamp, (tx[k] - sc, ty[k] - sc)))
+                add((bullet(r, color, False), (xs[i] - c, ys[i] - c)))
+            else:
+                add((bullet(r, color, True), (xs[i] - c, ys[i] - c)))
+        surface.blits(blits, doreturn=False)
@@ -0,0 +1,81 @@
+# quality.py - 按实测帧耗时自动调整的画面质量档位
+#
+# Boss 死亡、几颗手雷连爆和 Bomber 连锁挤在同一秒时，爆炸、火花和漂浮数字会把单帧撑爆。
+# QualityGovernor 记录最近若干帧的实际工作耗时（不含帧率限制的等待），滚动平均超过预算就降一档，
+# 长时间明显低于预算再升一档。各档只调整纯装饰的负载：爆炸/火花数量、拖尾长度、漂浮数字密度、
+# 背景流星数、远处敌人的瞳孔与血条。这些都不参与逻辑，随机数只取自 game_rng 的 effects 流，
+# 所以档位怎么变都不影响对局结果与回放。
+from collections import deque, namedtuple
+
+# 一档的装饰负载上限；None 表示不限制（与原来相同）
+# meteors: 背景流星数；trail: 子弹/手雷拖尾最多画几个点；spark_scale: 技能火花数量倍率；
+# max_explosions: 同时播放的爆炸上限；max_floating_texts: 同时显示的漂浮数字上限（满了顶掉最旧的）；
+# detail_radius: 离玩家超过该距离的敌人不画瞳孔和血条
+QualityLevel = namedtuple("QualityLevel", "name meteors trail spark_scale max_explosions max_floating_texts detail_radius")
+
+LEVELS = (
+    QualityLevel("low", 0, 1, 0.25, 8, 12, 160),
+    QualityLevel("medium", 2, 2, 0.5, 16, 24, 260),
+    QualityLevel("high", 3, 3, 0.75, 32, 48, 400),
+    QualityLevel("full", 5, None, 1.0, None, None, None),
+)
+FULL = len(LEVELS) - 1
+
+
+class QualityGovernor:
+    """滚动平均帧耗时 vs 预算（毫秒）：满 window 帧后超过 budget*down 降一档，
+    低于 budget*up 且距上次变档至少 raise_after 帧升一档；变档后清空样本重新统计。
+    enabled=False 时档位固定（无头模拟、基准测试、WARRIOR_QUALITY=0..3）"""
+    def __init__(self, budget_ms=1000 / 60, window=20, down=0.9, up=0.5, raise_after=180, level=FULL, enabled=True):
+        self.budget_ms = budget_ms
+        self.window = window
+        self.down = down
+        self.up = up
+        self.raise_after = raise_after
+        self.enabled = enabled
+        self.changes = 0
+        self._samples = deque(maxlen=window)
+        self._since = 0
+        self.level = max(0, min(FULL, level))
+
+    @property
+    def settings(self):
+        return LEVELS[self.level]
+
+    @property
+    def average_ms(self):
+        return sum(self._samples) / len(self._samples) if self._samples else 0.0
+
+    def set_level(self, level):
+        self.level = max(0, min(FULL, level))
+        self.changes += 1
+        self._samples.clear()
+        self._since = 0
+
+    def reset(self):
+        """清空样本并回到最高档（新对局、从菜单返回时）；档位固定时保持原档位"""
+        self._samples.clear()
+        self._since = 0
+        if self.enabled and self.level != FULL:
+            self.set_level(FULL)
+
+    def record(self, frame_ms):
+        """记录一帧的工作耗时，档位变化时返回 True"""
+        if not self.enabled:
+            return False
+        self._samples.append(frame_ms)
+        self._since += 1
+        if len(self._samples) < self.window:
+            return False
+        avg = self.average_ms
+        if avg > self.budget_ms * self.down and self.level > 0:
+            self.set_level(self.level - 1)
+            return True
+        if avg < self.budget_ms * self.up and self.level < FULL and self._since >= self.raise_after:
+            self.set_level(self.level + 1)
+            return True
+        return False
+
+    def scaled(self, count):
+        """按当前档位缩放的火花数量（至少 1 个）"""
+        return max(1, int(count * self.settings.spark_scale))
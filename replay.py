@@ -0,0 +1,125 @@
+# replay.py - 录像：逐帧输入记录与流式回放
+#
+# 文件格式：
+#   MAGIC(4) | 头部长度 uint32 | 头部 JSON（种子、难度、技能、控制方式等）
+#   之后若干数据块：压缩长度 uint32 | zlib 压缩数据
+# 每条记录占 1 字节：0..143 为一帧输入（移动/开火/技能/切枪组合），
+# 200 起为菜单操作（奖励选择、商店购买、离开商店）。
+# 数据块由后台线程压缩写盘，录制一小时（约 21.6 万帧）内存与帧耗时都可忽略。
+import json
+import queue
+import struct
+import threading
+import zlib
+
+MAGIC = b"WRRP"
+# 2：随机数拆成按用途的多条流（game_utils.RngStreams），同一种子在版本 1 里的对局已无法复现
+VERSION = 2
+CHUNK_RECORDS = 4096  # 约 68 秒一块
+
+OP_REWARD_PICK = 200  # +idx
+OP_SHOP_BUY = 210     # +idx
+OP_SHOP_LEAVE = 220
+
+
+def encode_tick(move_x, move_y, fire, weapon, skill):
+    """把一帧输入压成 0..143 的单字节"""
+    w = 0 if weapon is None else weapon + 1
+    return ((((move_x + 1) * 3 + (move_y + 1)) * 2 + int(bool(fire))) * 2 + int(bool(skill))) * 4 + w
+
+
+def decode_tick(code):
+    """返回 (move_x, move_y, fire, weapon, skill)"""
+    w = code % 4; code //= 4
+    skill = bool(code % 2); code //= 2
+    fire = bool(code % 2); code //= 2
+    move_y = code % 3 - 1
+    move_x = code // 3 - 1
+    return move_x, move_y, fire, (None if w == 0 else w - 1), skill
+
+
+class ReplayWriter:
+    """逐帧记录输入；满一块后交给后台线程压缩并追加写入文件"""
+    def __init__(self, path, header):
+        self.path = path
+        self._buf = bytearray()
+        self._queue = queue.Queue()
+        self._file = open(path, "wb")
+        head = json.dumps(dict(header, version=VERSION)).encode("utf-8")
+        self._file.write(MAGIC + struct.pack("<I", len(head)) + head)
+        self._thread = threading.Thread(target=self._writer_loop, name="replay-writer", daemon=True)
+        self._thread.start()
+        self.records = 0
+
+    def _writer_loop(self):
+        while True:
+            chunk = self._queue.get()
+            if chunk is None:
+                break
+            try:
+                data = zlib.compress(chunk, 6)
+                self._file.write(struct.pack("<I", len(data)) + data)
+            except Exception as e:
+                print(f"录像写入失败: {e}")
+        self._file.close()
+
+    def _push(self, code):
+        self._buf.append(code)
+        self.records += 1
+        if len(self._buf) >= CHUNK_RECORDS:
+            self._queue.put(bytes(self._buf))
+            self._buf = bytearray()
+
+    def tick(self, inp):
+        self._push(encode_tick(inp.move_x, inp.move_y, inp.fire, inp.weapon, inp.skill))
+
+    def reward_pick(self, idx):
+        self._push(OP_REWARD_PICK + idx)
+
+    def shop_buy(self, idx):
+        self._push(OP_SHOP_BUY + idx)
+
+    def shop_leave(self):
+        self._push(OP_SHOP_LEAVE)
+
+    def close(self):
+        if self._thread is None:
+            return
+        if self._buf:
+            self._queue.put(bytes(self._buf))
+            self._buf = bytearray()
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+
+class ReplayReader:
+    """按块流式读取录像；迭代得到 ('tick', (mx, my, fire, weapon, skill)) / ('reward', idx) / ('buy', idx) / ('leave', None)"""
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(4) != MAGIC:
+                raise ValueError(f"不是有效的录像文件: {path}")
+            (n,) = struct.unpack("<I", f.read(4))
+            self.header = json.loads(f.read(n).decode("utf-8"))
+            if self.header.get("version") != VERSION:
+                raise ValueError(f"录像版本 {self.header.get('version')} 与当前版本 {VERSION} 不兼容: {path}")
+            self._data_offset = f.tell()
+
+    def __iter__(self):
+        with open(self.path, "rb") as f:
+            f.seek(self._data_offset)
+            while True:
+                raw = f.read(4)
+                if len(raw) < 4:
+                    return
+                (n,) = struct.unpack("<I", raw)
+                for code in zlib.decompress(f.read(n)):
+                    if code < OP_REWARD_PICK:
+                        yield "tick", decode_tick(code)
+                    elif code < OP_SHOP_BUY:
+                        yield "reward", code - OP_REWARD_PICK
+                    elif code < OP_SHOP_LEAVE:
+                        yield "buy", code - OP_SHOP_BUY
+                    else:
+                        yield "leave", None
@@ -0,0 +1,276 @@
+# sprite_cache.py - 敌人/Boss/子弹/手雷/道具/背景流星的预渲染精灵缓存
+#
+# 敌人、Boss 每帧用十几次 pygame.draw 画同样的圆、眼睛、角和血条。这里把每种外观
+# （颜色档位 × 瞳孔朝向、Bomber 标记环、Charger 充能闪烁、Boss 出场脉冲/受击闪白）
+# 第一次用到时画进一张 colorkey 表面并 convert，之后每个敌人每帧只需一次 blit，
+# 血条再用一次带 area 的 blit 从缓存好的整条里切出对应长度。
+#
+# pygame.draw 对浮点坐标按截断取整，所以把整数中心画好后贴到 (int(x) - pad, int(y) - pad)
+# 与直接在屏幕上画完全一致；只有瞳孔改为 PUPIL_DIRECTIONS 个朝向档位的近似。
+#
+# 子弹、手雷、道具与拖尾圆点也在这里：原来它们用带 alpha 的颜色直接画在不透明的屏幕上，
+# alpha 被忽略。半透明部分（敌人子弹光晕、拖尾、道具光圈）改用逐像素 alpha 的 RLE 表面，
+# 贴图时才真正混合。
+import math
+
+import pygame
+
+COLORKEY = (1, 1, 1)      # 精灵里不会出现的颜色，作透明色
+PUPIL_DIRECTIONS = 8
+COLOR_STEP = 8            # 普通敌人随机颜色按 8 级一档归并，限制缓存数量
+ENEMY_PAD = 8             # 敌人精灵在半径外留出的边距（容纳 Bomber/Charger 外环）
+BOSS_PAD = 16             # Boss 精灵边距（容纳出场脉冲与头顶的角）
+METEOR_PAD = 4            # 流星拖尾精灵边距（最大圆点半径 3）
+PROJECTILE_PAD = 3        # 子弹精灵边距（敌人子弹光晕比本体大 2）
+GRENADE_PAD = 4           # 手雷精灵边距（引信在中心上方 10 像素处）
+POWERUP_PAD = 4           # 道具精灵边距（光圈最多比本体大 2）
+METEOR_LENGTH = 10        # 拖尾圆点数：第 j 个在头部左上方 (3j, 1.5j) 处
+# 流星头部在拖尾精灵内的坐标
+METEOR_ORIGIN = (3 * (METEOR_LENGTH - 1) + METEOR_PAD, int(1.5 * (METEOR_LENGTH - 1)) + 1 + METEOR_PAD)
+
+
+def color_bucket(color):
+    return tuple(min(255, c // COLOR_STEP * COLOR_STEP + COLOR_STEP // 2) for c in color)
+
+
+class SpriteCache:
+    """按外观键缓存预渲染表面；需要在 display 初始化之后使用（convert）"""
+    def __init__(self):
+        self._surfaces = {}
+
+    def __len__(self):
+        return len(self._surfaces)
+
+    def clear(self):
+        self._surfaces.clear()
+
+    def _canvas(self, size):
+        surf = pygame.Surface(size)
+        surf.fill(COLORKEY)
+        return surf
+
+    def _finish(self, surf):
+        surf.set_colorkey(COLORKEY, pygame.RLEACCEL)
+        return surf.convert()
+
+    def _alpha_canvas(self, size):
+        return pygame.Surface(size, pygame.SRCALPHA)
+
+    def _finish_alpha(self, surf):
+        surf = surf.convert_alpha()
+        # 逐像素 alpha 表面同样可以 RLE，透明与不透明的连续像素贴图时成段跳过/拷贝
+        surf.set_alpha(255, pygame.RLEACCEL)
+        return surf
+
+    def _get(self, key, build, *args):
+        # 命中时只做一次字典查找；未命中才调用 build(*args) 绘制
+        surf = self._surfaces.get(key)
+        if surf is None:
+            surf = self._surfaces[key] = build(*args)
+        return surf
+
+    # ---- 敌人 ----
+    def enemy(self, radius, color, ang, ring=None):
+        """普通敌人/Bomber：身体 + 眼睛 + 朝向 ang 的瞳孔（+ 标记环 ring=(颜色, 半径增量, 线宽)）；
+        ang 为 None 时不画瞳孔（画质降档时的远处敌人）"""
+        direction = None if ang is None else int(round(ang * (PUPIL_DIRECTIONS / (2 * math.pi)))) % PUPIL_DIRECTIONS
+        # 原始颜色先映射到颜色档位，只按档位建键：同一档位的敌人共用一张表面，缓存不随随机颜色增长
+        bucket = color_bucket(color)
+        return self._get(("enemy", radius, bucket, direction, ring), self._build_enemy, radius, bucket, direction, ring)
+
+    def _build_enemy(self, radius, color, direction, ring):
+        c = radius + ENEMY_PAD
+        surf = self._canvas((2 * c, 2 * c))
+        pygame.draw.circle(surf, color, (c, c), radius)
+        eye_offset = 6
+        pygame.draw.circle(surf, (255, 255, 255), (c - eye_offset, c - 5), 5)
+        pygame.draw.circle(surf, (255, 255, 255), (c + eye_offset, c - 5), 5)
+        if direction is not None:
+            ang = direction * 2 * math.pi / PUPIL_DIRECTIONS
+            px = int(round(2 * math.cos(ang))); py = int(round(2 * math.sin(ang)))
+            pygame.draw.circle(surf, (0, 0, 0), (c - eye_offset + px, c - 5 + py), 2)
+            pygame.draw.circle(surf, (0, 0, 0), (c + eye_offset + px, c - 5 + py), 2)
+        if ring:
+            ring_color, extra, width = ring
+            pygame.draw.circle(surf, ring_color, (c, c), radius + extra, width)
+        return self._finish(surf)
+
+    # ---- 背景流星 ----
+    def meteor_trail(self, color, half):
+        """流星拖尾；half 表示头部 y 坐标小数部分 >= 0.5（决定 1.5j 偏移的取整）。
+        头部取整坐标为 (hx, hy) 时贴到 (hx - METEOR_ORIGIN[0], hy - METEOR_ORIGIN[1])"""
+        return self._get(("meteor", color, half), self._build_meteor, color, half)
+
+    def _build_meteor(self, color, half):
+        ox, oy = METEOR_ORIGIN
+        surf = self._canvas((ox + METEOR_PAD, oy + METEOR_PAD))
+        for j in range(METEOR_LENGTH):
+            size = max(1, int(3 - j * 0.3))
+            pygame.draw.circle(surf, color, (ox - j * 3, oy + math.floor(0.5 * half - 1.5 * j)), size)
+        return self._finish(surf)
+
+    def charger(self, radius, color, ring_color):
+        """Charger：纯色身体 + 提示环（充能闪烁时由调用方换颜色）"""
+        return self._get(("charger", radius, color, ring_color), self._build_charger, radius, color, ring_color)
+
+    def _build_charger(self, radius, color, ring_color):
+        c = radius + ENEMY_PAD
+        surf = self._canvas((2 * c, 2 * c))
+        pygame.draw.circle(surf, color, (c, c), radius)
+        pygame.draw.circle(surf, ring_color, (c, c), radius + 6, 2)
+        return self._finish(surf)
+
+    # ---- 子弹与拖尾 ----
+    def bullet(self, radius, color, enemy):
+        """子弹本体；中心为 (radius + PROJECTILE_PAD, radius + PROJECTILE_PAD)。
+        玩家子弹：实心 + 左上白色高光；敌人子弹：半透明光晕 + 实心 + 浅色内芯"""
+        return self._get(("bullet", radius, color, enemy), self._build_bullet, radius, color, enemy)
+
+    def _build_bullet(self, radius, color, enemy):
+        c = radius + PROJECTILE_PAD
+        if not enemy:
+            surf = self._canvas((2 * c, 2 * c))
+            pygame.draw.circle(surf, color, (c, c), radius)
+            pygame.draw.circle(surf, (255, 255, 255), (c - 2, c - 2), max(1, radius // 2))
+            return self._finish(surf)
+        surf = self._alpha_canvas((2 * c, 2 * c))
+        pygame.draw.circle(surf, (255, 100, 100, 150), (c, c), radius + 2)
+        pygame.draw.circle(surf, color, (c, c), radius)
+        pygame.draw.circle(surf, (255, 150, 150), (c, c), max(1, radius // 2))
+        return self._finish_alpha(surf)
+
+    def stamp(self, color, size, alpha):
+        """半径 size、不透明度 alpha 的圆点（拖尾用）；中心为 (size + 1, size + 1)"""
+        return self._get(("stamp", color, size, alpha), self._build_stamp, color, size, alpha)
+
+    def _build_stamp(self, color, size, alpha):
+        c = size + 1
+        surf = self._alpha_canvas((2 * c, 2 * c))
+        pygame.draw.circle(surf, (*color, alpha), (c, c), size)
+        return self._finish_alpha(surf)
+
+    def spark(self, color, size, ring=None):
+        """火花圆点（ring=(颜色, 半径) 时外面再画一圈 1 像素外环）；中心为 (max(size, 外环半径) + 1,) * 2"""
+        return self._get(("spark", color, size, ring), self._build_spark, color, size, ring)
+
+    def _build_spark(self, color, size, ring):
+        c = max(size, ring[1] if ring else 0) + 1
+        surf = self._canvas((2 * c, 2 * c))
+        if size > 0:
+            pygame.draw.circle(surf, color, (c, c), size)
+        if ring:
+            pygame.draw.circle(surf, ring[0], (c, c), ring[1], 1)
+        return self._finish(surf)
+
+    def bullet_trail(self, radius, color, length):
+        """长度为 length 的子弹拖尾：第 k 个点（k=0 最新）的 (圆点, 中心偏移)，越旧越小越淡"""
+        key = ("bullet_trail", radius, color, length)
+        trail = self._surfaces.get(key)
+        if trail is None:
+            trail = []
+            for k in range(length):
+                size = max(1, int(radius * (1 - k / length)))
+                trail.append((self.stamp(color, size, max(0, 200 - k * 40)), size + 1))
+            trail = self._surfaces[key] = tuple(trail)
+        return trail
+
+    # ---- 手雷 ----
+    def grenade(self, radius, color):
+        """飞行中的手雷（color 为外壳颜色，闪烁提示时由调用方换色）；中心为 (radius + GRENADE_PAD,) * 2"""
+        return self._get(("grenade", radius, color), self._build_grenade, radius, color)
+
+    def _build_grenade(self, radius, color):
+        c = radius + GRENADE_PAD
+        surf = self._canvas((2 * c, 2 * c))
+        pygame.draw.circle(surf, color, (c, c), radius)
+        pygame.draw.circle(surf, (200, 200, 200), (c, c), radius - 2)
+        pygame.draw.rect(surf, (150, 150, 150), (c - 2, c - 10, 4, 6))
+        return self._finish(surf)
+
+    def disc(self, radius, color):
+        """实心圆（手雷爆炸范围）；中心为 (radius, radius)"""
+        return self._get(("disc", radius, color), self._build_disc, radius, color)
+
+    def _build_disc(self, radius, color):
+        surf = self._canvas((2 * radius, 2 * radius))
+        pygame.draw.circle(surf, color, (radius, radius), radius)
+        return self._finish(surf)
+
+    # ---- 道具 ----
+    def powerup(self, kind, radius, color, glow):
+        """道具：本体 + 描边 + 外扩 glow 像素的半透明光圈 + 白色图标；中心为 (radius + POWERUP_PAD,) * 2"""
+        return self._get(("powerup", kind, radius, color, glow), self._build_powerup, kind, radius, color, glow)
+
+    def _build_powerup(self, kind, radius, color, glow):
+        c = radius + POWERUP_PAD
+        surf = self._alpha_canvas((2 * c, 2 * c))
+        pygame.draw.circle(surf, color, (c, c), radius)
+        pygame.draw.circle(surf, (200, 200, 200), (c, c), radius, 2)
+        # 光圈先画在单独的层上再贴上来，才会与本体混合而不是覆盖
+        halo = self._alpha_canvas((2 * c, 2 * c))
+        pygame.draw.circle(halo, (*color, 50), (c, c), radius + glow)
+        surf.blit(halo, (0, 0))
+        white = (255, 255, 255)
+        if kind == "health":
+            pygame.draw.rect(surf, white, (c - 4, c - 8, 8, 16))
+            pygame.draw.polygon(surf, white, [(c, c - 10), (c - 6, c + 2), (c + 6, c + 2)])
+        elif kind == "shield":
+            pygame.draw.circle(surf, white, (c, c), 6, 2)
+        else:
+            pygame.draw.circle(surf, white, (c, c), 6)
+        return self._finish_alpha(surf)
+
+    # ---- 血条 ----
+    def bar(self, w, h, color, border=None):
+        """整条血条（border=(颜色, 线宽) 时带描边），供 draw_bar 切片"""
+        return self._get(("bar", w, h, color, border), self._build_bar, w, h, color, border)
+
+    def _build_bar(self, w, h, color, border):
+        surf = self._canvas((w, h))
+        surf.fill(color)
+        if border:
+            pygame.draw.rect(surf, border[0], surf.get_rect(), border[1])
+        # 不透明条同样走 colorkey + RLE：实测 RLE 贴图明显快于普通不透明 blit
+        return self._finish(surf)
+
+    def draw_bar(self, dest, x, y, w, h, frac, back, front, border=None):
+        """等价于先画底色、再画 w*frac 宽的前景、最后描边（border=(颜色, 线宽)）"""
+        x = int(x); y = int(y)
+        dest.blit(self.bar(w, h, back, border), (x, y))
+        fill = int(w * max(0.0, min(1.0, frac)))
+        inset = border[1] if border else 0
+        fill = min(fill, w - inset) - inset
+        if fill > 0:
+            dest.blit(self.bar(w, h, front), (x + inset, y + inset), (inset, inset, fill, h - 2 * inset))
+
+    # ---- Boss ----
+    def boss(self, radius, color, flash):
+        """Boss 常态/受击闪白"""
+        return self._get(("boss", radius, color, flash), self._build_boss, radius, color, flash)
+
+    def _build_boss(self, radius, color, flash):
+        c = radius + BOSS_PAD
+        surf = self._canvas((2 * c, 2 * c))
+        pygame.draw.circle(surf, (255, 255, 200) if flash else color, (c, c), radius)
+        pygame.draw.circle(surf, (100, 0, 100), (c, c), radius - 8)
+        pygame.draw.circle(surf, (255, 50, 50), (c - 15, c - 10), 12)
+        pygame.draw.circle(surf, (255, 50, 50), (c + 15, c - 10), 12)
+        pygame.draw.circle(surf, (0, 0, 0), (c - 15, c - 10), 6)
+        pygame.draw.circle(surf, (0, 0, 0), (c + 15, c - 10), 6)
+        pygame.draw.polygon(surf, (150, 0, 150), [(c - 20, c - 40), (c - 30, c - 60), (c - 10, c - 45)])
+        pygame.draw.polygon(surf, (150, 0, 150), [(c + 20, c - 40), (c + 30, c - 60), (c + 10, c - 45)])
+        pygame.draw.arc(surf, (255, 50, 50), [c - 20, c, 40, 30], math.pi, 2 * math.pi, 3)
+        return self._finish(surf)
+
+    def boss_spawn(self, radius, color, timer):
+        """Boss 出场脉冲（每个计时值一帧，最多 60 张）"""
+        return self._get(("boss_spawn", radius, color, timer), self._build_boss_spawn, radius, color, timer)
+
+    def _build_boss_spawn(self, radius, color, timer):
+        c = radius + BOSS_PAD
+        surf = self._canvas((2 * c, 2 * c))
+        pulse = abs(math.sin(timer * 0.1)) * 10
+        glow = (min(255, 180 + int(pulse * 7)), 50, min(255, 180 + int(pulse * 7)))
+        pygame.draw.circle(surf, glow, (c, c), radius + int(pulse))
+        pygame.draw.circle(surf, color, (c, c), radius)
+        return self._finish(surf)
@@ -10,6 +10,9 @@ from game_utils import (
     get_current_input_method,
     restore_input_method,
     load_sound,
+    fonts,
+    window_focus,
+    MenuPacer,
 )
 from achievement_system import achievement_system, ACHIEVEMENTS
 
@@ -31,9 +34,12 @@ BUTTON_HOVER_COLOR = (50, 140, 200)
 BUTTON_TEXT_COLOR = (240, 240, 255)
 COUNTDOWN_COLOR = (255, 215, 0)
 
-title_font = pygame.font.SysFont(None, 48)
-button_font = pygame.font.SysFont(None, 30)
-countdown_font = pygame.font.SysFont(None, 120)
+title_font = fonts.get(48)
+button_font = fonts.get(30)
+countdown_font = fonts.get(120)
+
+# 菜单按事件驱动重画：前台约 33 帧/秒（与原来的 delay(30) 相同），失焦/最小化时睡在 event.wait 上
+menu_pacer = MenuPacer(window_focus, frame_ms=30, idle_ms=500)
 
 # 点击音效（若缺失则使用哑音效）
 button_click_sound = load_sound('powerup.wav')
@@ -42,6 +48,64 @@ button_click_sound = load_sound('powerup.wav')
 _BG_PARTICLES = None
 _BG_PARTICLE_T = 0
 
+# 背景条纹的亮度随时间缓慢起伏（约 1570 帧一个周期）：相位量化成 SCANLINE_PHASES 档，
+# 换档时才把一列条纹颜色拉伸成整屏背景，其余帧整屏 blit 一次
+SCANLINE_PHASES = 64
+_SCANLINE_BG = None
+_SCANLINE_STEP = None
+
+# 光斑闪烁量化成 TWINKLE_STEPS 档透明度，每个 (半径, 颜色, 透明度, 档) 的光斑只画一次
+TWINKLE_STEPS = 12
+_GLOW_SPRITES = {}
+
+# 半透明圆角矩形（按钮阴影、悬停光晕）与按钮外观，按尺寸和颜色缓存
+_GLOW_RECTS = {}
+_BUTTON_SKINS = {}
+
+
+def _scanline_background(t):
+    """第 t 帧的条纹背景（相位所在档的整屏表面）"""
+    global _SCANLINE_BG, _SCANLINE_STEP
+    step = int(t * 0.004 / (2 * math.pi) * SCANLINE_PHASES) % SCANLINE_PHASES
+    if step != _SCANLINE_STEP:
+        phase = step * 2 * math.pi / SCANLINE_PHASES
+        column = pygame.Surface((1, HEIGHT))
+        column.fill(BACKGROUND)
+        for i in range(0, HEIGHT, 4):
+            base = 20 + int(10 * (i / HEIGHT))
+            wobble = int(4 * math.sin(phase + i * 0.02))
+            c = max(0, min(255, base + wobble))
+            column.set_at((0, i), (c, c, min(255, c + 10)))
+        _SCANLINE_BG = pygame.transform.scale(column, (WIDTH, HEIGHT)).convert()
+        _SCANLINE_STEP = step
+    return _SCANLINE_BG
+
+
+def _glow_sprite(r, color, alpha, step):
+    """半径 r 的光斑：由外到内 r 个同心圆，第 step 档闪烁亮度"""
+    key = (r, color, alpha, step)
+    sprite = _GLOW_SPRITES.get(key)
+    if sprite is None:
+        twinkle = 0.4 + 0.6 * step / (TWINKLE_STEPS - 1)
+        sprite = pygame.Surface((r*2, r*2), pygame.SRCALPHA)
+        for rr in range(r, 0, -1):
+            a = int(alpha * twinkle * (rr/r)**2)
+            pygame.draw.circle(sprite, color + (a,), (r, r), rr)
+        # 转成显示格式，每帧 blit 不再逐像素转换
+        sprite = _GLOW_SPRITES[key] = sprite.convert_alpha()
+    return sprite
+
+
+def _glow_rect(size, color, radius):
+    """填满 size 的半透明圆角矩形"""
+    key = (size, color, radius)
+    surf = _GLOW_RECTS.get(key)
+    if surf is None:
+        surf = pygame.Surface(size, pygame.SRCALPHA)
+        pygame.draw.rect(surf, color, surf.get_rect(), border_radius=radius)
+        surf = _GLOW_RECTS[key] = surf.convert_alpha()
+    return surf
+
 def draw_background():
     global _BG_PARTICLES, _BG_PARTICLE_T
     # 初始化粒子（星点/光斑）
@@ -59,17 +123,12 @@ def draw_background():
                 'phase': random.uniform(0, 6.28), 'twinkle': random.uniform(0.6, 1.2)
             })
     
-    # 背景渐变
-    screen.fill(BACKGROUND)
-    # 轻微动态条纹（随时间上下流动）
-    for i in range(0, HEIGHT, 4):
-        base = 20 + int(10 * (i / HEIGHT))
-        wobble = int(4 * math.sin(_BG_PARTICLE_T * 0.004 + i * 0.02))
-        c = max(0, min(255, base + wobble))
-        pygame.draw.line(screen, (c, c, min(255, c + 10)), (0, i), (WIDTH, i))
-    
+    # 背景渐变 + 轻微动态条纹（随时间上下流动）
+    screen.blit(_scanline_background(_BG_PARTICLE_T), (0, 0))
+
     # 动态粒子漂浮
     _BG_PARTICLE_T += 1
+    blits = []
     for p in _BG_PARTICLES:
         # 漂浮运动：上下缓慢浮动+左右微摆
         p['y'] += p['speed'] * (0.6 + 0.4 * math.sin(_BG_PARTICLE_T * 0.010 + p['phase']))
@@ -82,14 +141,12 @@ def draw_background():
             p['x'] = WIDTH + p['r']
         if p['x'] > WIDTH + p['r']:
             p['x'] = -p['r']
-        # 绘制粒子（光斑/星点）
-        surf = pygame.Surface((p['r']*2, p['r']*2), pygame.SRCALPHA)
+        # 绘制粒子（光斑/星点），闪烁取最近的缓存档
         twinkle = 0.7 + 0.3 * math.sin(_BG_PARTICLE_T * 0.02 * p['twinkle'] + p['phase'] * 0.9)
-        for rr in range(p['r'], 0, -1):
-            a = int(p['alpha'] * twinkle * (rr/p['r'])**2)
-            pygame.draw.circle(surf, p['color'] + (a,), (p['r'], p['r']), rr)
-        screen.blit(surf, (int(p['x']-p['r']), int(p['y']-p['r'])))
-    
+        step = round((twinkle - 0.4) / 0.6 * (TWINKLE_STEPS - 1))
+        blits.append((_glow_sprite(p['r'], p['color'], p['alpha'], step), (int(p['x']-p['r']), int(p['y']-p['r']))))
+    screen.blits(blits, doreturn=False)
+
     # 叠加细微暗角（vignette）
     draw_vignette()
 
@@ -112,6 +169,9 @@ def draw_vignette():
             a = int(120 * (i / thickness))
             pygame.draw.line(surf, (0, 0, 0, a), (i, 0), (i, HEIGHT))
             pygame.draw.line(surf, (0, 0, 0, a), (WIDTH - 1 - i, 0), (WIDTH - 1 - i, HEIGHT))
+        # 中间大片全透明，RLE 编码后 blit 直接跳过
+        surf = surf.convert_alpha()
+        surf.set_alpha(255, pygame.RLEACCEL)
         _VIGNETTE_SURF = surf
     screen.blit(_VIGNETTE_SURF, (0, 0))
 
@@ -121,27 +181,81 @@ def _lighten(color, d=20):
     return (min(255, r + d), min(255, g + d), min(255, b + d))
 
 
+def _button_skin(size, base_color, border_color):
+    """底色 + 顶部高光渐变 + 边框，画在透明底上（圆角外的高光与直接画在屏幕上时一样混合）"""
+    key = (size, base_color, border_color)
+    skin = _BUTTON_SKINS.get(key)
+    if skin is None:
+        skin = pygame.Surface(size, pygame.SRCALPHA)
+        rect = skin.get_rect()
+        # 底色
+        pygame.draw.rect(skin, base_color, rect, border_radius=12)
+        # 顶部高光渐变
+        overlay = pygame.Surface((rect.width, rect.height // 2 + 1), pygame.SRCALPHA)
+        for y in range(overlay.get_height()):
+            a = int(70 * (1 - y / max(1, overlay.get_height() - 1)))
+            pygame.draw.line(overlay, (255, 255, 255, a), (0, y), (rect.width, y))
+        skin.blit(overlay, (0, 0))
+        # 边框
+        pygame.draw.rect(skin, border_color, rect, 3, border_radius=12)
+        skin = _BUTTON_SKINS[key] = skin.convert_alpha()
+    return skin
+
+
 def draw_fancy_button(rect, base_color, text_surface=None, border_color=(0, 100, 150)):
     # 阴影
-    shadow = pygame.Surface((rect.width, rect.height), pygame.SRCALPHA)
-    pygame.draw.rect(shadow, (0, 0, 0, 60), shadow.get_rect(), border_radius=12)
-    screen.blit(shadow, (rect.x, rect.y + 4))
-    # 底色
-    pygame.draw.rect(screen, base_color, rect, border_radius=12)
-    # 顶部高光渐变
-    overlay = pygame.Surface((rect.width, rect.height // 2 + 1), pygame.SRCALPHA)
-    for y in range(overlay.get_height()):
-        a = int(70 * (1 - y / max(1, overlay.get_height() - 1)))
-        pygame.draw.line(overlay, (255, 255, 255, a), (0, y), (rect.width, y))
-    screen.blit(overlay, rect.topleft)
-    # 边框
-    pygame.draw.rect(screen, border_color, rect, 3, border_radius=12)
+    screen.blit(_glow_rect(rect.size, (0, 0, 0, 60), 12), (rect.x, rect.y + 4))
+    # 底色、高光与边框
+    screen.blit(_button_skin(rect.size, base_color, border_color), rect.topleft)
     # 文本
     if text_surface is not None:
         screen.blit(text_surface, (rect.centerx - text_surface.get_width() // 2,
                                    rect.centery - text_surface.get_height() // 2))
 
 
+# Risk 菜单与倒计时里不随帧变化的半透明部件
+_RISK_SPRITES = {}
+_COUNTDOWN_GLOWS = {}
+
+
+def _risk_menu_sprites(panel_size, window_size):
+    """标题面板及其外发光、滚轮窗口底、居中标记、上下箭头；只生成一次"""
+    if not _RISK_SPRITES:
+        w, h = panel_size
+        # 6 层同色光晕预先叠成一张（与逐层叠到屏幕上最多差 1）
+        glow = pygame.Surface((w + 96, h + 96), pygame.SRCALPHA)
+        for i in range(6, 0, -1):
+            layer = _glow_rect((w + i*16, h + i*16), (0, 120, 220, 18), 26)
+            glow.blit(layer, layer.get_rect(center=glow.get_rect().center))
+        panel = pygame.Surface(panel_size, pygame.SRCALPHA)
+        pygame.draw.rect(panel, (0, 120, 220, 160), panel.get_rect(), border_radius=20)
+        pygame.draw.rect(panel, (0, 160, 255, 200), panel.get_rect(), 4, border_radius=20)
+        window_bg = pygame.Surface(window_size, pygame.SRCALPHA)
+        window_bg.fill((20, 30, 50, 140))
+        pygame.draw.rect(window_bg, (80, 120, 160), window_bg.get_rect(), 2, border_radius=12)
+        marker = pygame.Surface((12, 12), pygame.SRCALPHA)
+        pygame.draw.polygon(marker, (180, 200, 255, 140), [(0,6),(6,0),(12,6),(6,12)])
+        up = pygame.Surface((18, 12), pygame.SRCALPHA)
+        pygame.draw.polygon(up, (200, 220, 255, 180), [(9,2),(16,10),(2,10)])
+        dn = pygame.Surface((18, 12), pygame.SRCALPHA)
+        pygame.draw.polygon(dn, (200, 220, 255, 180), [(2,2),(16,2),(9,10)])
+        sprites = dict(title_glow=glow, title_panel=panel, window=window_bg, marker=marker, up=up, down=dn)
+        _RISK_SPRITES.update((name, surf.convert_alpha()) for name, surf in sprites.items())
+    return _RISK_SPRITES
+
+
+def _countdown_glow(size):
+    """倒计时数字背后的金色光晕，按数字尺寸缓存"""
+    glow = _COUNTDOWN_GLOWS.get(size)
+    if glow is None:
+        glow = pygame.Surface(size, pygame.SRCALPHA)
+        for i in range(10, 0, -1):
+            alpha = 100 - i * 10
+            pygame.draw.circle(glow, (255, 215, 0, alpha), (size[0]//2, size[1]//2), i * 3)
+        glow = _COUNTDOWN_GLOWS[size] = glow.convert_alpha()
+    return glow
+
+
 def app_quit():
     global PREV_HKL
     try:
@@ -160,8 +274,8 @@ def app_quit():
 def show_history_panel():
     # 历史记录面板：日期/难度/层数/分数
     back_btn = pygame.Rect(20, 20, 120, 50)
-    header_font = pygame.font.SysFont(None, 26)
-    row_font = pygame.font.SysFont(None, 24)
+    header_font = fonts.get(26)
+    row_font = fonts.get(24)
 
     def render_rows():
         hist = GameData.get_history()[::-1]  # 最近在上面
@@ -175,26 +289,31 @@ def show_history_panel():
             rows.append((f"{date} {time_}", diff, floor, score))
         return rows
 
+    # 面板打开期间记录不会变化，只读一次存档
+    rows = render_rows()
     while True:
-        for event in pygame.event.get():
+        events, redraw = menu_pacer.wait()
+        for event in events:
             if event.type == pygame.QUIT:
                 app_quit()
             if event.type == pygame.MOUSEBUTTONDOWN:
                 if back_btn.collidepoint(pygame.mouse.get_pos()):
                     button_click_sound.play()
                     return
+        if not redraw:
+            continue
 
         draw_background()
 
         # 标题
-        title = title_font.render("History", True, (255, 220, 120))
+        title = fonts.render(title_font, "History", (255, 220, 120))
         screen.blit(title, (WIDTH//2 - title.get_width()//2, 50))
 
         # 返回按钮
         bh = back_btn.collidepoint(pygame.mouse.get_pos())
         pygame.draw.rect(screen, (130, 130, 150) if bh else (100, 100, 120), back_btn, border_radius=10)
         pygame.draw.rect(screen, (160, 160, 180), back_btn, 3, border_radius=10)
-        back_txt = button_font.render("BACK", True, BUTTON_TEXT_COLOR)
+        back_txt = fonts.render(button_font, "BACK", BUTTON_TEXT_COLOR)
         screen.blit(back_txt, (back_btn.centerx - back_txt.get_width()//2, back_btn.centery - back_txt.get_height()//2))
 
         # 表头
@@ -202,39 +321,38 @@ def show_history_panel():
         heads = ["Date", "Difficulty", "Floor", "Score"]
         xs = [x0, x0 + 260, x0 + 360, x0 + 460]
         for h, x in zip(heads, xs):
-            screen.blit(header_font.render(h, True, (210, 230, 250)), (x, y0))
+            screen.blit(fonts.render(header_font, h, (210, 230, 250)), (x, y0))
         pygame.draw.line(screen, (100, 120, 140), (x0 - 10, y0 + 28), (WIDTH - 80, y0 + 28), 2)
 
         # 内容
-        rows = render_rows()
         if not rows:
-            empty_msg = header_font.render("No records yet", True, (185, 195, 210))
+            empty_msg = fonts.render(header_font, "No records yet", (185, 195, 210))
             screen.blit(empty_msg, (WIDTH//2 - empty_msg.get_width()//2, y0 + 60))
         else:
             for i, (d, diff, fl, sc) in enumerate(rows):
                 yy = y0 + 40 + i * 28
-                screen.blit(row_font.render(d, True, (200, 210, 220)), (xs[0], yy))
-                screen.blit(row_font.render(diff, True, (200, 210, 220)), (xs[1], yy))
-                screen.blit(row_font.render(fl, True, (200, 210, 220)), (xs[2], yy))
-                screen.blit(row_font.render(sc, True, (255, 230, 160)), (xs[3], yy))
+                screen.blit(fonts.render(row_font, d, (200, 210, 220)), (xs[0], yy))
+                screen.blit(fonts.render(row_font, diff, (200, 210, 220)), (xs[1], yy))
+                screen.blit(fonts.render(row_font, fl, (200, 210, 220)), (xs[2], yy))
+                screen.blit(fonts.render(row_font, sc, (255, 230, 160)), (xs[3], yy))
 
         pygame.display.flip()
-        pygame.time.delay(30)
 
 
 def show_achievements_panel():
     """成就面板"""
     back_btn = pygame.Rect(20, 20, 120, 50)
-    header_font = pygame.font.SysFont(None, 28)
-    item_font = pygame.font.SysFont(None, 24)
-    desc_font = pygame.font.SysFont(None, 20)
+    header_font = fonts.get(28)
+    item_font = fonts.get(24)
+    desc_font = fonts.get(20)
     
     scroll_y = 0
     max_scroll = max(0, len(ACHIEVEMENTS) * 120 - (HEIGHT - 200))
     
     while True:
+        events, redraw = menu_pacer.wait()
         mouse_pos = pygame.mouse.get_pos()
-        for event in pygame.event.get():
+        for event in events:
             if event.type == pygame.QUIT:
                 app_quit()
             if event.type == pygame.MOUSEBUTTONDOWN:
@@ -243,11 +361,13 @@ def show_achievements_panel():
                     return
             if event.type == pygame.MOUSEWHEEL:
                 scroll_y = max(0, min(max_scroll, scroll_y - event.y * 30))
+        if not redraw:
+            continue
 
         draw_background()
 
         # 标题
-        title = title_font.render("Achievements", True, (255, 220, 120))
+        title = fonts.render(title_font, "Achievements", (255, 220, 120))
         screen.blit(title, (WIDTH//2 - title.get_width()//2, 50))
         
         # 统计信息
@@ -256,14 +376,14 @@ def show_achievements_panel():
         unlocked_count = len(achievement_system.get_unlocked_achievements())
         total_count = len(ACHIEVEMENTS)
         
-        stats_text = header_font.render(f"Progress: {unlocked_count}/{total_count} ({completion:.1f}%) | Points: {total_points}", True, (200, 230, 255))
+        stats_text = fonts.render(header_font, f"Progress: {unlocked_count}/{total_count} ({completion:.1f}%) | Points: {total_points}", (200, 230, 255))
         screen.blit(stats_text, (WIDTH//2 - stats_text.get_width()//2, 90))
 
         # 返回按钮
         bh = back_btn.collidepoint(mouse_pos)
         pygame.draw.rect(screen, (130, 130, 150) if bh else (100, 100, 120), back_btn, border_radius=10)
         pygame.draw.rect(screen, (160, 160, 180), back_btn, 3, border_radius=10)
-        back_txt = button_font.render("BACK", True, BUTTON_TEXT_COLOR)
+        back_txt = fonts.render(button_font, "BACK", BUTTON_TEXT_COLOR)
         screen.blit(back_txt, (back_btn.centerx - back_txt.get_width()//2, back_btn.centery - back_txt.get_height()//2))
 
         # 成就列表裁剪区域
@@ -298,21 +418,21 @@ def show_achievements_panel():
             pygame.draw.circle(screen, icon_color, (item_rect.left + 30, item_rect.top + 30), 18, 2)
             
             # 在圆形中绘制图标文字
-            icon_surf = pygame.font.SysFont(None, 20).render(ach_info["icon"], True, icon_color)
+            icon_surf = fonts.render(desc_font, ach_info["icon"], icon_color)
             icon_text_rect = icon_surf.get_rect(center=(item_rect.left + 30, item_rect.top + 30))
             screen.blit(icon_surf, icon_text_rect)
             
             # 名称
             name_color = (150, 255, 150) if is_unlocked else (200, 200, 200)
-            name_surf = item_font.render(ach_info["name"], True, name_color)
+            name_surf = fonts.render(item_font, ach_info["name"], name_color)
             screen.blit(name_surf, (item_rect.left + 70, item_rect.top + 15))
             
             # 点数
-            points_surf = desc_font.render(f"{ach_info['points']} pts", True, (255, 215, 0))
+            points_surf = fonts.render(desc_font, f"{ach_info['points']} pts", (255, 215, 0))
             screen.blit(points_surf, (item_rect.right - 80, item_rect.top + 15))
             
             # 描述
-            desc_surf = desc_font.render(ach_info["description"], True, (180, 180, 180))
+            desc_surf = fonts.render(desc_font, ach_info["description"], (180, 180, 180))
             screen.blit(desc_surf, (item_rect.left + 70, item_rect.top + 45))
             
             # 进度条
@@ -324,12 +444,12 @@ def show_achievements_panel():
                 
                 # 进度文字
                 current_val = int(progress * ach_info["target"])
-                progress_text = desc_font.render(f"{current_val}/{ach_info['target']}", True, (160, 160, 160))
+                progress_text = fonts.render(desc_font, f"{current_val}/{ach_info['target']}", (160, 160, 160))
                 screen.blit(progress_text, (progress_rect.right + 10, progress_rect.top - 3))
             else:
                 # 解锁日期
                 unlock_info = achievement_system.achievements_data["unlocked"][ach_id]
-                unlock_text = desc_font.render(f"Unlocked: {unlock_info['date']}", True, (120, 255, 120))
+                unlock_text = fonts.render(desc_font, f"Unlocked: {unlock_info['date']}", (120, 255, 120))
                 screen.blit(unlock_text, (item_rect.left + 70, item_rect.top + 75))
 
         screen.set_clip(prev_clip)
@@ -345,7 +465,6 @@ def show_achievements_panel():
             pygame.draw.rect(screen, (120, 120, 120), thumb_rect, border_radius=5)
 
         pygame.display.flip()
-        pygame.time.delay(30)
 
 
 def show_risk_menu():
@@ -365,6 +484,9 @@ def show_risk_menu():
     item_spacing = 66
     visible_half = 1  # 显示 3 个条目（选中上下各1）
 
+    panel_rect = pygame.Rect(WIDTH//2 - 360, HEIGHT//4 - 40, 720, 120)
+    sprites = _risk_menu_sprites(panel_rect.size, wheel_win.size)
+
     def level_to_risk(level: int) -> int:
         # 直接映射到 0..20 风险刻度（允许零难度）
         return max(0, min(20, int(level)))
@@ -390,8 +512,9 @@ def show_risk_menu():
         ]
                                 
     while True:
+        events, redraw = menu_pacer.wait()
         mouse_pos = pygame.mouse.get_pos()
-        for event in pygame.event.get():
+        for event in events:
             if event.type == pygame.QUIT:
                 app_quit()
             if event.type == pygame.KEYDOWN:
@@ -420,27 +543,20 @@ def show_risk_menu():
                         rect = pygame.Rect(wheel_center_x - 60, y - 24, 120, 48)
                         if rect.collidepoint(mouse_pos):
                             selected_index = idx; button_click_sound.play(); break
+        if not redraw:
+            continue
 
         draw_background()
 
         # 标题承载面板 + 发光
-        panel_rect = pygame.Rect(WIDTH//2 - 360, HEIGHT//4 - 40, 720, 120)
-        panel = pygame.Surface(panel_rect.size, pygame.SRCALPHA)
-        pygame.draw.rect(panel, (0, 120, 220, 160), panel.get_rect(), border_radius=20)
-        pygame.draw.rect(panel, (0, 160, 255, 200), panel.get_rect(), 4, border_radius=20)
-        for i in range(6, 0, -1):
-            glow = pygame.Surface((panel_rect.width + i*16, panel_rect.height + i*16), pygame.SRCALPHA)
-            pygame.draw.rect(glow, (0, 120, 220, 18), glow.get_rect(), border_radius=26)
-            screen.blit(glow, (panel_rect.centerx - glow.get_width()//2, panel_rect.centery - glow.get_height()//2))
-        screen.blit(panel, panel_rect.topleft)
-        title = title_font.render("Select Difficulty Level (0-20)", True, (255, 215, 0))
+        glow = sprites['title_glow']
+        screen.blit(glow, glow.get_rect(center=panel_rect.center))
+        screen.blit(sprites['title_panel'], panel_rect.topleft)
+        title = fonts.render(title_font, "Select Difficulty Level (0-20)", (255, 215, 0))
         screen.blit(title, (panel_rect.centerx - title.get_width()//2, panel_rect.centery - title.get_height()//2))
           
         # 左侧滚轮窗口背景
-        window_bg = pygame.Surface(wheel_win.size, pygame.SRCALPHA)
-        window_bg.fill((20, 30, 50, 140))
-        pygame.draw.rect(window_bg, (80, 120, 160), window_bg.get_rect(), 2, border_radius=12)
-        screen.blit(window_bg, wheel_win.topleft)
+        screen.blit(sprites['window'], wheel_win.topleft)
 
         # 启用裁剪
         prev_clip = screen.get_clip()
@@ -472,26 +588,18 @@ def show_risk_menu():
                 pygame.draw.rect(screen, base_color, rect, border_radius=10)
                 pygame.draw.rect(screen, (0, 100, 150), rect, 3, border_radius=10)
                 if hover:
-                    glow = pygame.Surface((w+14, h+14), pygame.SRCALPHA)
-                    pygame.draw.rect(glow, (0, 220, 255, 60), glow.get_rect(), border_radius=12)
-                    screen.blit(glow, (rect.x-7, rect.y-7))
-                label = button_font.render(str(levels[idx]), True, BUTTON_TEXT_COLOR)
+                    screen.blit(_glow_rect((w+14, h+14), (0, 220, 255, 60), 12), (rect.x-7, rect.y-7))
+                label = fonts.render(button_font, str(levels[idx]), BUTTON_TEXT_COLOR)
                 screen.blit(label, (rect.centerx - label.get_width()//2, rect.centery - label.get_height()//2))
 
         # 居中标记
-        marker = pygame.Surface((12, 12), pygame.SRCALPHA)
-        pygame.draw.polygon(marker, (180, 200, 255, 140), [(0,6),(6,0),(12,6),(6,12)])
-        screen.blit(marker, (wheel_win.right - 18, wheel_center_y - 6))
+        screen.blit(sprites['marker'], (wheel_win.right - 18, wheel_center_y - 6))
 
         # 滚动提示箭头
         if selected_index > 0:
-            up = pygame.Surface((18, 12), pygame.SRCALPHA)
-            pygame.draw.polygon(up, (200, 220, 255, 180), [(9,2),(16,10),(2,10)])
-            screen.blit(up, (wheel_center_x - 9, wheel_win.top + 6))
+            screen.blit(sprites['up'], (wheel_center_x - 9, wheel_win.top + 6))
         if selected_index < len(levels) - 1:
-            dn = pygame.Surface((18, 12), pygame.SRCALPHA)
-            pygame.draw.polygon(dn, (200, 220, 255, 180), [(2,2),(16,2),(9,10)])
-            screen.blit(dn, (wheel_center_x - 9, wheel_win.bottom - 18))
+            screen.blit(sprites['down'], (wheel_center_x - 9, wheel_win.bottom - 18))
 
         # 关闭裁剪
         screen.set_clip(prev_clip)
@@ -503,18 +611,18 @@ def show_risk_menu():
         preview_rect = pygame.Rect(WIDTH - preview_w - 20, wheel_center_y - preview_h//2 + 10, preview_w, preview_h)
         pygame.draw.rect(screen, (40, 60, 80, 160), preview_rect, border_radius=12)
         pygame.draw.rect(screen, (80, 120, 160), preview_rect, 2, border_radius=12)
-        head = button_font.render("Effects", True, (220, 240, 255))
+        head = fonts.render(button_font, "Effects", (220, 240, 255))
         screen.blit(head, (preview_rect.centerx - head.get_width()//2, preview_rect.top + 8))
-        lf = pygame.font.SysFont(None, 26)
+        lf = fonts.get(26)
         for i, line in enumerate(lines):
-            ts = lf.render(line, True, (200, 220, 240))
+            ts = fonts.render(lf, line, (200, 220, 240))
             screen.blit(ts, (preview_rect.left + 12, preview_rect.top + 50 + i*32))
 
         # 已选信息
-        info_font = pygame.font.SysFont(None, 28)
+        info_font = fonts.get(28)
         sel_level = levels[selected_index]
         risk_val = level_to_risk(sel_level)
-        info = info_font.render(f"Selected: Level {sel_level}  (Risk {risk_val})", True, (220, 240, 255))
+        info = fonts.render(info_font, f"Selected: Level {sel_level}  (Risk {risk_val})", (220, 240, 255))
         screen.blit(info, (wheel_win.centerx - info.get_width()//2, wheel_win.bottom + 12))
 
         # Back 按钮
@@ -523,10 +631,8 @@ def show_risk_menu():
         pygame.draw.rect(screen, back_color, back_btn, border_radius=10)
         pygame.draw.rect(screen, (160, 160, 180), back_btn, 3, border_radius=10)
         if back_hover:
-            glow = pygame.Surface((back_btn.width+14, back_btn.height+14), pygame.SRCALPHA)
-            pygame.draw.rect(glow, (255, 255, 255, 40), glow.get_rect(), border_radius=14)
-            screen.blit(glow, (back_btn.x-7, back_btn.y-7))
-        back_txt = button_font.render("BACK", True, BUTTON_TEXT_COLOR)
+            screen.blit(_glow_rect((back_btn.width+14, back_btn.height+14), (255, 255, 255, 40), 14), (back_btn.x-7, back_btn.y-7))
+        back_txt = fonts.render(button_font, "BACK", BUTTON_TEXT_COLOR)
         screen.blit(back_txt, (back_btn.centerx - back_txt.get_width()//2, back_btn.centery - back_txt.get_height()//2))
 
         # Start 按钮
@@ -545,19 +651,17 @@ def show_risk_menu():
         pygame.draw.rect(screen, start_color, start_btn, border_radius=12)
         pygame.draw.rect(screen, (40, 120, 80), start_btn, 3, border_radius=12)
         if start_hover:
-            glow = pygame.Surface((start_btn.width+16, start_btn.height+16), pygame.SRCALPHA)
-            pygame.draw.rect(glow, (0, 220, 255, 60), glow.get_rect(), border_radius=16)
-            screen.blit(glow, (start_btn.x-8, start_btn.y-8))
-        start_txt = button_font.render("START", True, (255, 255, 255))
+            screen.blit(_glow_rect((start_btn.width+16, start_btn.height+16), (0, 220, 255, 60), 16), (start_btn.x-8, start_btn.y-8))
+        start_txt = fonts.render(button_font, "START", (255, 255, 255))
         screen.blit(start_txt, (start_btn.centerx - start_txt.get_width()//2, start_btn.centery - start_txt.get_height()//2))
 
         # 高难度提示（>=12）
         if sel_level >= 12:
-            warn_font = pygame.font.SysFont(None, 28)
-            warn_txt = warn_font.render("Challenging currently!", True, (255, 120, 120))
+            warn_font = fonts.get(28)
+            warn_txt = fonts.render(warn_font, "Challenging currently!", (255, 120, 120))
             screen.blit(warn_txt, (start_btn.centerx - warn_txt.get_width()//2 - 208, start_btn.top - warn_txt.get_height() - 280))
 
-        pygame.display.flip(); pygame.time.delay(30)
+        pygame.display.flip()
 
 def show_main_menu():
     start_button = pygame.Rect(WIDTH//2 - 100, HEIGHT//2 - 40, 200, 60)
@@ -577,13 +681,14 @@ def show_main_menu():
     achievement_system.update_progress("game_start", 1)
     
     while True:
+        events, redraw = menu_pacer.wait()
         mouse_pos = pygame.mouse.get_pos()
         button_hover[0] = start_button.collidepoint(mouse_pos)
         button_hover[1] = history_button.collidepoint(mouse_pos)
         button_hover[2] = achievements_button.collidepoint(mouse_pos)
         button_hover[3] = continue_button.collidepoint(mouse_pos) and has_saved_game
         
-        for event in pygame.event.get():
+        for event in events:
             if event.type == pygame.QUIT:
                 app_quit()
             if event.type == pygame.MOUSEBUTTONDOWN:
@@ -606,50 +711,52 @@ def show_main_menu():
                     button_click_sound.play()
                     # 加载保存的游戏，继续无需选择难度，沿用存档状态（此处返回 None 难度，让 main 那边用 Normal 兜底）
                     return (True, None)
+        if not redraw:
+            continue
 
         draw_background()
         
         # 绘制标题
-        title_text = title_font.render("Warrior Rimer", True, TEXT_COLOR)
+        title_text = fonts.render(title_font, "Warrior Rimer", TEXT_COLOR)
         screen.blit(title_text, (WIDTH//2 - title_text.get_width()//2, HEIGHT//4 - 40))
         
         # 绘制最高分和成就信息
-        high_score_text = button_font.render(f"Highest Score: {high_score}", True, (255, 215, 0))
+        high_score_text = fonts.render(button_font, f"Highest Score: {high_score}", (255, 215, 0))
         screen.blit(high_score_text, (WIDTH//2 - high_score_text.get_width()//2, HEIGHT//4 + 20))
         
         # 成就统计
-        achievement_stats = button_font.render(f"Achievements: {len(achievement_system.get_unlocked_achievements())}/{len(ACHIEVEMENTS)} ({achievement_system.get_completion_percentage():.0f}%)", True, (150, 200, 255))
+        achievement_stats = fonts.render(button_font, f"Achievements: {len(achievement_system.get_unlocked_achievements())}/{len(ACHIEVEMENTS)} ({achievement_system.get_completion_percentage():.0f}%)", (150, 200, 255))
         screen.blit(achievement_stats, (WIDTH//2 - achievement_stats.get_width()//2, HEIGHT//4 + 50))
         
         # 绘制按钮（渐变玻璃风格）
         start_color = BUTTON_HOVER_COLOR if button_hover[0] else BUTTON_COLOR
-        start_text = button_font.render("START", True, BUTTON_TEXT_COLOR)
+        start_text = fonts.render(button_font, "START", BUTTON_TEXT_COLOR)
         draw_fancy_button(start_button, start_color, start_text)
             
         # 绘制历史记录按钮
         history_color = BUTTON_HOVER_COLOR if button_hover[1] else BUTTON_COLOR
-        history_text = button_font.render("HISTORY", True, BUTTON_TEXT_COLOR)
+        history_text = fonts.render(button_font, "HISTORY", BUTTON_TEXT_COLOR)
         draw_fancy_button(history_button, history_color, history_text)
         
         # 绘制成就按钮
         achievements_color = BUTTON_HOVER_COLOR if button_hover[2] else (80, 130, 180)
-        achievements_text = button_font.render("ACHIEVEMENTS", True, BUTTON_TEXT_COLOR)
+        achievements_text = fonts.render(button_font, "ACHIEVEMENTS", BUTTON_TEXT_COLOR)
         draw_fancy_button(achievements_button, achievements_color, achievements_text, border_color=(120, 170, 220))
             
         # 绘制继续游戏按钮（如果有保存的游戏）
         if has_saved_game:
             continue_color = BUTTON_HOVER_COLOR if button_hover[3] else (200, 150, 50)
-            continue_text = button_font.render("CONTINUE", True, BUTTON_TEXT_COLOR)
+            continue_text = fonts.render(button_font, "CONTINUE", BUTTON_TEXT_COLOR)
             draw_fancy_button(continue_button, continue_color, continue_text, border_color=(220,180,70))
         else:
             # 如果无保存的游戏，显示灰色按钮
             # 灰态不可用按钮也用同风格，但色彩偏灰
             disabled_color = (110, 110, 110)
-            continue_text = button_font.render("CONTINUE", True, (200, 200, 200))
+            continue_text = fonts.render(button_font, "CONTINUE", (200, 200, 200))
             draw_fancy_button(continue_button, disabled_color, continue_text, border_color=(140,140,140))
         
         # 绘制说明
-        controls_font = pygame.font.SysFont(None, 24)
+        controls_font = fonts.get(24)
         controls_text = [
             "Controls:",
             "WASD - Move",
@@ -660,12 +767,11 @@ def show_main_menu():
         ]
         
         for i, text in enumerate(controls_text):
-            text_surface = controls_font.render(text, True, (160, 160, 180))
+            text_surface = fonts.render(controls_font, text, (160, 160, 180))
             screen.blit(text_surface, (WIDTH//2 + 120, 
                                      HEIGHT - 160 + i * 25))
         
         pygame.display.flip()
-        pygame.time.delay(30)
 
 # 倒计时
 def show_countdown():
@@ -680,18 +786,11 @@ def show_countdown():
             draw_background()
 
             # 绘制倒计时数字
-            count_text = countdown_font.render(str(count), True, COUNTDOWN_COLOR)
+            count_text = fonts.render(countdown_font, str(count), COUNTDOWN_COLOR)
             text_rect = count_text.get_rect(center=(WIDTH//2, HEIGHT//2))
             
             # 添加发光效果
-            glow_surface = pygame.Surface((text_rect.width + 40, text_rect.height + 40), pygame.SRCALPHA)
-            for i in range(10, 0, -1):
-                alpha = 100 - i * 10
-                glow_color = (255, 215, 0, alpha)
-                pygame.draw.circle(glow_surface, glow_color, 
-                                  (glow_surface.get_width()//2, glow_surface.get_height()//2), 
-                                  i * 3)
-            
+            glow_surface = _countdown_glow((text_rect.width + 40, text_rect.height + 40))
             screen.blit(glow_surface, (text_rect.centerx - glow_surface.get_width()//2, 
                                       text_rect.centery - glow_surface.get_height()//2))
             
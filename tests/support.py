@@ -0,0 +1,9 @@
+# 测试共用的辅助函数（unittest discover -s tests 会把 tests/ 加入 sys.path，测试模块直接 from support import）
+from achievement_system import achievement_system
+
+
+def mute_achievements(test):
+    """在 test 运行期间关闭成就系统，避免推进对局时改写受版本管理的 achievement_data.json；测试结束自动恢复"""
+    prev = achievement_system.enabled
+    achievement_system.enabled = False
+    test.addCleanup(setattr, achievement_system, "enabled", prev)
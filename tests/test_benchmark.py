@@ -0,0 +1,29 @@
+import os
+import json
+import tempfile
+import unittest
+
+os.environ.setdefault("WARRIOR_HEADLESS", "1")
+
+import benchmark  # noqa: E402
+
+
+class TestBenchmarkScenarios(unittest.TestCase):
+    def test_every_scenario_runs(self):
+        for name in benchmark.SCENARIOS:
+            with self.subTest(scenario=name):
+                r = benchmark.run_scenario(name, ticks=3, warmup=0, draw=False)
+                self.assertEqual(r["ticks"], 3)
+                self.assertIn("p99", r["update_ms"])
+
+    def test_results_written_as_json(self):
+        out = os.path.join(tempfile.mkdtemp(), "bench.json")
+        benchmark.main(["-s", "enemies_200", "-t", "2", "--warmup", "0", "--out", out])
+        with open(out, encoding="utf-8") as f:
+            data = json.load(f)
+        self.assertIn("enemies_200", data["scenarios"])
+        self.assertIn("p50", data["scenarios"]["enemies_200"]["draw_ms"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import unittest
+
+os.environ.setdefault("WARRIOR_HEADLESS", "1")
+
+import numpy as np  # noqa: E402
+import pygame  # noqa: E402
+import main_game as mg  # noqa: E402
+from support import mute_achievements  # noqa: E402
+from dirty_rects import DirtyRegion  # noqa: E402
+
+
+class TestDirtyRegion(unittest.TestCase):
+    def test_rects_merge_rows_and_include_previous_frame(self):
+        region = DirtyRegion(320, 240, tile=32)
+        region.begin()
+        region.add(10, 10, 70, 70)          # 2×3 格
+        region.present([])
+        region.begin()
+        region.add(200, 100, 210, 110)
+        self.assertFalse(region.full_frame())
+        rects = region.rects()
+        self.assertEqual(sorted(map(tuple, rects)), [(0, 0, 96, 96), (192, 96, 32, 32)])
+
+    def test_add_boxes_matches_add(self):
+        rng = np.random.default_rng(1)
+        x0 = rng.uniform(-50, 800, 300); y0 = rng.uniform(-50, 600, 300)
+        x1 = x0 + rng.uniform(1, 120, 300); y1 = y0 + rng.uniform(1, 120, 300)
+        a = DirtyRegion(800, 600); b = DirtyRegion(800, 600)
+        a.add_boxes(x0, y0, x1, y1)
+        for box in zip(x0, y0, x1, y1):
+            b.add(*box)
+        self.assertTrue((a._cur == b._cur).all())
+
+    def test_full_frame_on_scene_change_overlay_and_large_area(self):
+        region = DirtyRegion(320, 240, tile=32)
+        region.begin("a")
+        self.assertTrue(region.full_frame())       # 首帧
+        region.present()
+        region.begin("a")
+        self.assertFalse(region.full_frame())
+        region.mark_full()
+        region.present()
+        region.begin("a")
+        self.assertTrue(region.full_frame())       # 叠加之后的一帧也整屏
+        region.present()
+        region.begin("b")
+        self.assertTrue(region.full_frame())
+        region.present()
+        region.begin("b")
+        region.add(0, 0, 320, 160)
+        self.assertTrue(region.full_frame())       # 超过一半
+
+
+class TestDirtySession(unittest.TestCase):
+    def setUp(self):
+        mute_achievements(self)
+        self._ticks = pygame.time.get_ticks
+        self._enabled = mg.dirty_region.enabled
+        mg.dirty_region.enabled = True
+
+    def tearDown(self):
+        pygame.time.get_ticks = self._ticks
+        mg.dirty_region.enabled = self._enabled
+        mg.dirty_region.invalidate()
+
+    def test_dirty_frames_match_full_redraw(self):
+        clock = [0]
+        pygame.time.get_ticks = lambda: clock[0]
+        s = mg.GameSession("Hard", seed=9, skill='triple')
+        mg.dirty_region.invalidate()
+        dirty = 0
+        for t in range(300):
+            clock[0] += 16
+            s.player.health = max(s.player.health, 50)
+            mg.step_session(s, mg.TickInput((t // 50) % 3 - 1, 0, fire=True, weapon=(t // 100) % 3))
+            rects = mg.prepare_dirty_frame(s)
+            mg.draw_session(s, rects)
+            partial = pygame.image.tobytes(mg.screen, "RGB")
+            mg.present_frame(rects)
+            dirty += rects is not None
+            if t % 10 == 0:
+                keep = mg.screen.copy()
+                mg.draw_session(s)
+                self.assertEqual(partial, pygame.image.tobytes(mg.screen, "RGB"), t)
+                mg.screen.blit(keep, (0, 0))
+        self.assertGreater(dirty, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import os
+import unittest
+
+os.environ.setdefault("WARRIOR_HEADLESS", "1")
+
+import main_game as mg  # noqa: E402
+from support import mute_achievements  # noqa: E402
+
+
+def _mixed_crowd(batch_min, ticks=400):
+    # 风险 20 的混合敌群（普通/自爆/冲锋）围着玩家，逐帧开火；返回每个敌人的完整运动状态
+    s = mg.GameSession("Normal", seed=4242)
+    s.enemy_swarm.batch_min = batch_min
+    s.enemies.empty(); s.powerups.empty()
+    s.rl.risk = 20; s.rl.apply_risk_modifiers()
+    s.rl.target_enemies = s.rl.spawned = 10 ** 9
+    s.powerup_timer = -10 ** 9
+    for i in range(60):
+        cls = (mg.Enemy, mg.Bomber, mg.Charger)[i % 3]
+        s.enemies.add(cls(s.walls) if cls is mg.Enemy else cls(s.walls, s.rl))
+    s.player.x, s.player.y = mg.WIDTH // 2, mg.HEIGHT // 3
+    for t in range(ticks):
+        s.player.health = s.player.max_health; s.game_over = False; s.reward_menu.visible = False
+        s.player.gun_cooldown = 0
+        mg.step_session(s, mg.TickInput((t // 40) % 3 - 1, 0, fire=True))
+    s.enemy_swarm.sync([])
+    state = [(type(e).__name__, e.x, e.y, e.health, e.direction, e.shoot_cooldown, e.collision_cooldown,
+              getattr(e, 'is_charging', None), getattr(e, 'charge_travel', None), getattr(e, 'charge_cooldown', None))
+             for e in s.enemies]
+    return state, s.enemy_kills, s.player.score, s.enemy_bullets.x.tolist(), mg.game_rng.getstate()
+
+
+class TestEnemySwarm(unittest.TestCase):
+    def setUp(self):
+        mute_achievements(self)
+
+    def test_batch_matches_per_object_moves(self):
+        batched = _mixed_crowd(0)
+        scalar = _mixed_crowd(10 ** 9)
+        self.assertEqual(batched, scalar)
+        self.assertGreater(batched[1], 0)
+
+    def test_sync_writes_state_back_on_leave(self):
+        s = mg.GameSession("Normal", seed=7)
+        s.enemies.empty()
+        e = mg.Charger(s.walls)
+        e.charge_cooldown = 5; e.shoot_cooldown = 50
+        s.enemies.add(e)
+        swarm = mg.EnemySwarm(mg.WIDTH, mg.HEIGHT, batch_min=0)
+        self.assertEqual(swarm.advance(s.enemies.sprites(), s.walls, s.player), [])
+        swarm.flush()
+        self.assertEqual((swarm.charge_cd[0], swarm.shoot_cd[0]), (4, 49))
+        self.assertEqual(e.charge_cooldown, 5)  # 成员期间数组是权威状态
+        swarm.sync([])
+        self.assertEqual((e.charge_cooldown, e.shoot_cooldown), (4, 49))
+        self.assertEqual(len(swarm), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
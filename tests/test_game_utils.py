@@ -23,5 +23,177 @@ class TestGameUtils(unittest.TestCase):
     def test_clamp_middle(self):
         self.assertEqual(clamp(3, 0, 5), 3)
 
+@unittest.skipUnless(game_utils and hasattr(game_utils, 'FixedTimestep'), 'FixedTimestep unavailable')
+class TestFixedTimestep(unittest.TestCase):
+    def test_steps_accumulate(self):
+        ts = game_utils.FixedTimestep(60)
+        self.assertEqual(ts.advance(10), 0)
+        self.assertEqual(ts.advance(10), 1)
+        self.assertAlmostEqual(ts.alpha, (20 - 1000 / 60) / (1000 / 60))
+
+    def test_slow_frame_runs_multiple_steps(self):
+        ts = game_utils.FixedTimestep(120)
+        self.assertEqual(ts.advance(1000 / 30), 4)
+
+    def test_spiral_of_death_clamped(self):
+        ts = game_utils.FixedTimestep(60, max_steps=5)
+        self.assertEqual(ts.advance(1000), 5)
+        self.assertEqual(ts.accumulator, 0.0)
+
+class _Pt:
+    def __init__(self, x, y, radius=0):
+        self.x = x; self.y = y; self.radius = radius
+
+@unittest.skipUnless(game_utils and hasattr(game_utils, 'SpatialHash'), 'SpatialHash unavailable')
+class TestSpatialHash(unittest.TestCase):
+    def test_query_matches_brute_force_in_insert_order(self):
+        import random
+        rng = random.Random(4)
+        objs = [_Pt(rng.uniform(-50, 850), rng.uniform(-50, 650), rng.choice([5, 18, 45])) for _ in range(300)]
+        grid = game_utils.SpatialHash(64)
+        grid.rebuild(objs)
+        for _ in range(200):
+            x, y, r = rng.uniform(0, 800), rng.uniform(0, 600), rng.choice([0, 5, 155])
+            hits = [o for o in grid.query(x, y, r) if ((o.x - x) ** 2 + (o.y - y) ** 2) ** 0.5 < o.radius + r]
+            expect = [o for o in objs if ((o.x - x) ** 2 + (o.y - y) ** 2) ** 0.5 < o.radius + r]
+            self.assertEqual(hits, expect)
+
+    def test_rebuild_clears_previous_entries(self):
+        grid = game_utils.SpatialHash(32)
+        a = _Pt(10, 10, 4)
+        grid.rebuild([a])
+        a.x = 300
+        grid.rebuild([a])
+        self.assertEqual(grid.query(10, 10, 4), [])
+        self.assertEqual(grid.query(300, 10, 1), [a])
+        self.assertEqual(len(grid), 1)
+
+class TestRngStreams(unittest.TestCase):
+    def test_streams_are_seeded_independently(self):
+        a = game_utils.RngStreams(42); b = game_utils.RngStreams(42)
+        for _ in range(100):
+            a.effects.random()
+        self.assertEqual([a.spawning.random() for _ in range(5)], [b.spawning.random() for _ in range(5)])
+        self.assertNotEqual(a.loot.random(), a.combat.random())
+        state = a.getstate()
+        x = a.worldgen.random()
+        a.setstate(state)
+        self.assertEqual(a.worldgen.random(), x)
+        self.assertEqual(a.numpy("effects").random(), b.numpy("effects").random())
+
+
+class TestFontManager(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        import pygame
+        pygame.font.init()
+
+    def test_fonts_are_shared_by_size(self):
+        fm = game_utils.FontManager()
+        self.assertIs(fm.get(24), fm.get(24))
+        self.assertIsNot(fm.get(24), fm.get(30))
+
+    def test_repeated_text_renders_once(self):
+        fm = game_utils.FontManager()
+        a = fm.render(24, "Score: 10", (255, 255, 255))
+        b = fm.render(fm.get(24), "Score: 10", [255, 255, 255])
+        self.assertIs(a, b)
+        fm.render(24, "Score: 20", (255, 255, 255))
+        self.assertEqual((fm.hits, fm.misses), (1, 2))
+
+    def test_lru_evicts_least_recently_used(self):
+        fm = game_utils.FontManager(capacity=2)
+        a = fm.render(24, "a", (0, 0, 0))
+        fm.render(24, "b", (0, 0, 0))
+        fm.render(24, "a", (0, 0, 0))   # a 变为最近使用
+        fm.render(24, "c", (0, 0, 0))   # 淘汰 b
+        self.assertIs(fm.render(24, "a", (0, 0, 0)), a)
+        misses = fm.misses
+        fm.render(24, "b", (0, 0, 0))
+        self.assertEqual(fm.misses, misses + 1)
+        self.assertEqual(fm.stats()["evictions"], 2)
+
+class TestGlyphAtlas(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        import pygame
+        pygame.font.init()
+
+    def test_steady_state_does_not_rasterize(self):
+        atlas = game_utils.GlyphAtlas(game_utils.fonts.get(22))
+        atlas.preload([(255, 220, 120)])
+        count = atlas.rasterized
+        self.assertEqual(count, len(game_utils.GlyphAtlas.CHARSET))
+        for life in range(40, 0, -1):
+            atlas.faded("+295g", (255, 220, 120), int(255 * life / 40))
+            atlas.faded("1037", (255, 220, 120), int(255 * life / 40))
+        self.assertEqual(atlas.rasterized, count)
+
+    def test_alpha_ladder_is_cached_and_quantized(self):
+        atlas = game_utils.GlyphAtlas(game_utils.fonts.get(22), alpha_steps=4)
+        full = atlas.faded("12", (255, 0, 0), 255)
+        self.assertIs(full, atlas.compose("12", (255, 0, 0)))
+        half = atlas.faded("12", (255, 0, 0), 130)
+        self.assertIs(half, atlas.faded("12", (255, 0, 0), 125))
+        self.assertEqual(max(half.get_at((x, y)).a for x in range(half.get_width()) for y in range(half.get_height())),
+                         max(full.get_at((x, y)).a for x in range(full.get_width()) for y in range(full.get_height())) * 127 // 255)
+        self.assertIsNotNone(atlas.faded("12", (255, 0, 0), 1))
+        self.assertIsNone(atlas.faded("12", (255, 0, 0), 0))
+
+
+class TestMenuPacer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        import os
+        import pygame
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        pygame.display.init()
+        pygame.event.get()
+
+    def _post(self, etype, **kw):
+        import pygame
+        pygame.event.post(pygame.event.Event(etype, **kw))
+
+    def test_focus_tracks_window_events(self):
+        import pygame
+        focus = game_utils.WindowFocus()
+        self.assertTrue(focus.update(pygame.event.Event(pygame.WINDOWFOCUSLOST)))
+        self.assertFalse(focus.update(pygame.event.Event(pygame.WINDOWMINIMIZED)))
+        focus.update(pygame.event.Event(pygame.WINDOWFOCUSGAINED))
+        self.assertFalse(focus.active)
+        focus.update(pygame.event.Event(pygame.WINDOWRESTORED))
+        self.assertTrue(focus.active)
+        focus.focused = False
+        focus.update(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_a))
+        self.assertTrue(focus.active)
+
+    def test_background_redraws_only_on_events(self):
+        import pygame
+        focus = game_utils.WindowFocus()
+        pacer = game_utils.MenuPacer(focus, frame_ms=10, idle_ms=20)
+        self.assertEqual(pacer.wait(), ([], True))
+        self._post(pygame.WINDOWFOCUSLOST)
+        pygame.time.wait(15)
+        events, redraw = pacer.wait()
+        self.assertEqual([e.type for e in events], [pygame.WINDOWFOCUSLOST])
+        self.assertTrue(redraw)
+        # 后台无事件：睡满 idle_ms，不重画
+        self.assertEqual(pacer.wait(), ([], False))
+        self._post(pygame.USEREVENT)
+        pygame.time.wait(15)
+        self.assertTrue(pacer.wait()[1])
+
+    def test_foreground_input_wakes_without_redraw(self):
+        import pygame
+        pacer = game_utils.MenuPacer(game_utils.WindowFocus(), frame_ms=1000)
+        self.assertTrue(pacer.wait()[1])
+        self._post(pygame.USEREVENT)
+        start = pygame.time.get_ticks()
+        events, redraw = pacer.wait()
+        self.assertEqual(len(events), 1)
+        self.assertFalse(redraw)
+        self.assertLess(pygame.time.get_ticks() - start, 500)
+
+
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
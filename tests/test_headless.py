@@ -0,0 +1,105 @@
+import os
+import unittest
+
+# 必须在导入 main_game 之前开启无头模式（dummy 视频/音频驱动）
+os.environ.setdefault("WARRIOR_HEADLESS", "1")
+
+import main_game  # noqa: E402
+from support import mute_achievements  # noqa: E402
+
+
+class TestHeadlessSimulation(unittest.TestCase):
+    def test_run_headless_advances_ticks(self):
+        stats = main_game.run_headless(ticks=600)
+        self.assertGreater(stats["ticks"], 0)
+        self.assertLessEqual(stats["ticks"], 600)
+
+    def test_step_session_skips_when_game_over(self):
+        s = main_game.GameSession("Normal")
+        s.game_over = True
+        self.assertFalse(main_game.step_session(s, main_game.TickInput()))
+
+    def test_input_moves_player(self):
+        s = main_game.GameSession("Normal")
+        s.walls.empty()
+        x0 = s.player.x
+        main_game.step_session(s, main_game.TickInput(move_x=-1))
+        self.assertLess(s.player.x, x0)
+
+    def test_draw_session_under_dummy_driver(self):
+        s = main_game.GameSession("Normal")
+        for _ in range(30):
+            main_game.step_session(s, main_game.TickInput(fire=True))
+        main_game.draw_session(s)
+
+
+
+class TestWallGroup(unittest.TestCase):
+    def test_mask_matches_rect_collisions(self):
+        import random
+        rng = random.Random(9)
+        rl = main_game.RoguelikeManager("Normal")
+        for room in range(3):
+            rl.room = room
+            walls = rl.gen_walls()
+            for _ in range(2000):
+                x, y = rng.uniform(-30, main_game.WIDTH + 30), rng.uniform(-30, main_game.HEIGHT + 30)
+                w, h = rng.choice([(10, 10), (36, 36), (40, 40)])
+                expect = any(main_game.pygame.Rect(x, y, w, h).colliderect(wall.rect) for wall in walls)
+                self.assertEqual(walls.overlaps_rect(x, y, w, h), expect, (x, y, w, h))
+
+    def test_membership_change_rebakes(self):
+        walls = main_game.WallGroup(main_game.Wall(100, 100, 50, 20))
+        self.assertTrue(walls.overlaps_circle(120, 110, 5))
+        walls.empty()
+        self.assertFalse(walls.overlaps_circle(120, 110, 5))
+        walls.add(main_game.Wall(300, 300, 10, 10))
+        self.assertTrue(walls.overlaps_rect(295, 295, 6, 6))
+
+
+class TestBomberChain(unittest.TestCase):
+    def setUp(self):
+        mute_achievements(self)
+
+    def _pack(self, s, count):
+        s.enemies.empty()
+        for i in range(count):
+            e = main_game.Bomber(s.walls, s.rl)
+            e.x = 120 + (i % 10) * 30
+            e.y = 60 + (i // 10) * 30
+            e.health = 1
+            s.enemies.add(e)
+
+    def test_chain_kills_each_bomber_once(self):
+        s = main_game.GameSession("Normal", seed=3)
+        self._pack(s, 60)
+        calls = []
+        ach = main_game.achievement_system
+        orig = ach.update_progress
+        ach.update_progress = lambda kind, value, **kw: calls.append((kind, value))
+        try:
+            first = next(iter(s.enemies))
+            s.enemies.remove(first)
+            gold0 = s.player.gold
+            chain = first.on_death(s.player, s.particles, s.enemies)
+        finally:
+            ach.update_progress = orig
+        self.assertEqual(chain["kills"], 59)
+        self.assertEqual(chain["blasts"], 60)
+        self.assertEqual(len(s.enemies), 0)
+        self.assertEqual(s.player.score, 590)
+        self.assertEqual(s.player.gold - gold0, 295)
+        self.assertEqual(calls, [("kill_count", 59)])
+
+    def test_chain_kills_count_toward_session(self):
+        s = main_game.GameSession("Normal", seed=3)
+        self._pack(s, 20)
+        s.rl.target_enemies = s.rl.spawned = 10 ** 9
+        first = next(iter(s.enemies))
+        s.bullets.spawn(first.x, first.y, 0, main_game.PLAYER_BULLET_COLOR, "player")
+        main_game.step_session(s, main_game.TickInput())
+        self.assertEqual(s.enemy_kills, 20)
+        self.assertEqual(len(s.enemies), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import os
+import unittest
+
+os.environ.setdefault("WARRIOR_HEADLESS", "1")
+
+import numpy as np  # noqa: E402
+import pygame  # noqa: E402
+import main_game as mg  # noqa: E402
+
+
+def _frame(draw):
+    mg.screen.fill((20, 60, 40))
+    draw()
+    return pygame.surfarray.array3d(mg.screen).astype(int)
+
+
+class TestHudLayer(unittest.TestCase):
+    def setUp(self):
+        self.s = mg.GameSession("Normal", seed=3, skill='rapid')
+        p = self.s.player
+        p.weapon = 2; p.grenade_cooldown = 250; p.shield = 37; p.shield_max = 80; p.health = 63
+        p.attack_boost_cooldown = 412
+
+    def test_redraws_only_when_inputs_change(self):
+        hud = mg.HudLayer()
+        hud.draw(mg.screen, self.s)
+        self.assertEqual(hud.redraws, 2)
+        hud.draw(mg.screen, self.s)
+        self.assertEqual(hud.redraws, 2)
+        self.s.player.gold += 5
+        hud.draw(mg.screen, self.s)
+        self.assertEqual(hud.redraws, 3)
+        self.s.player.attack_boost_cooldown -= 1   # 冷却条宽度与文字都没变
+        hud.draw(mg.screen, self.s)
+        self.assertEqual(hud.redraws, 3)
+        self.s.player.attack_boost_cooldown -= 60
+        hud.draw(mg.screen, self.s)
+        self.assertEqual(hud.redraws, 4)
+
+    def test_layer_matches_direct_draw(self):
+        s = self.s; p = s.player; rl = s.rl
+
+        def direct():
+            mg.screen.blit(mg.fonts.render(mg.FONT_36, f"Score: {p.score}", mg.TEXT_COLOR), (20, 25))
+            mg.screen.blit(mg.fonts.render(mg.FONT_36, f"Gold: {p.gold}", (255, 215, 0)), (20, 55))
+            fr = mg.fonts.render(mg.FONT_36, f"Floor {rl.floor} - Room {rl.room}  (Risk {rl.risk}/20)", mg.TEXT_COLOR)
+            mg.screen.blit(fr, (mg.WIDTH - fr.get_width() - 20, 20))
+            en = mg.fonts.render(mg.FONT_24, f"Enemies: {len(s.enemies)}/{rl.cap}", (200, 150, 150))
+            mg.screen.blit(en, (mg.WIDTH - en.get_width() - 20, 60))
+            mg.draw_health_bar(p, 150, 25, 200, 20)
+            mg.draw_weapon_indicator(20, mg.HEIGHT - 120, p.weapon)
+            mg.draw_ui_panel(p)
+
+        a = _frame(direct)
+        b = _frame(lambda: mg.HudLayer().draw(mg.screen, s))
+        # RLE 编码的透明度混合与普通混合最多差 1
+        self.assertLessEqual(int(np.abs(a - b).max()), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import unittest
+from unittest import mock
+
+os.environ.setdefault("WARRIOR_HEADLESS", "1")
+
+import numpy as np  # noqa: E402
+import pygame  # noqa: E402
+import main_game as mg  # noqa: E402
+
+
+def _pixels():
+    return pygame.surfarray.array3d(mg.screen).astype(int)
+
+
+class TestMenuScene(unittest.TestCase):
+    def setUp(self):
+        mg.menu_scene.invalidate()
+
+    def tearDown(self):
+        mg.menu_scene.invalidate()
+
+    def test_skill_menu_matches_direct_draw_while_meteors_move(self):
+        menu = mg.SkillSelectMenu()
+        overlay = pygame.Surface((mg.WIDTH, mg.HEIGHT), pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 160))
+        for ticks, selected in ((1000, 0), (1250, 0), (1600, 2), (2100, 2)):
+            menu.selected = selected
+            with mock.patch("pygame.time.get_ticks", return_value=ticks):
+                mg.draw_background()
+                mg.screen.blit(overlay, (0, 0))
+                menu._paint(mg.screen)
+                direct = _pixels()
+                mg.screen.fill((0, 0, 0))
+                # 缓存的画面延续上一帧，只在流星处补画
+                if ticks == 1000:
+                    self.assertIsNone(menu.draw())
+                else:
+                    mg.screen.blit(self._last, (0, 0))
+                    menu.draw()
+                self._last = mg.screen.copy()
+            # RLE 编码的透明度混合与普通混合最多差 1
+            self.assertLessEqual(int(np.abs(direct - _pixels()).max()), 1, ticks)
+
+    def test_control_menu_after_skill_menu_is_repainted(self):
+        # main() 连续打开两个菜单，默认都选第 0 项，不能沿用技能菜单的缓存画面
+        with mock.patch("pygame.time.get_ticks", return_value=1000):
+            self.assertIsNone(mg.SkillSelectMenu().draw())
+            skill = _pixels()
+            self.assertIsNone(mg.ControlSelectMenu().draw())
+        self.assertFalse((skill == _pixels()).all())
+
+    def test_shop_redraws_only_when_values_change(self):
+        s = mg.GameSession("Normal", seed=4)
+        shop = mg.ShopMenu()
+        shop.build_options(s.player)
+        self.assertIsNone(shop.draw(s))
+        redraws = mg.menu_scene.redraws
+        self.assertEqual(shop.draw(s), [])
+        self.assertEqual(mg.menu_scene.redraws, redraws)
+        s.player.gold += 10
+        self.assertIsNone(shop.draw(s))
+        self.assertEqual(mg.menu_scene.redraws, redraws + 1)
+        self.assertEqual(shop.draw(s), [])
+
+    def test_pause_snapshots_frame_until_invalidated(self):
+        pause = mg.PauseMenu()
+        mg.screen.fill((200, 30, 30))
+        self.assertIsNone(pause.draw())
+        first = _pixels()
+        # 遮罩只叠一次，不会逐帧叠暗
+        pause.draw(); pause.draw()
+        self.assertTrue((first == _pixels()).all())
+        mg.screen.fill((30, 200, 30))
+        mg.menu_scene.invalidate()
+        pause.draw()
+        self.assertGreater(int(_pixels()[5, 5, 1]), int(first[5, 5, 1]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import os
+import unittest
+
+os.environ.setdefault("WARRIOR_HEADLESS", "1")
+
+import numpy as np  # noqa: E402
+import pygame  # noqa: E402
+import main_game as mg  # noqa: E402
+from explosions import ExplosionFlipbooks, ExplosionList, FRAMES  # noqa: E402
+from particles import ParticleEmitter  # noqa: E402
+from sprite_cache import SpriteCache  # noqa: E402
+
+
+class TestParticleEmitter(unittest.TestCase):
+    def test_emit_update_and_expire(self):
+        sparks = ParticleEmitter(np.random.default_rng(1), capacity=8)
+        sparks.emit(100, 50, 30, (255, 220, 100))
+        sparks.emit(10, 10, 20, (150, 150, 150))
+        self.assertEqual(len(sparks), 50)
+        self.assertTrue(((sparks.size >= 2) & (sparks.size <= 6)).all())
+        self.assertTrue(((sparks.life >= 20) & (sparks.life <= 40)).all())
+        x0 = sparks.x.copy(); s0 = sparks.size.copy(); life0 = sparks.life.copy()
+        sparks.update()
+        self.assertTrue(np.allclose(sparks.size, s0 - 0.1))
+        self.assertTrue((sparks.life == life0 - 1).all())
+        self.assertFalse(np.array_equal(sparks.x, x0))
+        for _ in range(int(life0.min()) - 1):
+            sparks.update()
+        self.assertEqual(len(sparks), int(np.count_nonzero(life0 > life0.min())))
+        for _ in range(40):
+            sparks.update()
+        self.assertEqual(len(sparks), 0)
+
+    def test_draw_matches_direct_circles(self):
+        sparks = ParticleEmitter(np.random.default_rng(2))
+        sparks.emit(120.6, 80.3, 40, (255, 100, 50))
+        sparks.emit(60, 100, 30, (255, 200, 100), ring=(255, 150, 50))
+        for _ in range(12):
+            sparks.update()
+        direct = pygame.Surface((240, 180)); direct.fill((20, 20, 35))
+        for i in range(len(sparks)):
+            x = int(sparks.x[i]); y = int(sparks.y[i]); size = float(sparks.size[i])
+            color, ring = sparks.kinds[sparks._kind[i]]
+            pygame.draw.circle(direct, color, (x, y), int(size))
+            if ring:
+                pygame.draw.circle(direct, ring, (x, y), max(1, int(size * 1.5)), 1)
+        cached = pygame.Surface((240, 180)); cached.fill((20, 20, 35))
+        sparks.draw(cached, SpriteCache())
+        self.assertEqual(pygame.image.tobytes(direct, "RGB"), pygame.image.tobytes(cached, "RGB"))
+
+    def test_effects_do_not_consume_game_rng(self):
+        s = mg.GameSession("Normal", seed=5)
+        state = mg.game_rng.getstate()
+        s.particles.sparks.emit(300, 200, 30, (255, 200, 100), ring=(255, 150, 50))
+        mg.create_explosion(s.particles, 300, 200, 2.0)
+        self.assertEqual(mg.game_rng.getstate(), state)
+        self.assertEqual(len(s.particles.sparks), 30)
+        self.assertEqual(len(s.particles.explosions), 1)
+        self.assertEqual(len(s.particles), 0)
+
+    def test_pooled_floating_text_is_drawn_at_spawn_point(self):
+        s = mg.GameSession("Normal", seed=5)
+        old = mg.FloatingText(100, 60, "7")
+        old.prev_x, old.prev_y = 100, 61
+        mg._FLOAT_TEXT_POOL.append(old)
+        mg.spawn_floating_text(s.particles, 700, 500, 12, mg.FLOAT_TEXT_COLOR_ENEMY)
+        self.assertIn(old, s.particles)
+        # 复用的漂浮数字不能从上一次的位置插值过来
+        with mg.interpolated_positions(s, 0.5):
+            self.assertEqual((old.x, old.y), (700, 500))
+
+
+class TestExplosions(unittest.TestCase):
+    def test_animation_plays_once_from_first_frame(self):
+        books = ExplosionFlipbooks()
+        exs = ExplosionList()
+        exs.spawn(100, 100, 1.0, "grenade")
+        exs.update()                                   # 生成它的逻辑帧结束：第 0 帧
+        surf = pygame.Surface((200, 200)); surf.fill((0, 0, 0))
+        exs.draw(surf, books)
+        self.assertNotEqual(tuple(surf.get_at((100, 100)))[:3], (0, 0, 0))
+        for _ in range(FRAMES - 1):
+            exs.update()
+        self.assertEqual(len(exs), 1)
+        exs.update()
+        self.assertEqual(len(exs), 0)
+        self.assertEqual(len(books), 1)
+
+    def test_flipbooks_are_deterministic_per_palette_and_size(self):
+        a = ExplosionFlipbooks(); b = ExplosionFlipbooks()
+        fa, ca = a.book("boss", 2); fb, cb = b.book("boss", 2)
+        self.assertEqual(ca, cb)
+        self.assertEqual(pygame.image.tobytes(fa[7], "RGBA"), pygame.image.tobytes(fb[7], "RGBA"))
+        self.assertNotEqual(pygame.image.tobytes(fa[7], "RGBA"), pygame.image.tobytes(a.book("enemy", 2)[0][7], "RGBA"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import os
+import csv
+import tempfile
+import unittest
+
+os.environ.setdefault("WARRIOR_HEADLESS", "1")
+
+import main_game  # noqa: E402
+from profiler import FrameProfiler  # noqa: E402
+
+
+class TestFrameProfiler(unittest.TestCase):
+    def test_disabled_records_nothing(self):
+        p = FrameProfiler(["a", "b"])
+        p.begin_frame(); p.lap("a"); p.lap("b"); p.end_frame()
+        self.assertEqual(len(p.history), 0)
+
+    def test_ring_buffer_and_csv(self):
+        p = FrameProfiler(["a", "b"], ["enemies"], capacity=5, enabled=True)
+        for i in range(8):
+            p.begin_frame(); p.lap("a"); p.lap("b"); p.sample(enemies=i); p.end_frame()
+        self.assertEqual(len(p.history), 5)
+        path = os.path.join(tempfile.mkdtemp(), "p.csv")
+        p.dump_csv(path)
+        with open(path, encoding="utf-8") as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[0], ["frame", "frame_ms", "a", "b", "n_enemies"])
+        self.assertEqual([r[0] for r in rows[1:]], ["3", "4", "5", "6", "7"])
+        self.assertEqual(rows[-1][-1], "7")
+
+    def test_headless_run_profiles_every_phase(self):
+        path = os.path.join(tempfile.mkdtemp(), "run.csv")
+        main_game.run_headless(ticks=60, seed=5, profile_path=path)
+        self.assertFalse(main_game.profiler.enabled)
+        with open(path, encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        self.assertGreater(len(rows), 0)
+        for phase in ("input", "boss", "player", "spawning", "enemies", "bullets", "particles"):
+            self.assertGreater(sum(float(r[phase]) for r in rows), 0.0, phase)
+
+    def test_overlay_draws(self):
+        s = main_game.GameSession(seed=1)
+        main_game.profiler.enabled = True
+        try:
+            for _ in range(3):
+                main_game.profiler.begin_frame()
+                main_game.step_session(s, main_game.TickInput())
+                main_game.draw_session(s)
+                main_game.sample_profile_counters(s)
+                main_game.profiler.end_frame()
+            main_game.profiler.draw(main_game.screen, main_game.FONT_24)
+        finally:
+            main_game.profiler.enabled = False
+            main_game.profiler.history.clear()
+
+
+if __name__ == "__main__":
+    unittest.main()
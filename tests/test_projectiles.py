@@ -0,0 +1,73 @@
+import os
+import random
+import unittest
+
+os.environ.setdefault("WARRIOR_HEADLESS", "1")
+
+import numpy as np  # noqa: E402
+import pygame  # noqa: E402
+from projectiles import ProjectileStore, TRAIL, OWNER_ENEMY  # noqa: E402
+
+
+class TestProjectileStore(unittest.TestCase):
+    def test_spawn_step_and_angled_pellets(self):
+        s = ProjectileStore(800, 600)
+        s.spawn(100, 500, -10, (255, 215, 0), "player")
+        s.spawn(100, 500, -11.0, (255, 150, 0), "player", 6, dx=3.0, dy=-11.0)
+        s.spawn(50, 50, 5, (255, 50, 50), "enemy")
+        s.step()
+        self.assertEqual(s.x.tolist(), [100, 103.0, 50])
+        self.assertEqual(s.y.tolist(), [490, 489.0, 55])
+        self.assertEqual(s.owner[2], OWNER_ENEMY)
+        self.assertEqual(len(s.palette), 3)
+
+    def test_keep_preserves_order_and_grows(self):
+        s = ProjectileStore(800, 600, capacity=4)
+        for i in range(10):
+            s.spawn(i, 0, 1, (1, 2, 3), "player")
+        mask = np.array([i % 3 != 0 for i in range(10)])
+        s.keep(mask)
+        self.assertEqual(s.x.tolist(), [1, 2, 4, 5, 7, 8])
+        self.assertGreaterEqual(s.capacity, 10)
+
+    def test_trail_ring_buffer_caps_at_trail_length(self):
+        s = ProjectileStore(800, 600)
+        s.spawn(0, 0, 1, (1, 2, 3), "player")
+        for _ in range(TRAIL + 3):
+            s.step()
+        self.assertEqual(int(s._tn[0]), TRAIL)
+        self.assertEqual(float(s._ty[0, s.head]), TRAIL + 3)
+
+    def test_offscreen_margin(self):
+        s = ProjectileStore(800, 600)
+        for x, y in ((-21, 0), (-20, 0), (820, 600), (821, 0), (0, 621)):
+            s.spawn(x, y, 0, (1, 2, 3), "enemy")
+        self.assertEqual(s.offscreen().tolist(), [True, False, False, True, True])
+
+    def test_box_overlaps_matches_pygame_rects(self):
+        rng = random.Random(2)
+        walls = [pygame.Rect(100, 200, 80, 20), pygame.Rect(300, 150, 20, 100), pygame.Rect(500, 250, 120, 20)]
+        s = ProjectileStore(800, 600)
+        pts = []
+        for _ in range(3000):
+            x, y, r = rng.uniform(80, 640), rng.uniform(130, 290), rng.choice([5, 6, 8])
+            s.spawn(x, y, 0, (1, 2, 3), "player", r)
+            pts.append((x, y, r))
+        got = s.box_overlaps(np.array([tuple(w) for w in walls]))
+        for (x, y, r), hit in zip(pts, got.tolist()):
+            expect = any(pygame.Rect(x - r, y - r, r * 2, r * 2).colliderect(w) for w in walls)
+            self.assertEqual(hit, expect, (x, y, r))
+
+    def test_interpolation_leaves_new_bullets_alone(self):
+        s = ProjectileStore(800, 600)
+        s.spawn(0, 0, 10, (1, 2, 3), "player")
+        s.snapshot(); s.step()
+        s.spawn(50, 50, 10, (1, 2, 3), "player")
+        saved = s.lerp_positions(0.5)
+        self.assertEqual(s.y.tolist(), [5.0, 50.0])
+        s.restore_positions(saved)
+        self.assertEqual(s.y.tolist(), [10.0, 50.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
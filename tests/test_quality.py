@@ -0,0 +1,77 @@
+import os
+import unittest
+
+os.environ.setdefault("WARRIOR_HEADLESS", "1")
+
+import main_game as mg  # noqa: E402
+from quality import QualityGovernor, LEVELS, FULL  # noqa: E402
+
+
+class TestQualityGovernor(unittest.TestCase):
+    def test_steps_down_under_load_and_back_up_when_idle(self):
+        q = QualityGovernor(budget_ms=16.0, window=10, raise_after=30)
+        for _ in range(9):
+            self.assertFalse(q.record(25.0))
+        self.assertTrue(q.record(25.0))
+        self.assertEqual(q.level, FULL - 1)
+        for _ in range(20):
+            q.record(25.0)
+        self.assertEqual(q.level, FULL - 3)
+        # 降档后需要持续低于预算一段时间才升档
+        for _ in range(29):
+            q.record(4.0)
+        self.assertEqual(q.level, FULL - 3)
+        q.record(4.0)
+        self.assertEqual(q.level, FULL - 2)
+        # 在预算附近不升不降
+        for _ in range(100):
+            q.record(12.0)
+        self.assertEqual(q.level, FULL - 2)
+        q.reset()
+        self.assertEqual(q.level, FULL)
+
+    def test_fixed_level_ignores_frame_times(self):
+        q = QualityGovernor(level=1, enabled=False)
+        for _ in range(100):
+            self.assertFalse(q.record(100.0))
+        self.assertEqual(q.settings, LEVELS[1])
+        self.assertEqual(q.scaled(30), int(30 * LEVELS[1].spark_scale))
+        # 新对局开始时固定档位（WARRIOR_QUALITY）不被重置
+        q.reset()
+        self.assertEqual(q.level, 1)
+
+
+class TestQualityLevels(unittest.TestCase):
+    def setUp(self):
+        self._level = mg.quality.level
+
+    def tearDown(self):
+        mg.quality.level = self._level
+
+    def _run(self, level, seed=11):
+        mg.quality.level = level
+        stats = mg.run_headless(ticks=1500, skill='triple', seed=seed)
+        return {k: v for k, v in stats.items() if k not in ("seconds", "speedup")}
+
+    def test_lowest_level_does_not_change_gameplay(self):
+        self.assertEqual(self._run(0), self._run(FULL))
+
+    def test_lowest_level_caps_cosmetics_and_draws(self):
+        mg.quality.level = 0
+        low = LEVELS[0]
+        s = mg.GameSession("Normal", seed=3)
+        for i in range(low.max_explosions + 5):
+            mg.create_explosion(s.particles, 100 + i, 200)
+            mg.spawn_floating_text(s.particles, 100 + i, 200, i, mg.FLOAT_TEXT_COLOR_ENEMY)
+        self.assertEqual(len(s.particles.explosions), low.max_explosions)
+        self.assertEqual(len(s.particles), low.max_floating_texts)
+        # 最旧的被顶掉，最新的保留
+        self.assertEqual(max(int(ft.text) for ft in s.particles), low.max_explosions + 4)
+        self.assertEqual(len(list(mg.background_layer.meteors())), low.meteors)
+        for _ in range(30):
+            mg.step_session(s, mg.TickInput(fire=True))
+        mg.draw_session(s)
+
+
+if __name__ == "__main__":
+    unittest.main()
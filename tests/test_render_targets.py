@@ -0,0 +1,71 @@
+import os
+import unittest
+
+os.environ.setdefault("WARRIOR_HEADLESS", "1")
+
+import numpy as np  # noqa: E402
+import pygame  # noqa: E402
+import main_game as mg  # noqa: E402
+from support import mute_achievements  # noqa: E402
+from game_utils import RenderTargets  # noqa: E402
+
+
+class TestRenderTargets(unittest.TestCase):
+    def test_surfaces_are_reused(self):
+        rt = RenderTargets()
+        a = rt.overlay((64, 48), (0, 0, 0, 180))
+        self.assertIs(rt.overlay((64, 48), (0, 0, 0, 180)), a)
+        self.assertEqual(tuple(a.get_at((10, 10))), (0, 0, 0, 180))
+        self.assertIsNot(rt.overlay((64, 48), (0, 0, 0, 200)), a)
+        s = rt.scratch((64, 48), alpha=True, tag="flash")
+        self.assertIs(rt.scratch((64, 48), alpha=True, tag="flash"), s)
+        self.assertIsNot(rt.scratch((64, 48), alpha=True, tag="other"), s)
+        self.assertEqual(rt.allocations, 4)
+
+
+class TestCameraOffset(unittest.TestCase):
+    def setUp(self):
+        mute_achievements(self)
+        self._ticks = pygame.time.get_ticks
+        pygame.time.get_ticks = lambda: 5000
+
+    def tearDown(self):
+        pygame.time.get_ticks = self._ticks
+
+    def _session(self):
+        s = mg.GameSession("Hard", seed=9, skill='triple')
+        for t in range(85):
+            s.player.health = max(s.player.health, 50)
+            mg.step_session(s, mg.TickInput(0, 0, fire=t % 20 == 0))
+        g = mg.Grenade(s.player.x, s.player.y - 30, -8, mg.GRENADE_COLOR, "player")
+        for _ in range(4):
+            g.update()
+        s.grenades.add(g)
+        s.boss_warning_timer[0] = 0
+        return s
+
+    def test_shake_translates_world_and_restores_positions(self):
+        s = self._session()
+        s.shake_offset = (0, 0)
+        mg.draw_session(s)
+        still = pygame.surfarray.array3d(mg.screen).astype(int)
+        before = [(e.x, e.y) for e in mg._interpolated_entities(s)]
+        bullets = (s.bullets.x.copy(), s.bullets.y.copy())
+        trails = [list(g.trail) for g in s.grenades]
+        self.assertTrue(s.grenades and len(s.bullets))
+        dx, dy = 5, -3
+        s.shake_offset = (dx, dy)
+        mg.draw_session(s)
+        shaken = pygame.surfarray.array3d(mg.screen).astype(int)
+        # HUD 不随镜头移动，只比较中间的世界区域
+        top, bottom = mg.HUD_TOP_H + 10, mg.HEIGHT - mg.HUD_BOTTOM_H - 10
+        world = still[10:mg.WIDTH - 10, top:bottom]
+        moved = shaken[10 + dx:mg.WIDTH - 10 + dx, top + dy:bottom + dy]
+        self.assertTrue(np.array_equal(world, moved))
+        self.assertEqual(before, [(e.x, e.y) for e in mg._interpolated_entities(s)])
+        self.assertTrue(np.array_equal(bullets[0], s.bullets.x) and np.array_equal(bullets[1], s.bullets.y))
+        self.assertEqual(trails, [g.trail for g in s.grenades])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import os
+import tempfile
+import unittest
+
+os.environ.setdefault("WARRIOR_HEADLESS", "1")
+
+import replay  # noqa: E402
+import main_game  # noqa: E402
+
+
+class TestReplayFormat(unittest.TestCase):
+    def test_tick_encoding_roundtrip(self):
+        seen = set()
+        for mx in (-1, 0, 1):
+            for my in (-1, 0, 1):
+                for fire in (False, True):
+                    for weapon in (None, 0, 1, 2):
+                        for skill in (False, True):
+                            code = replay.encode_tick(mx, my, fire, weapon, skill)
+                            self.assertLess(code, replay.OP_REWARD_PICK)
+                            self.assertEqual(replay.decode_tick(code), (mx, my, fire, weapon, skill))
+                            seen.add(code)
+        self.assertEqual(len(seen), 144)
+
+    def test_writer_reader_roundtrip_across_chunks(self):
+        path = os.path.join(tempfile.mkdtemp(), "r.wrr")
+        w = replay.ReplayWriter(path, {"seed": 3})
+        n = replay.CHUNK_RECORDS * 2 + 10
+        for i in range(n):
+            w.tick(main_game.TickInput(i % 3 - 1, 0, fire=(i % 2 == 0)))
+        w.reward_pick(2); w.shop_buy(1); w.shop_leave()
+        w.close()
+        r = replay.ReplayReader(path)
+        self.assertEqual(r.header["seed"], 3)
+        ops = list(r)
+        self.assertEqual(len(ops), n + 3)
+        self.assertEqual(ops[1], ("tick", (0, 0, False, None, False)))
+        self.assertEqual(ops[-3:], [("reward", 2), ("buy", 1), ("leave", None)])
+
+    def test_reader_rejects_other_versions(self):
+        path = os.path.join(tempfile.mkdtemp(), "old.wrr")
+        w = replay.ReplayWriter(path, {"seed": 3})
+        w.close()
+        with open(path, "r+b") as f:
+            data = f.read().replace(b'"version": %d' % replay.VERSION, b'"version": 1')
+            f.seek(0); f.write(data)
+        with self.assertRaises(ValueError):
+            replay.ReplayReader(path)
+
+
+class TestDeterministicReplay(unittest.TestCase):
+    def test_recorded_run_replays_identically(self):
+        path = os.path.join(tempfile.mkdtemp(), "run.wrr")
+
+        def zigzag(s):
+            t = s.ticks
+            return main_game.TickInput((t // 40) % 3 - 1, (t // 90) % 3 - 1, fire=True,
+                                       weapon=((t // 300) % 3 if t % 300 == 0 else None))
+
+        stats = main_game.run_headless(ticks=1500, seed=1234, policy=zigzag, record_path=path)
+        s = main_game.play_replay(path)
+        self.assertEqual(s.seed, 1234)
+        self.assertEqual(s.ticks, stats["ticks"])
+        self.assertEqual(s.player.score, stats["score"])
+        self.assertEqual(s.enemy_kills, stats["kills"])
+        self.assertEqual((s.rl.floor, s.rl.room), (stats["floor"], stats["room"]))
+
+    def test_cosmetic_rolls_do_not_shift_gameplay(self):
+        # 额外消耗 effects 流（相当于多画/少画特效）不应改变其他流的结果
+        def greedy(s):
+            for _ in range(s.ticks % 7):
+                main_game.game_rng.effects.random()
+            return main_game.autopilot_input(s)
+
+        plain = main_game.run_headless(ticks=1500, seed=77)
+        noisy = main_game.run_headless(ticks=1500, seed=77, policy=greedy)
+        for key in ("ticks", "floor", "room", "score", "kills", "game_over"):
+            self.assertEqual(plain[key], noisy[key])
+
+
+if __name__ == "__main__":
+    unittest.main()
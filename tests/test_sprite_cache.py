@@ -0,0 +1,109 @@
+import os
+import unittest
+
+os.environ.setdefault("WARRIOR_HEADLESS", "1")
+
+import pygame  # noqa: E402
+import main_game  # noqa: E402  (初始化 display，convert 需要)
+from sprite_cache import SpriteCache, ENEMY_PAD, METEOR_ORIGIN  # noqa: E402
+from projectiles import ProjectileStore  # noqa: E402
+
+
+def _pixels(surf):
+    return pygame.image.tobytes(surf, "RGB")
+
+
+class TestSpriteCache(unittest.TestCase):
+    def test_charger_blit_matches_direct_draw(self):
+        cache = SpriteCache()
+        for x, y in ((100, 80), (100.7, 80.4)):
+            direct = pygame.Surface((200, 160)); direct.fill((20, 20, 35))
+            pygame.draw.circle(direct, (200, 60, 255), (x, y), 18)
+            pygame.draw.circle(direct, (160, 80, 180), (x, y), 24, 2)
+            cached = pygame.Surface((200, 160)); cached.fill((20, 20, 35))
+            pad = 18 + ENEMY_PAD
+            cached.blit(cache.charger(18, (200, 60, 255), (160, 80, 180)), (int(x) - pad, int(y) - pad))
+            self.assertEqual(_pixels(direct), _pixels(cached))
+
+    def test_draw_bar_matches_rects(self):
+        cache = SpriteCache()
+        for frac in (0.0, 0.01, 0.37, 0.999, 1.0):
+            direct = pygame.Surface((200, 40)); direct.fill((0, 0, 0))
+            pygame.draw.rect(direct, (100, 0, 0), (20.6, 10, 150, 15))
+            pygame.draw.rect(direct, (0, 200, 0), (20.6, 10, 150 * frac, 15))
+            pygame.draw.rect(direct, (200, 200, 200), (20.6, 10, 150, 15), 2)
+            cached = pygame.Surface((200, 40)); cached.fill((0, 0, 0))
+            cache.draw_bar(cached, 20.6, 10, 150, 15, frac, (100, 0, 0), (0, 200, 0), border=((200, 200, 200), 2))
+            self.assertEqual(_pixels(direct), _pixels(cached), frac)
+
+    def test_enemy_colors_share_bucket_surfaces(self):
+        cache = SpriteCache()
+        a = cache.enemy(18, (220, 70, 80), 0.0)
+        b = cache.enemy(18, (221, 71, 81), 0.1)
+        c = cache.enemy(18, (220, 70, 80), 3.1)
+        self.assertIs(a, b)
+        self.assertIsNot(a, c)
+        # 同一档位的不同原始颜色不额外占缓存项
+        self.assertEqual(len(cache), 2)
+
+
+    def test_meteor_trail_matches_direct_circles(self):
+        cache = SpriteCache()
+        for x, y in ((300.2, 200.0), (300.9, 200.49), (301.0, 200.5), (455.5, 77.75)):
+            direct = pygame.Surface((800, 600)); direct.fill((20, 20, 35))
+            for j in range(10):
+                pygame.draw.circle(direct, (200, 200, 255), (int(x - j * 3), int(y - j * 1.5)), max(1, int(3 - j * 0.3)))
+            cached = pygame.Surface((800, 600)); cached.fill((20, 20, 35))
+            cached.blit(cache.meteor_trail((200, 200, 255), y % 1 >= 0.5),
+                        (int(x) - METEOR_ORIGIN[0], int(y) - METEOR_ORIGIN[1]))
+            self.assertEqual(_pixels(direct), _pixels(cached), (x, y))
+
+    def test_player_bullet_blit_matches_direct_draw(self):
+        cache = SpriteCache()
+        store = ProjectileStore(200, 160)
+        store.spawn(100.7, 80.4, -8, (255, 255, 0), "player", size=6)
+        direct = pygame.Surface((200, 160)); direct.fill((20, 20, 35))
+        pygame.draw.circle(direct, (255, 255, 0), (100.7, 80.4), 6)
+        pygame.draw.circle(direct, (255, 255, 255), (98.7, 78.4), 3)
+        cached = pygame.Surface((200, 160)); cached.fill((20, 20, 35))
+        store.draw(cached, cache)
+        self.assertEqual(_pixels(direct), _pixels(cached))
+
+    def test_trails_and_halos_are_translucent(self):
+        cache = SpriteCache()
+        store = ProjectileStore(400, 300)
+        store.spawn(100, 250, -20, (255, 255, 0), "player", size=6)
+        store.spawn(300, 100, 0, (255, 80, 80), "enemy", size=5)
+        for _ in range(4):
+            store.step()
+        surf = pygame.Surface((400, 300)); surf.fill((0, 0, 0))
+        store.draw(surf, cache)
+        # 最旧的拖尾点 alpha 为 200 - 3*40 = 80，与黑底混合后约为颜色的 80/255
+        oldest = surf.get_at((100, 250 - 20))
+        self.assertAlmostEqual(oldest.r, 255 * 80 // 255, delta=2)
+        # 敌人子弹光晕（r+2 外圈）alpha 150
+        halo = surf.get_at((300 + 6, 100))
+        self.assertAlmostEqual(halo.r, 255 * 150 // 255, delta=2)
+        self.assertEqual(tuple(surf.get_at((300, 100)))[:3], (255, 150, 150))
+
+
+class TestBackgroundLayer(unittest.TestCase):
+    def test_rebakes_only_when_walls_change(self):
+        s = main_game.GameSession("Normal", seed=11)
+        layer = main_game.BackgroundLayer()
+        first = layer.room(s.walls)
+        self.assertIs(layer.room(s.walls), first)
+        self.assertEqual(layer.bakes, 1)
+        s.rl.start_room(s.enemies, s.walls)
+        self.assertIsNot(layer.room(s.walls), first)
+        self.assertEqual(layer.bakes, 2)
+
+    def test_walls_are_baked_into_room(self):
+        s = main_game.GameSession("Normal", seed=11)
+        direct = main_game.BackgroundLayer().starfield().copy()
+        for w in s.walls:
+            w.draw(direct)
+        self.assertEqual(_pixels(direct), _pixels(main_game.BackgroundLayer().room(s.walls)))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import math
+import os
+import unittest
+
+os.environ.setdefault("WARRIOR_HEADLESS", "1")
+
+import pygame  # noqa: E402
+import main_game  # noqa: E402,F401  (先由 main_game 按无头模式初始化显示)
+import start_game as sg  # noqa: E402
+
+
+def _pixels():
+    return pygame.surfarray.array3d(sg.screen).astype(int)
+
+
+class TestStartMenuAssets(unittest.TestCase):
+    def test_button_skin_matches_direct_draw(self):
+        rect = pygame.Rect(300, 200, 200, 60)
+        sg.screen.fill((30, 40, 50))
+        shadow = pygame.Surface(rect.size, pygame.SRCALPHA)
+        pygame.draw.rect(shadow, (0, 0, 0, 60), shadow.get_rect(), border_radius=12)
+        sg.screen.blit(shadow, (rect.x, rect.y + 4))
+        pygame.draw.rect(sg.screen, (50, 140, 200), rect, border_radius=12)
+        overlay = pygame.Surface((rect.width, rect.height // 2 + 1), pygame.SRCALPHA)
+        for y in range(overlay.get_height()):
+            a = int(70 * (1 - y / max(1, overlay.get_height() - 1)))
+            pygame.draw.line(overlay, (255, 255, 255, a), (0, y), (rect.width, y))
+        sg.screen.blit(overlay, rect.topleft)
+        pygame.draw.rect(sg.screen, (120, 170, 220), rect, 3, border_radius=12)
+        direct = _pixels()
+        sg.screen.fill((30, 40, 50))
+        sg.draw_fancy_button(rect, (50, 140, 200), border_color=(120, 170, 220))
+        self.assertTrue((direct == _pixels()).all())
+
+    def test_scanlines_match_direct_lines_at_phase_step(self):
+        sg.screen.fill(sg.BACKGROUND)
+        for i in range(0, sg.HEIGHT, 4):
+            c = max(0, min(255, 20 + int(10 * (i / sg.HEIGHT)) + int(4 * math.sin(i * 0.02))))
+            pygame.draw.line(sg.screen, (c, c, min(255, c + 10)), (0, i), (sg.WIDTH, i))
+        direct = _pixels()
+        sg.screen.blit(sg._scanline_background(0), (0, 0))
+        self.assertTrue((direct == _pixels()).all())
+        # 同一相位档内不重建
+        self.assertIs(sg._scanline_background(1), sg._scanline_background(0))
+
+    def test_background_sprites_are_bounded(self):
+        for _ in range(600):
+            sg.draw_background()
+        # 每个光斑最多 TWINKLE_STEPS 张，不随帧数增长
+        self.assertLessEqual(len(sg._GLOW_SPRITES), len(sg._BG_PARTICLES) * sg.TWINKLE_STEPS)
+
+
+if __name__ == "__main__":
+    unittest.main()